@@ -0,0 +1,151 @@
+import json
+from datetime import datetime
+from flask import Blueprint, Response, abort, request
+from models import Venue, Artist
+from cache import page_cache
+from conditional import (
+    conditional,
+    venues_version,
+    artists_version,
+    shows_version,
+    venue_version,
+    artist_version,
+)
+from pagination import page_size, datetime_arg, encode_cursor, decode_cursor
+from queries import (
+    venue_list,
+    artist_list,
+    id_page,
+    show_page,
+    venue_detail,
+    artist_detail,
+    show_detail,
+)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Read-only JSON API over the queries behind the HTML pages.
+#
+# Lists return {"data": [...], "next_cursor": ...}; pass next_cursor back as
+# ?after= for the next page, ?limit= sets the page size. ?fields=id,name
+# keeps only those keys of each item. Responses go through the same page
+# cache and conditional GET as the pages.
+
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def _fields():
+    value = request.args.get("fields")
+    if not value:
+        return None
+    return [field.strip() for field in value.split(",") if field.strip()]
+
+
+def _pick(item, fields):
+    if fields is None:
+        return item
+    return {field: item[field] for field in fields if field in item}
+
+
+def json_response(data, status=200):
+    return Response(dumps(data), status=status, mimetype="application/json")
+
+
+def item_response(item):
+    if item is None:
+        abort(404)
+    return json_response(_pick(item, _fields()))
+
+
+def list_response(items, next_cursor):
+    fields = _fields()
+    return json_response(
+        {"data": [_pick(item, fields) for item in items], "next_cursor": next_cursor}
+    )
+
+
+def _id_cursor():
+    after = request.args.get("after")
+    if not after:
+        return None
+    try:
+        return int(after)
+    except ValueError:
+        abort(400)
+
+
+def _id_list(query, model):
+    rows, last = id_page(query, model, _id_cursor(), page_size())
+    return list_response(
+        [dict(row._mapping) for row in rows], str(last) if last else None
+    )
+
+
+@api.errorhandler(400)
+@api.errorhandler(404)
+def api_error(error):
+    return json_response({"error": error.name}, error.code)
+
+
+@api.route("/venues")
+@conditional(venues_version)
+@page_cache.cached("venues")
+def venues():
+    return _id_list(venue_list(), Venue)
+
+
+@api.route("/venues/<int:venue_id>")
+@conditional(venue_version)
+@page_cache.cached("venue:{venue_id}")
+def venue(venue_id):
+    return item_response(venue_detail(venue_id))
+
+
+@api.route("/artists")
+@conditional(artists_version)
+@page_cache.cached("artists")
+def artists():
+    return _id_list(artist_list(), Artist)
+
+
+@api.route("/artists/<int:artist_id>")
+@conditional(artist_version)
+@page_cache.cached("artist:{artist_id}")
+def artist(artist_id):
+    return item_response(artist_detail(artist_id))
+
+
+@api.route("/shows")
+@conditional(shows_version)
+@page_cache.cached("shows")
+def shows():
+    # same filters as /shows: ?from=&to= on start_time
+    data, last = show_page(
+        datetime_arg("from"),
+        datetime_arg("to"),
+        decode_cursor(request.args.get("after")),
+        page_size(),
+    )
+    return list_response(data, encode_cursor(*last) if last else None)
+
+
+@api.route("/shows/<int:show_id>")
+@page_cache.cached("shows")
+def show(show_id):
+    return item_response(show_detail(show_id))
@@ -0,0 +1,220 @@
+import sys
+from datetime import datetime
+from flask import (
+    Blueprint,
+    abort,
+    current_app,
+    flash,
+    redirect,
+    render_template,
+    request,
+    url_for,
+)
+from models import db, Artist
+from search import search, ARTISTS
+from genres import resolve_genres
+from cache import page_cache
+from conditional import conditional, artists_version, artist_version
+from queries import artist_list, artist_detail
+from views import render_listing, artist_dependents
+
+
+# Artist pages: listing, search, detail, and the create and edit forms. The
+# form classes are imported by the views building them, see venues.py.
+
+artists_bp = Blueprint("artists", __name__)
+
+
+@artists_bp.route("/artists")
+@conditional(artists_version)
+@page_cache.cached("artists")
+def artists():
+    artists = (
+        artist_list()
+        .order_by(Artist.id)
+        .yield_per(current_app.config["STREAM_BATCH_SIZE"])
+    )
+
+    data = ({"id": artist.id, "name": artist.name} for artist in artists)
+    return render_listing("pages/artists.html", artists=data)
+
+
+@artists_bp.route("/artists/search", methods=["POST"])
+def search_artists():
+    search_term = request.form.get("search_term", "")
+    page = request.form.get("page", 1, type=int)
+    response = search(ARTISTS, search_term, page)
+
+    return render_template(
+        "pages/search_artists.html",
+        results=response,
+        search_term=request.form.get("search_term", ""),
+    )
+
+
+@artists_bp.route("/artists/<int:artist_id>")
+@conditional(artist_version)
+@page_cache.cached("artist:{artist_id}")
+def show_artist(artist_id):
+    data = artist_detail(artist_id)
+    if not data:
+        abort(404)
+    return render_template("pages/show_artist.html", artist=data)
+
+
+#  ----------------------------------------------------------------
+#  Update
+#  ----------------------------------------------------------------
+
+
+@artists_bp.route("/artists/<int:artist_id>/edit", methods=["GET"])
+def edit_artist(artist_id):
+    from forms import ArtistForm
+
+    form = ArtistForm()
+    artist = Artist.query.filter(Artist.id == artist_id).one_or_none()
+
+    if artist is None:
+        abort(404)
+    else:
+        form.name.data = artist.name
+        form.city.data = artist.city
+        form.state.data = artist.state
+        form.phone.data = artist.phone
+        form.genres.data = artist.genres
+        form.facebook_link.data = artist.facebook_link
+        form.image_link.data = artist.image_link
+        form.website_link.data = artist.website_link
+        form.seeking_venue.data = artist.seeking_venue
+        form.seeking_description.data = artist.seeking_description
+
+    return render_template("forms/edit_artist.html", form=form, artist=artist)
+
+
+@artists_bp.route("/artists/<int:artist_id>/edit", methods=["POST"])
+def edit_artist_submission(artist_id):
+    # take values from the form submitted, and update existing
+    # artist record with ID <artist_id> using the new attributes
+    update_error = False
+
+    from forms import ArtistForm
+
+    form = ArtistForm()
+
+    name = form.name.data.strip()
+    city = form.city.data.strip()
+    state = form.state.data.strip()
+    phone = form.phone.data
+    image_link = form.image_link.data.strip()
+    facebook_link = form.facebook_link.data.strip()
+    genres = form.genres.data
+    website_link = form.website_link.data.strip()
+    seeking_venue = True if form.seeking_venue.data == "Yes" else False
+    seeking_description = form.seeking_description.data.strip()
+
+    try:
+        artist_genres = resolve_genres(genres)
+        artist = Artist.query.get(artist_id)
+        artist.name = name
+        artist.city = city
+        artist.state = state
+        artist.phone = phone
+        artist.image_link = image_link
+        artist.facebook_link = facebook_link
+        artist.website_link = website_link
+        artist.seeking_venue = seeking_venue
+        artist.seeking_description = seeking_description
+
+        artist.genres = artist_genres
+        # the genres are not columns of the row, so touch it explicitly
+        artist.updated_at = datetime.utcnow()
+        dependents = artist_dependents(artist_id)
+        db.session.commit()
+        page_cache.bump("artists", f"artist:{artist_id}", *dependents)
+        # on successful submission flash success
+        flash("Artist " + name + " was successfully updated!")
+    except:
+        db.session.rollback()
+        flash("An error occurred. Artist " + name + " could not be updated.")
+        print(sys.exc_info())
+        abort(500)
+    finally:
+        db.session.close()
+
+    return redirect(url_for("artists.show_artist", artist_id=artist_id))
+
+
+#  ----------------------------------------------------------------
+#  Create Artist
+#  ----------------------------------------------------------------
+
+
+@artists_bp.route("/artists/create", methods=["GET"])
+def create_artist_form():
+    from forms import ArtistForm
+
+    form = ArtistForm()
+    return render_template("forms/new_artist.html", form=form)
+
+
+@artists_bp.route("/artists/create", methods=["POST"])
+def create_artist_submission():
+    from forms import ArtistForm
+
+    form = ArtistForm()
+
+    name = form.name.data.strip()
+    city = form.city.data.strip()
+    state = form.state.data
+    phone = form.phone.data
+    image_link = form.image_link.data.strip()
+    facebook_link = form.facebook_link.data.strip()
+    genres = form.genres.data
+    website_link = form.website_link.data.strip()
+    seeking_venue = True if form.seeking_venue.data == "Yes" else False
+    seeking_description = form.seeking_description.data.strip()
+
+    if not form.phone.validate(form):
+        for fieldName, errorMessages in form.errors.items():
+            for err in errorMessages:
+                if fieldName == "phone":
+                    flash(err)
+        return redirect(url_for("venues.create_venue_submission"))
+    else:
+        insert_error = False
+        try:
+            artist_genres = resolve_genres(genres)
+            new_artist = Artist(
+                name=name,
+                city=city,
+                state=state,
+                phone=phone,
+                image_link=image_link,
+                facebook_link=facebook_link,
+                website_link=website_link,
+                seeking_venue=seeking_venue,
+                seeking_description=seeking_description,
+                genres=artist_genres,
+            )
+
+            db.session.add(new_artist)
+            db.session.commit()
+        except:
+            insert_error = True
+            db.session.rollback()
+            print(sys.exc_info())
+        finally:
+            db.session.close()
+        if not insert_error:
+            page_cache.bump("artists")
+            flash("Artist " + request.form["name"] + " was successfully listed!")
+            return redirect(url_for("index"))
+        else:
+            flash(
+                "An error occurred. Artist "
+                + request.form["name"]
+                + " could not be listed."
+            )
+            abort(500)
+
+            # return render_template("pages/home.html")
@@ -0,0 +1,163 @@
+from io import BytesIO
+from flask import g, request, session as flask_session
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+from config import engine_options
+from models import db
+from routing import reads_from_replica
+
+
+# Optional ASGI entry point, e.g. `uvicorn asgi:application`, or
+# `uvicorn --factory asgi:create_asgi_app`. Needs asgiref and asyncpg or
+# aiosqlite on top of requirements.txt.
+#
+# The read-only pages in ASYNC_ENDPOINTS are served on an AsyncSession
+# (asyncpg for PostgreSQL, aiosqlite for SQLite), so a worker keeps many
+# queries in flight instead of blocking on each of them. Their request is
+# dispatched to the usual Flask view inside AsyncSession.run_sync(), with
+# db.session standing for the sync session of the AsyncSession, so the
+# queries of the view keep their asynchronous I/O and the view runs as it
+# does under WSGI: the before_request and after_request hooks, the
+# conditional GET and the page cache included. Every other request, and
+# any page with pending flashed messages, is passed to the WSGI app.
+#
+# Importing this module builds nothing: `application` creates the Flask app
+# on first use. Its sync engines only connect for the requests passed to
+# the WSGI app.
+
+ASYNC_ENDPOINTS = {
+    "venues.venues",
+    "venues.show_venue",
+    "venues.search_venues",
+    "artists.artists",
+    "artists.show_artist",
+    "artists.search_artists",
+    "shows.shows",
+}
+
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_url(url):
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+
+def _make_engine(url):
+    url = async_url(url)
+    return create_async_engine(url, **engine_options(str(url)))
+
+
+async def _read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def _send(send, response, head=False):
+    await send(
+        {
+            "type": "http.response.start",
+            "status": response.status_code,
+            "headers": [
+                (key.lower().encode("latin-1"), value.encode("latin-1"))
+                for key, value in response.headers.items()
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": b"" if head else response.get_data()})
+
+
+class AsgiApp:
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi_application = WsgiToAsgi(flask_app)
+        config = flask_app.config
+        self.engines = {None: _make_engine(config["SQLALCHEMY_DATABASE_URI"])}
+        if "replica" in config["SQLALCHEMY_BINDS"]:
+            self.engines["replica"] = _make_engine(config["SQLALCHEMY_BINDS"]["replica"]["url"])
+
+    def _environ(self, scope, body):
+        # the environ the WSGI app would get for the request
+        instance = WsgiToAsgiInstance(self.flask_app)
+        instance.scope = scope
+        return instance.build_environ(scope, BytesIO(body))
+
+    def _dispatch(self, session):
+        # runs in the greenlet of run_sync(), where the sync session awaits
+        # the async driver
+        db.session.registry.set(session)
+        try:
+            try:
+                response = self.flask_app.full_dispatch_request()
+            except Exception as e:
+                response = self.flask_app.handle_exception(e)
+            # streamed listings run their queries while they are read
+            if response.is_streamed:
+                response.make_sequence()
+            return response
+        finally:
+            db.session.registry.clear()
+
+    async def _handle(self):
+        engine = self.engines[None]
+        if reads_from_replica() and "replica" in self.engines:
+            engine = self.engines["replica"]
+            g.read_from_replica = True
+        async with AsyncSession(engine) as session:
+            return await session.run_sync(self._dispatch)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                for engine in self.engines.values():
+                    await engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http":
+            return await self.wsgi_application(scope, receive, send)
+
+        body = await _read_body(receive)
+        with self.flask_app.request_context(self._environ(scope, body)):
+            # pages showing flashed messages also clear them from the session
+            if request.endpoint in ASYNC_ENDPOINTS and "_flashes" not in flask_session:
+                response = await self._handle()
+            else:
+                response = None
+        if response is None:
+            # hand the request, with the body already read, to the WSGI app
+            async def replay():
+                return {"type": "http.request", "body": body, "more_body": False}
+
+            return await self.wsgi_application(scope, replay, send)
+        await _send(send, response, head=scope["method"] == "HEAD")
+
+
+def create_asgi_app(flask_app=None):
+    if flask_app is None:
+        from app import create_app
+
+        flask_app = create_app()
+    return AsgiApp(flask_app)
+
+
+_application = None
+
+
+async def application(scope, receive, send):
+    global _application
+    if _application is None:
+        _application = create_asgi_app()
+    await _application(scope, receive, send)
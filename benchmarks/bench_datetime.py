@@ -0,0 +1,55 @@
+"""Per-row cost of the ``datetime`` template filter.
+
+Compares the original filter (``str()`` then ``dateutil`` reparse then
+``babel.dates.format_datetime``) with ``formatting.format_datetime``. Run
+from the repository root::
+
+    python -m benchmarks.bench_datetime [--rows 10000]
+"""
+import argparse
+import timeit
+from datetime import datetime, timedelta
+
+import babel.dates
+import dateutil.parser
+
+from formatting import DATETIME_FORMATS, format_datetime
+
+
+def legacy_format_datetime(value, format="medium"):
+    date = dateutil.parser.parse(value)
+    return babel.dates.format_datetime(date, DATETIME_FORMATS[format], locale="en")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    start = datetime(2035, 4, 1, 20, 0)
+    times = [start + timedelta(hours=7 * i) for i in range(args.rows)]
+
+    for value in times[:100]:
+        assert legacy_format_datetime(str(value), "full") == format_datetime(
+            value, "full"
+        )
+
+    cases = {
+        "legacy (str + reparse)": lambda: [
+            legacy_format_datetime(str(value), "full") for value in times
+        ],
+        "format_datetime": lambda: [format_datetime(value, "full") for value in times],
+    }
+
+    print(f"{args.rows} rows, best of {args.repeat}")
+    baseline = None
+    for name, case in cases.items():
+        best = min(timeit.repeat(case, number=1, repeat=args.repeat))
+        per_row = best / args.rows * 1e6
+        baseline = baseline or per_row
+        print(f"{name:24} {per_row:8.2f} us/row  {baseline / per_row:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
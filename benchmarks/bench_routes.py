@@ -0,0 +1,239 @@
+"""Latency, SQL statement count and peak memory of every route, at several
+catalog sizes. Each scale gets a fresh synthetic catalog (``scale`` venues
+and artists, ten shows each), in a temporary SQLite file by default or in
+``--database-url``, whose tables are dropped and recreated. The page cache
+is disabled so that every request runs its queries. Run from the
+repository root::
+
+    python -m benchmarks.bench_routes [--scales 100,1000,10000]
+        [--output results.json] [--compare baseline.json]
+
+Results are written as JSON; ``--compare`` prints the change of the median
+latency and statement count against a previous run.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+
+def routes(scale):
+    # (name, method, url, form data), on rows from the middle of the catalog;
+    # the form data may be a function of the number of the request
+    record_id = max(scale // 2, 1)
+    today = datetime.now().date()
+    # after the synthetic shows, a day apart so that none is a double booking
+    first_show = datetime.combine(today, datetime.min.time()) + timedelta(days=400, hours=20)
+
+    def show_form(number):
+        start_time = first_show + timedelta(days=number)
+        return {
+            "venue_id": record_id,
+            "artist_id": record_id,
+            "start_time": start_time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+    venue_form = {
+        "name": "Bench Venue",
+        "city": "Austin",
+        "state": "TX",
+        "address": "1 Bench Street",
+        "phone": "5550000000",
+        "genres": ["Jazz", "Blues"],
+        "facebook_link": "",
+        "image_link": "",
+        "website_link": "",
+        "seeking_description": "",
+    }
+    artist_form = {key: value for key, value in venue_form.items() if key != "address"}
+    artist_form["name"] = "Bench Artist"
+    return [
+        ("index", "GET", "/", None),
+        ("venues", "GET", "/venues", None),
+        ("show_venue", "GET", f"/venues/{record_id}", None),
+        ("search_venues", "POST", "/venues/search", {"search_term": "Venue 1"}),
+        ("artists", "GET", "/artists", None),
+        ("show_artist", "GET", f"/artists/{record_id}", None),
+        ("search_artists", "POST", "/artists/search", {"search_term": "Artist 1"}),
+        ("shows", "GET", "/shows", None),
+        ("shows_from", "GET", f"/shows?from={today.isoformat()}", None),
+        ("api_venues", "GET", "/api/v1/venues", None),
+        ("api_venue", "GET", f"/api/v1/venues/{record_id}", None),
+        ("api_artists", "GET", "/api/v1/artists", None),
+        ("api_artist", "GET", f"/api/v1/artists/{record_id}", None),
+        ("api_shows", "GET", "/api/v1/shows", None),
+        ("export_venues", "GET", "/export/venues.ndjson", None),
+        ("export_shows", "GET", "/export/shows.csv", None),
+        ("create_venue_form", "GET", "/venues/create", None),
+        ("edit_venue_form", "GET", f"/venues/{record_id}/edit", None),
+        ("create_artist_form", "GET", "/artists/create", None),
+        ("edit_artist_form", "GET", f"/artists/{record_id}/edit", None),
+        ("create_show_form", "GET", "/shows/create", None),
+        # writes last, each repetition adds or changes a row
+        ("create_venue", "POST", "/venues/create", venue_form),
+        ("edit_venue", "POST", f"/venues/{record_id}/edit", venue_form),
+        ("create_artist", "POST", "/artists/create", artist_form),
+        ("edit_artist", "POST", f"/artists/{record_id}/edit", artist_form),
+        ("create_show", "POST", "/shows/create", show_form),
+    ]
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def request(client, method, url, data):
+    # read the whole body, streamed responses run their queries meanwhile
+    response = client.open(url, method=method, data=data)
+    response.get_data()
+    response.close()
+    return response
+
+
+def measure(client, method, url, data, repeat, statements):
+    numbers = itertools.count()
+
+    def form():
+        return data(next(numbers)) if callable(data) else data
+
+    request(client, method, url, form())  # warm up
+
+    timings = []
+    counts = []
+    for _ in range(repeat):
+        form_data = form()
+        del statements[:]
+        started = time.perf_counter()
+        response = request(client, method, url, form_data)
+        timings.append(time.perf_counter() - started)
+        counts.append(len(statements))
+
+    form_data = form()
+    tracemalloc.start()
+    request(client, method, url, form_data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "status": response.status_code,
+        "p50_ms": statistics.median(timings) * 1000,
+        "p95_ms": _percentile(timings, 0.95) * 1000,
+        "mean_ms": statistics.fmean(timings) * 1000,
+        "statements": max(counts),
+        "peak_kib": peak / 1024,
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as baseline_file:
+        baseline = {
+            (row["scale"], row["route"]): row
+            for row in json.load(baseline_file)["results"]
+        }
+    print(f"\nchange against {baseline_path}")
+    for row in results:
+        before = baseline.get((row["scale"], row["route"]))
+        if before is None:
+            continue
+        ratio = row["p50_ms"] / before["p50_ms"] if before["p50_ms"] else 0
+        print(
+            f"{row['scale']:>7} {row['route']:20} p50 {ratio:6.2f}x  "
+            f"statements {before['statements']:>3} -> {row['statements']:>3}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default="100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database-url", help="database to use, emptied first")
+    parser.add_argument("--output", default="bench_routes.json")
+    parser.add_argument("--compare", help="previous results to compare against")
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if database_url is None:
+        directory = tempfile.mkdtemp()
+        database_url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    os.environ["DATABASE_URL"] = database_url
+
+    from sqlalchemy import event
+    from app import create_app
+    from cache import page_cache
+    from genres import invalidate_genre_cache
+    from models import db
+    from benchmarks.synthetic import populate
+
+    app = create_app()
+    app.config.update(CACHE_BACKEND=None, WTF_CSRF_ENABLED=False, SECRET_KEY="bench")
+    page_cache.init_app(app)
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    results = []
+    for scale in [int(scale) for scale in args.scales.split(",")]:
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            invalidate_genre_cache()
+            populate(venues=scale, artists=scale, shows=scale * 10)
+            engine = db.engine
+
+        event.listen(engine, "before_cursor_execute", count)
+        client = app.test_client()
+        print(f"\n{scale} venues and artists, {scale * 10} shows")
+        for name, method, url, data in routes(scale):
+            row = measure(client, method, url, data, args.repeat, statements)
+            row.update(scale=scale, route=name, method=method, url=url)
+            results.append(row)
+            print(
+                f"{name:20} {row['status']}  p50 {row['p50_ms']:8.2f} ms  "
+                f"p95 {row['p95_ms']:8.2f} ms  {row['statements']:3} statements  "
+                f"peak {row['peak_kib']:9.1f} KiB"
+            )
+        event.remove(engine, "before_cursor_execute", count)
+
+    with open(args.output, "w") as output:
+        json.dump(
+            {
+                "commit": _commit(),
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "database": database_url.split(":", 1)[0],
+                "repeat": args.repeat,
+                "results": results,
+            },
+            output,
+            indent=2,
+        )
+    print(f"\nresults written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
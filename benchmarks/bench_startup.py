@@ -0,0 +1,152 @@
+"""Cold start cost of the app, measured with ``python -X importtime``. Each
+stage runs ``--repeat`` times in a fresh interpreter, on an empty SQLite
+database, and reports the median time spent importing, the median wall time
+of the stage, the heaviest top-level imports, and which of the modules
+create_app() defers were loaded. Run from the repository root::
+
+    python -m benchmarks.bench_startup [--repeat 10] [--baseline HEAD~1]
+
+``--baseline`` runs the same stages on another revision, extracted with
+``git archive``, and prints the change against it.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+# modules that only some requests or commands need
+DEFERRED = ("alembic", "flask_migrate", "wtforms", "flask_wtf", "babel", "dateutil")
+
+# app.py builds the app on import before the application factory
+APP = """
+import app as module
+application = module.create_app() if hasattr(module, "create_app") else module.app
+"""
+
+STAGES = {
+    "interpreter": "",
+    "import app": "import app",
+    "app ready": APP,
+    "first form": APP
+    + """
+application.config.update(WTF_CSRF_ENABLED=False, SECRET_KEY="bench")
+assert application.test_client().get("/venues/create").status_code == 200
+""",
+}
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    "seconds": elapsed,
+    "loaded": [name for name in {deferred!r} if name in sys.modules],
+}}))
+"""
+
+
+def parse_importtime(stderr):
+    # [(nesting depth, module, cumulative microseconds)]
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # the header
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append((depth, name.strip(), int(cumulative)))
+    return modules
+
+
+def run_stage(tree, code, database_url, directory):
+    env = dict(
+        os.environ,
+        PYTHONPATH=tree,
+        DATABASE_URL=database_url,
+    )
+    env.pop("DATABASE_REPLICA_URL", None)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD.format(code=code, deferred=DEFERRED)],
+        cwd=directory,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1]), parse_importtime(result.stderr)
+
+
+def measure(tree, repeat):
+    directory = tempfile.mkdtemp()
+    database_url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    # a first run compiles the bytecode of the tree
+    run_stage(tree, STAGES["app ready"], database_url, directory)
+    results = {}
+    for name, code in STAGES.items():
+        runs = [run_stage(tree, code, database_url, directory) for _ in range(repeat)]
+        imports = [sum(us for depth, _, us in modules if depth == 0) for _, modules in runs]
+        # the modules imported by app.py and create_app() themselves
+        heaviest = sorted(
+            ((module, us) for depth, module, us in runs[-1][1] if depth <= 1 and module != "app"),
+            key=lambda item: -item[1],
+        )[:5]
+        results[name] = {
+            "import_ms": statistics.median(imports) / 1000,
+            "wall_ms": statistics.median(stats["seconds"] for stats, _ in runs) * 1000,
+            "loaded": runs[-1][0]["loaded"],
+            "heaviest": [(module, us / 1000) for module, us in heaviest],
+        }
+    return results
+
+
+def extract(revision):
+    directory = tempfile.mkdtemp()
+    archive = subprocess.run(
+        ["git", "archive", "--format=tar", revision], capture_output=True, check=True
+    ).stdout
+    path = os.path.join(directory, "tree.tar")
+    with open(path, "wb") as f:
+        f.write(archive)
+    with tarfile.open(path) as tar:
+        tar.extractall(directory)
+    return directory
+
+
+def report(title, results, baseline=None):
+    print(f"\n{title}")
+    for name, row in results.items():
+        line = (
+            f"{name:12} imports {row['import_ms']:7.1f} ms  "
+            f"wall {row['wall_ms']:7.1f} ms"
+        )
+        if baseline and name in baseline:
+            before = baseline[name]["import_ms"]
+            line += f"  ({row['import_ms'] - before:+7.1f} ms imports)"
+        print(line)
+        if row["loaded"]:
+            print(f"{'':12} deferred modules loaded: {', '.join(row['loaded'])}")
+    heaviest = results["app ready"]["heaviest"]
+    print("heaviest imports of app ready: " + ", ".join(f"{m} {ms:.1f} ms" for m, ms in heaviest))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--baseline", help="git revision to compare against")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        baseline = measure(extract(args.baseline), args.repeat)
+        report(f"baseline {args.baseline}", baseline)
+    report("working tree", measure(os.getcwd(), args.repeat), baseline)
+
+
+if __name__ == "__main__":
+    main()
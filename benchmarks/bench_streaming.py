@@ -0,0 +1,60 @@
+"""Peak memory and time to first byte of the listing pages, buffered vs
+streamed (``STREAMED_PAGES``), on a synthetic SQLite catalog. Run from the
+repository root::
+
+    python -m benchmarks.bench_streaming [--rows 100000]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+
+def measure(client, url):
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    response = client.get(url, buffered=False)
+    chunks = iter(response.response)
+    size = len(next(chunks))
+    first_byte = time.perf_counter() - started
+    size += sum(len(chunk) for chunk in chunks)
+    response.close()
+    total = time.perf_counter() - started
+    return first_byte, total, tracemalloc.get_traced_memory()[1], size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+    from app import create_app
+    from models import db
+    from benchmarks.synthetic import populate
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        populate(venues=args.rows, artists=args.rows, shows=0)
+
+    client = app.test_client()
+    tracemalloc.start()
+    print(f"{args.rows} rows per table")
+    for url, endpoint in (("/artists", "artists.artists"), ("/venues", "venues.venues")):
+        for streamed in (False, True):
+            app.config["STREAMED_PAGES"] = {endpoint} if streamed else set()
+            first_byte, total, peak, size = measure(client, url)
+            mode = "streamed" if streamed else "buffered"
+            print(
+                f"{url:9} {mode:8} ttfb {first_byte * 1000:8.1f} ms  "
+                f"total {total * 1000:8.1f} ms  peak {peak / 2**20:7.1f} MiB  "
+                f"body {size / 2**20:5.1f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
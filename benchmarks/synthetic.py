@@ -0,0 +1,233 @@
+"""Synthetic Fyyur catalogs for the benchmarks.
+
+``populate()`` fills the current database, SQLite or PostgreSQL, with a
+deterministic catalog in which no venue or artist is double booked. To build one from the command line (the tables are
+dropped and recreated first)::
+
+    python -m benchmarks.synthetic --database-url postgresql://... \\
+        --venues 1000 --artists 1000 --shows 10000
+"""
+import argparse
+import os
+import random
+from datetime import datetime, time, timedelta
+from itertools import accumulate
+
+from sqlalchemy import text
+
+from counters import rebuild_show_counters
+from models import (
+    db,
+    Genre,
+    Venue,
+    Artist,
+    Show,
+    venue_genre,
+    artist_genre,
+    SHOW_DEFAULT_DURATION,
+)
+
+CITIES = [
+    ("San Francisco", "CA"),
+    ("Los Angeles", "CA"),
+    ("New York", "NY"),
+    ("Austin", "TX"),
+    ("Seattle", "WA"),
+    ("Chicago", "IL"),
+    ("Nashville", "TN"),
+    ("New Orleans", "LA"),
+]
+
+GENRES = [
+    "Alternative",
+    "Blues",
+    "Classical",
+    "Country",
+    "Electronic",
+    "Folk",
+    "Funk",
+    "Hip-Hop",
+    "Heavy Metal",
+    "Instrumental",
+    "Jazz",
+    "Musical Theatre",
+    "Pop",
+    "Punk",
+    "R&B",
+    "Reggae",
+    "Rock n Roll",
+    "Soul",
+    "Other",
+]
+
+# shows mostly start in the evening, and twice as often on Friday and
+# Saturday as on other days
+START_HOURS = [18, 19, 20, 21, 22, 23]
+START_HOUR_WEIGHTS = [1, 3, 5, 4, 2, 1]
+WEEKDAY_WEIGHTS = [1, 1, 1, 1.5, 2, 2, 1]
+
+# shows are spread over the past year and the next six months
+PAST_DAYS = 365
+UPCOMING_DAYS = 180
+
+# shows start on the hour or half past, and book their venue and artist in
+# steps of half an hour, so that none of them overlap
+SLOT = timedelta(minutes=30)
+
+
+def _insert(table, rows, batch_size):
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(table.insert(), rows[start : start + batch_size])
+
+
+def _popular(rng, count):
+    # ids skewed towards the low end: a few venues and artists host most of
+    # the shows, like in a real catalog
+    return int(count * rng.random() ** 2) + 1
+
+
+def _shows(rng, count, venues, artists, today):
+    # draws the venue, artist and start of each show again until neither the
+    # venue nor the artist is booked at that time
+    days = [today + timedelta(days=offset) for offset in range(-PAST_DAYS, UPCOMING_DAYS)]
+    day_weights = list(accumulate(WEEKDAY_WEIGHTS[day.weekday()] for day in days))
+    hour_weights = list(accumulate(START_HOUR_WEIGHTS))
+    slots = -(-SHOW_DEFAULT_DURATION // SLOT)
+    booked = set()
+    shows = []
+    draws = count * 100
+    while len(shows) < count:
+        if not draws:
+            raise ValueError(f"no room for {count} shows at {venues} venues and {artists} artists")
+        draws -= 1
+        venue_id = _popular(rng, venues)
+        artist_id = _popular(rng, artists)
+        (day,) = rng.choices(days, cum_weights=day_weights)
+        (hour,) = rng.choices(START_HOURS, cum_weights=hour_weights)
+        start_time = datetime.combine(day, time(hour, rng.choice((0, 30))))
+        first = (start_time - datetime.min) // SLOT
+        keys = [
+            key
+            for slot in range(first, first + slots)
+            for key in (("venue", venue_id, slot), ("artist", artist_id, slot))
+        ]
+        if booked.isdisjoint(keys):
+            booked.update(keys)
+            shows.append((venue_id, artist_id, start_time))
+    return shows
+
+
+def _genre_links(rng, key, count):
+    return [
+        {"genre_id": genre_id, key: record_id}
+        for record_id in range(1, count + 1)
+        for genre_id in rng.sample(range(1, len(GENRES) + 1), rng.randint(1, 3))
+    ]
+
+
+def _reset_sequences():
+    # the rows were inserted with explicit ids
+    if db.session.get_bind().dialect.name != "postgresql":
+        return
+    for model in (Genre, Venue, Artist, Show):
+        table = model.__tablename__
+        db.session.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+                f'coalesce(max(id), 0) + 1, false) FROM "{table}"'
+            )
+        )
+
+
+def populate(venues=100, artists=100, shows=1000, seed=0, batch_size=5000):
+    """Fill the current database with a deterministic catalog.
+
+    Must be called inside an application context, on empty tables."""
+    rng = random.Random(seed)
+    today = datetime.now().date()
+
+    _insert(
+        Genre.__table__,
+        [{"id": genre_id, "name": name} for genre_id, name in enumerate(GENRES, 1)],
+        batch_size,
+    )
+    _insert(
+        Venue.__table__,
+        [
+            {
+                "id": venue_id,
+                "name": f"Venue {venue_id}",
+                "city": city,
+                "state": state,
+                "address": f"{venue_id} Main Street",
+                "phone": "5551234567",
+                "image_link": f"https://example.com/venues/{venue_id}.jpg",
+            }
+            for venue_id, (city, state) in (
+                (venue_id, rng.choice(CITIES)) for venue_id in range(1, venues + 1)
+            )
+        ],
+        batch_size,
+    )
+    _insert(venue_genre, _genre_links(rng, "venue_id", venues), batch_size)
+    _insert(
+        Artist.__table__,
+        [
+            {
+                "id": artist_id,
+                "name": f"Artist {artist_id}",
+                "city": city,
+                "state": state,
+                "phone": "5557654321",
+                "image_link": f"https://example.com/artists/{artist_id}.jpg",
+            }
+            for artist_id, (city, state) in (
+                (artist_id, rng.choice(CITIES)) for artist_id in range(1, artists + 1)
+            )
+        ],
+        batch_size,
+    )
+    _insert(artist_genre, _genre_links(rng, "artist_id", artists), batch_size)
+    if venues and artists:
+        _insert(
+            Show.__table__,
+            [
+                {
+                    "id": show_id,
+                    "venue_id": venue_id,
+                    "artist_id": artist_id,
+                    "start_time": start_time,
+                    "end_time": start_time + SHOW_DEFAULT_DURATION,
+                }
+                for show_id, (venue_id, artist_id, start_time) in enumerate(
+                    _shows(rng, shows, venues, artists, today), 1
+                )
+            ],
+            batch_size,
+        )
+    rebuild_show_counters()
+    _reset_sequences()
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a synthetic Fyyur catalog.")
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--venues", type=int, default=1000)
+    parser.add_argument("--artists", type=int, default=1000)
+    parser.add_argument("--shows", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        populate(args.venues, args.artists, args.shows, args.seed)
+
+
+if __name__ == "__main__":
+    main()
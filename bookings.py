@@ -0,0 +1,298 @@
+from bisect import bisect_right
+from calendar import isleap
+from datetime import MAXYEAR, date, timedelta
+from itertools import islice, takewhile
+
+from sqlalchemy import select, text, union_all
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Show, SHOW_MAX_DURATION
+
+
+# Double-booking checks. A show occupies its venue and its artist over
+# [start_time, end_time); two shows of the same venue or of the same artist
+# must not overlap.
+#
+# An overlapping show starts less than SHOW_MAX_DURATION before the new one,
+# so the check is a short range scan of the (venue_id, start_time) and
+# (artist_id, start_time) indexes, whatever the size of the catalog. A batch
+# of recurring shows is checked with the same query over the whole span of
+# the batch, and an import chunk with one query per venue and artist.
+#
+# book_show() and book_shows() insert first and look for overlaps
+# afterwards, in the same transaction. On PostgreSQL they first take
+# transaction-level advisory locks on the venue and the artist, so a
+# concurrent booking of either waits for ours to commit and then sees it in
+# its own check. The exclusion constraints that migrations e5c1a9b3d7f2 and
+# f0d4e6a2b8c1 add where btree_gist is available hold within a monthly
+# partition only, and miss two shows overlapping across a month boundary.
+# On SQLite the insert takes the database write lock, so a concurrent
+# booking either committed before ours and is seen by the check, or waits
+# for ours and sees it in its own check.
+
+# occurrences of a recurring show, a daily show for a year
+MAX_OCCURRENCES = 366
+# span of a recurring series, a rule going on longer is cut there
+MAX_SPAN = timedelta(days=366)
+# the Gregorian calendar, weekdays and leap years, repeats every 400 years
+CALENDAR_CYCLE = 400
+# first keys of the PostgreSQL advisory locks on a venue and on an artist,
+# the second being its id
+VENUE_LOCK = 7240302
+ARTIST_LOCK = 7240303
+
+
+class BookingConflict(Exception):
+    def __init__(self, venue_id, conflicts):
+        self.conflicts = conflicts
+        messages = [_describe(venue_id, conflict) for conflict in conflicts[:3]]
+        if len(conflicts) > 3:
+            messages.append(f"{len(conflicts) - 3} more shows overlap.")
+        super().__init__(
+            " ".join(messages) or "The venue or the artist is already booked at that time."
+        )
+
+
+def _describe(venue_id, conflict):
+    booked = "venue" if str(conflict.venue_id) == str(venue_id) else "artist"
+    return "The {} is already booked from {:%Y-%m-%d %H:%M} to {:%Y-%m-%d %H:%M}.".format(
+        booked, conflict.start_time, conflict.end_time
+    )
+
+
+def _overlapping(column, value, start_time, end_time):
+    return select(
+        Show.id, Show.venue_id, Show.artist_id, Show.start_time, Show.end_time
+    ).where(
+        column == value,
+        Show.start_time > start_time - SHOW_MAX_DURATION,
+        Show.start_time < end_time,
+        Show.end_time > start_time,
+    )
+
+
+def _bookings(venue_id, artist_id, start_time, end_time, session):
+    # shows of the venue or of the artist overlapping [start_time, end_time),
+    # in one query
+    query = union_all(
+        _overlapping(Show.venue_id, venue_id, start_time, end_time),
+        _overlapping(Show.artist_id, artist_id, start_time, end_time),
+    )
+    rows = {}
+    for row in (session or db.session).execute(query):
+        rows.setdefault(row.id, row)
+    return sorted(rows.values(), key=lambda row: row.start_time)
+
+
+def find_conflicts(venue_id, artist_id, start_time, end_time, exclude_id=None, session=None):
+    # shows of the venue or of the artist overlapping [start_time, end_time)
+    return [
+        row
+        for row in _bookings(venue_id, artist_id, start_time, end_time, session)
+        if row.id != exclude_id
+    ]
+
+
+def find_batch_conflicts(venue_id, artist_id, slots, session=None):
+    # (slot, show) pairs of the shows of the venue or of the artist
+    # overlapping one of slots, sorted (start_time, end_time) pairs that
+    # don't overlap each other
+    ends = [end_time for _, end_time in slots]
+    conflicts = []
+    for row in _bookings(venue_id, artist_id, slots[0][0], slots[-1][1], session):
+        index = bisect_right(ends, row.start_time)
+        while index < len(slots) and slots[index][0] < row.end_time:
+            conflicts.append((slots[index], row))
+            index += 1
+    return conflicts
+
+
+def _shift_years(moment, years):
+    return moment.replace(year=moment.year + years)
+
+
+def _calendar_shift(start_time, end):
+    # years to add to [start_time, end) so that it ends shortly before 9999,
+    # on a calendar with the same weekdays and leap years
+    years = range(start_time.year - 1, end.year + 2)
+
+    def same_calendar(shift):
+        return all(
+            isleap(year) == isleap(year + shift)
+            and date(year, 1, 1).weekday() == date(year + shift, 1, 1).weekday()
+            for year in years
+        )
+
+    # a multiple of CALENDAR_CYCLE is found at the latest
+    latest = MAXYEAR - 1 - end.year
+    for shift in range(latest, latest - CALENDAR_CYCLE, -1):
+        if same_calendar(shift):
+            return shift
+
+
+def occurrences(start_time, rule):
+    # start times of a show repeated by an RFC 5545 recurrence rule within
+    # MAX_SPAN of start_time, e.g. "FREQ=WEEKLY;COUNT=52"; raises ValueError
+    # for an invalid rule, one repeating more often than daily, one without
+    # occurrences, e.g. ending before start_time, or one with more than
+    # MAX_OCCURRENCES occurrences
+    from dateutil.rrule import rrule, rrulestr, DAILY, WEEKLY, MONTHLY, YEARLY
+
+    recurrence = rrulestr(rule, dtstart=start_time)
+    if not isinstance(recurrence, rrule) or "BYEASTER" in rule.upper():
+        raise ValueError("the recurrence rule is not a single RFC 5545 RRULE")
+    if recurrence._freq not in (DAILY, WEEKLY, MONTHLY, YEARLY):
+        raise ValueError("a show repeats daily, weekly, monthly or yearly")
+
+    # dateutil looks for the next occurrence up to year 9999 whatever the
+    # UNTIL of the rule, seconds of work for a rule that never matches, e.g.
+    # FREQ=DAILY;BYMONTH=2;BYMONTHDAY=30. The rule is expanded instead over
+    # the same dates of a calendar shortly before 9999, and the occurrences
+    # shifted back.
+    end = start_time + MAX_SPAN
+    until = recurrence._until
+    if until is not None:
+        end = min(end, until + timedelta(microseconds=1))
+    years = _calendar_shift(start_time, end)
+    shifted_end = _shift_years(end, years)
+    recurrence = recurrence.replace(dtstart=_shift_years(start_time, years), until=None)
+    times = [
+        _shift_years(occurrence, -years)
+        for occurrence in islice(
+            takewhile(lambda occurrence: occurrence < shifted_end, recurrence),
+            MAX_OCCURRENCES + 1,
+        )
+    ]
+    if not times:
+        raise ValueError("the recurrence rule gives no occurrence")
+    if len(times) > MAX_OCCURRENCES:
+        raise ValueError(f"a show repeats at most {MAX_OCCURRENCES} times")
+    return times
+
+
+def _unique(rows):
+    # a show overlapping several slots is reported once
+    return list({row.id: row for row in rows}.values())
+
+
+def _check_duration(start_time, end_time):
+    if not start_time < end_time <= start_time + SHOW_MAX_DURATION:
+        raise ValueError(f"a show lasts at most {SHOW_MAX_DURATION}")
+
+
+def _exclusion_violation(error):
+    # 23P01: exclusion_violation
+    return getattr(error.orig, "pgcode", None) == "23P01"
+
+
+def _lock_bookings(pairs, session):
+    # lock the venues and artists of (venue_id, artist_id) pairs until the
+    # end of the transaction, in a fixed order so that two bookings can't
+    # deadlock
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    keys = sorted(
+        {(VENUE_LOCK, int(venue_id)) for venue_id, _ in pairs}
+        | {(ARTIST_LOCK, int(artist_id)) for _, artist_id in pairs}
+    )
+    session.execute(
+        text("SELECT pg_advisory_xact_lock(:kind, :id)"),
+        [{"kind": kind, "id": record_id} for kind, record_id in keys],
+    )
+
+
+def book_show(show, session=None):
+    # add show to the session and flush it, or raise BookingConflict; the
+    # caller commits, or rolls back on error
+    session = session or db.session
+    _check_duration(show.start_time, show.end_time)
+    _lock_bookings([(show.venue_id, show.artist_id)], session)
+
+    session.add(show)
+    try:
+        session.flush()
+    except IntegrityError as e:
+        if not _exclusion_violation(e):
+            raise
+        session.rollback()
+        conflicts = find_conflicts(
+            show.venue_id, show.artist_id, show.start_time, show.end_time, session=session
+        )
+        raise BookingConflict(show.venue_id, conflicts) from e
+
+    conflicts = find_conflicts(
+        show.venue_id,
+        show.artist_id,
+        show.start_time,
+        show.end_time,
+        exclude_id=show.id,
+        session=session,
+    )
+    if conflicts:
+        raise BookingConflict(show.venue_id, conflicts)
+
+
+def _grouped_slots(rows):
+    # sorted (start_time, end_time) slots of rows by (venue_id, artist_id);
+    # raises ValueError for a bad duration or two slots of a group
+    # overlapping each other
+    groups = {}
+    for row in rows:
+        _check_duration(row["start_time"], row["end_time"])
+        groups.setdefault((row["venue_id"], row["artist_id"]), []).append(
+            (row["start_time"], row["end_time"])
+        )
+    for slots in groups.values():
+        slots.sort()
+        for previous, slot in zip(slots, slots[1:]):
+            if slot[0] < previous[1]:
+                raise ValueError("the new shows overlap each other")
+    return groups
+
+
+def _other_bookings(venue_id, artist_id, slots, session):
+    # shows overlapping slots once they are inserted: every slot overlaps
+    # its own new row once, in the same venue and times
+    conflicts = []
+    own = set()
+    for slot, row in find_batch_conflicts(venue_id, artist_id, slots, session):
+        is_own = (
+            slot not in own
+            and (row.start_time, row.end_time) == slot
+            and str(row.venue_id) == str(venue_id)
+            and str(row.artist_id) == str(artist_id)
+        )
+        if is_own:
+            own.add(slot)
+        else:
+            conflicts.append(row)
+    return conflicts
+
+
+def book_shows(rows, session=None):
+    # insert show rows (dicts) with a single executemany, or raise
+    # BookingConflict; the rows are checked with one query per venue and
+    # artist, e.g. the occurrences of a recurring show or a chunk of
+    # `flask import shows`. The caller commits, or rolls back on error
+    session = session or db.session
+    if not rows:
+        raise ValueError("there is no show to book")
+    groups = _grouped_slots(rows)
+    _lock_bookings(groups, session)
+
+    try:
+        session.execute(Show.__table__.insert(), rows)
+    except IntegrityError as e:
+        if not _exclusion_violation(e):
+            raise
+        session.rollback()
+        for (venue_id, artist_id), slots in groups.items():
+            conflicts = find_batch_conflicts(venue_id, artist_id, slots, session)
+            if conflicts:
+                raise BookingConflict(venue_id, _unique(row for _, row in conflicts)) from e
+        raise BookingConflict(rows[0]["venue_id"], []) from e
+
+    for (venue_id, artist_id), slots in groups.items():
+        conflicts = _other_bookings(venue_id, artist_id, slots, session)
+        if conflicts:
+            raise BookingConflict(venue_id, _unique(conflicts))
@@ -0,0 +1,213 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from flask import Response, g, has_request_context, make_response, request, session
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, CacheVersion
+
+
+# Page cache for the read views. A cached page is keyed by its URL and by the
+# current value of the version counters it depends on ("venues", "venue:3",
+# ...). Write handlers bump the counters of what they change, so a stale
+# page is never looked up again and simply ages out of the cache.
+#
+# The counters must be shared by every process serving pages and by the
+# `flask` commands writing outside requests. The redis backend keeps them in
+# Redis; otherwise, with the lru backend, whose entries are per process, or
+# without a page cache, they are in the CacheVersion table, which costs one
+# indexed statement per request. They also serve as the collection versions
+# of the conditional GETs, see conditional.py, and are looked up once per
+# request.
+#
+# A page read from a lagging replica must not be stored under counters
+# already bumped on the primary. The CacheVersion counters are read from
+# the replica like the page, and replicated after the writes they follow,
+# so a page is never older than its key; counters kept in Redis are not,
+# and pages read from a replica are then left out of the cache.
+#
+# Views whose output changes with time (a show moving from upcoming to past)
+# set g.cache_valid_until to bound the lifetime of the entry.
+
+
+_dialect_inserts = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+class DatabaseVersions:
+    # version counters in the CacheVersion table; read like the page, from
+    # the replica when the request reads from it, bumped on the primary
+    replicated = True
+
+    def versions(self, keys):
+        rows = dict(
+            db.session.execute(
+                select(CacheVersion.key, CacheVersion.version).where(
+                    CacheVersion.key.in_(keys)
+                )
+            ).all()
+        )
+        return [rows.get(key, 0) for key in keys]
+
+    def bump(self, keys):
+        # one upsert in its own transaction, after the caller's commit; the
+        # keys are sorted so that concurrent bumps lock rows in one order
+        insert = _dialect_inserts[db.engine.dialect.name]
+        statement = insert(CacheVersion).values(
+            [{"key": key, "version": 1} for key in sorted(set(keys))]
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=["key"],
+            set_={"version": CacheVersion.version + 1},
+        )
+        with db.engine.begin() as connection:
+            connection.execute(statement)
+
+
+class LRUCache:
+    # in-process backend, entries expire after ttl seconds; the version
+    # counters are in the database, see DatabaseVersions
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class RedisCache:
+    # backend shared by every worker, for any Redis-compatible server
+    replicated = False
+
+    def __init__(self, url, prefix="fyyur:"):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        return self._client.get(self.prefix + key)
+
+    def set(self, key, value, ttl):
+        self._client.set(self.prefix + key, value, ex=max(int(ttl), 1))
+
+    def versions(self, keys):
+        values = self._client.mget([self.prefix + "v:" + key for key in keys])
+        return [int(value or 0) for value in values]
+
+    def bump(self, keys):
+        pipeline = self._client.pipeline(transaction=False)
+        for key in keys:
+            pipeline.incr(self.prefix + "v:" + key)
+        pipeline.execute()
+
+
+class PageCache:
+    def __init__(self, app=None):
+        self.backend = None
+        self.counters = None
+        self.hits = 0
+        self.misses = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("CACHE_BACKEND", "lru")
+        app.config.setdefault("CACHE_DEFAULT_TTL", 300)
+        app.config.setdefault("CACHE_MAX_ENTRIES", 1024)
+        app.config.setdefault("CACHE_REDIS_URL", "redis://localhost:6379/0")
+        self.ttl = app.config["CACHE_DEFAULT_TTL"]
+
+        backend = app.config["CACHE_BACKEND"]
+        if backend == "redis":
+            self.backend = self.counters = RedisCache(app.config["CACHE_REDIS_URL"])
+            return
+        if backend == "lru":
+            self.backend = LRUCache(app.config["CACHE_MAX_ENTRIES"])
+        else:
+            self.backend = None
+        self.counters = DatabaseVersions()
+
+    def versions(self, keys):
+        # memoized for the request: a view looks its keys up for both its
+        # conditional GET and its page cache entry
+        known = g.setdefault("cache_versions", {}) if has_request_context() else {}
+        missing = [key for key in keys if key not in known]
+        if missing:
+            known.update(zip(missing, self.counters.versions(missing)))
+        return [known[key] for key in keys]
+
+    def bump(self, *keys):
+        # invalidate every page depending on one of keys
+        if keys:
+            self.counters.bump(keys)
+            if has_request_context():
+                g.pop("cache_versions", None)
+
+    def cached(self, *dependencies):
+        # cache the response of a GET view; dependencies are version keys,
+        # formatted with the view arguments, e.g. "venue:{venue_id}"
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(**kwargs):
+                # flashed messages are rendered into the page
+                if self.backend is None or "_flashes" in session:
+                    return view(**kwargs)
+
+                keys = [dependency.format(**kwargs) for dependency in dependencies]
+                versions = self.versions(keys)
+                key = "page:{}:{}".format(
+                    request.full_path,
+                    ",".join(f"{k}={v}" for k, v in zip(keys, versions)),
+                )
+
+                entry = self.backend.get(key)
+                if entry is not None:
+                    self.hits += 1
+                    g.page_cache_result = "hit"
+                    content_type, body = entry.split(b"\n", 1)
+                    return Response(body, content_type=content_type.decode("latin-1"))
+
+                self.misses += 1
+                g.page_cache_result = "miss"
+                response = make_response(view(**kwargs))
+                valid_until = g.pop("cache_valid_until", None)
+                if (
+                    response.status_code == 200
+                    and not response.is_streamed
+                    and "_flashes" not in session
+                    and (self.counters.replicated or not g.get("read_from_replica"))
+                ):
+                    ttl = self.ttl
+                    if valid_until is not None:
+                        ttl = min(ttl, (valid_until - datetime.now()).total_seconds())
+                    if ttl > 0:
+                        # entries are "<content type>\n<body>"
+                        entry = response.content_type.encode("latin-1") + b"\n"
+                        self.backend.set(key, entry + response.get_data(), ttl)
+                return response
+
+            return wrapper
+
+        return decorator
+
+
+page_cache = PageCache()
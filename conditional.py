@@ -0,0 +1,129 @@
+import functools
+import hashlib
+from datetime import datetime, timezone
+from flask import make_response, request, session
+from sqlalchemy import func, select
+from cache import page_cache
+from counters import ROLL_LOOKBACK
+from models import db, Venue, Artist, Show
+
+
+# Conditional GET for the read pages. Before running a view we look up a
+# cheap version of what the page renders; a client already holding that
+# version gets a 304 without the page query or the rendering.
+#
+# A version is (last_modified, token): last_modified is a naive UTC datetime
+# for the Last-Modified header, token anything identifying the content. The
+# ETag is derived from the token and the full URL.
+#
+# The listings take their token from the page cache version counter of the
+# collection, which every write to it bumps (deletions included), and from
+# the latest updated_at, an indexed lookup that also gives Last-Modified.
+
+
+def _utc(local_time):
+    # Show.start_time holds local time, updated_at is already UTC
+    return local_time.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _latest(*values):
+    return max((value for value in values if value is not None), default=None)
+
+
+def _collection_version(key, *models):
+    updated_at = _latest(
+        *db.session.execute(
+            select(
+                *(select(func.max(model.updated_at)).scalar_subquery() for model in models)
+            )
+        ).one()
+    )
+    (version,) = page_cache.versions([key])
+    return updated_at, (updated_at, version)
+
+
+def venues_version():
+    return _collection_version("venues", Venue)
+
+
+def artists_version():
+    return _collection_version("artists", Artist)
+
+
+def shows_version():
+    # the listing also renders venue and artist names and images
+    return _collection_version("shows", Show, Venue, Artist)
+
+
+def _detail_version(model, key, record_id):
+    # the page also changes whenever one of its shows starts. Shows that
+    # started before the last ROLL_LOOKBACK have been rolled to the past
+    # counters since, which moved updated_at past their start, so the lookup
+    # only covers the partitions of that period
+    now = datetime.now()
+    last_started = (
+        select(func.max(Show.start_time))
+        .where(key == record_id, Show.start_time > now - ROLL_LOOKBACK, Show.start_time <= now)
+        .scalar_subquery()
+    )
+    row = db.session.execute(
+        select(model.updated_at, last_started).where(model.id == record_id)
+    ).one_or_none()
+    if row is None:
+        return None
+    updated_at, last_started = row
+    if last_started is not None:
+        last_started = _utc(last_started)
+    return _latest(updated_at, last_started), tuple(row)
+
+
+def venue_version(venue_id):
+    return _detail_version(Venue, Show.venue_id, venue_id)
+
+
+def artist_version(artist_id):
+    return _detail_version(Artist, Show.artist_id, artist_id)
+
+
+def _not_modified(last_modified, etag):
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified is not None:
+        return (
+            last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+            <= request.if_modified_since
+        )
+    return False
+
+
+def conditional(version):
+    # answer If-None-Match / If-Modified-Since from version(**view_args)
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(**kwargs):
+            # flashed messages are rendered into the page
+            if "_flashes" in session:
+                return view(**kwargs)
+
+            current = version(**kwargs)
+            if current is None:
+                return view(**kwargs)
+            last_modified, token = current
+            etag = hashlib.sha1(
+                f"{request.full_path}|{token}".encode("utf-8")
+            ).hexdigest()
+
+            if _not_modified(last_modified, etag):
+                response = make_response("", 304)
+            else:
+                response = make_response(view(**kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, func, update
+from models import db, Venue, Artist, Show
+
+
+# The listing and search pages read Venue/Artist.upcoming_shows_count and
+# past_shows_count instead of counting Show rows. These helpers keep them in
+# step with the Show table. They only add statements to the current session,
+# committing is left to the caller.
+
+# how far back roll_past_shows() looks for shows that have started; shows
+# that started earlier, e.g. while the roll did not run for longer than
+# that, are only counted as past by `flask shows rebuild-counters`
+ROLL_LOOKBACK = timedelta(days=1)
+
+
+def _adjust(model, record_id, upcoming=0, past=0):
+    db.session.query(model).filter(model.id == record_id).update(
+        {
+            model.upcoming_shows_count: model.upcoming_shows_count + upcoming,
+            model.past_shows_count: model.past_shows_count + past,
+        },
+        synchronize_session=False,
+    )
+
+
+def record_new_show(show, now=None):
+    # count a show that is about to be inserted
+    now = now or datetime.now()
+    show.is_upcoming = show.start_time > now
+    upcoming, past = (1, 0) if show.is_upcoming else (0, 1)
+    _adjust(Venue, show.venue_id, upcoming, past)
+    _adjust(Artist, show.artist_id, upcoming, past)
+
+
+def record_imported_shows(shows, now=None):
+    # count a batch of show rows (dicts) about to be inserted, with one
+    # executemany per table instead of one UPDATE per show
+    now = now or datetime.now()
+    deltas = {Venue: {}, Artist: {}}
+    for show in shows:
+        show["is_upcoming"] = show["start_time"] > now
+        for model, key in ((Venue, show["venue_id"]), (Artist, show["artist_id"])):
+            upcoming, past = deltas[model].get(key, (0, 0))
+            if show["is_upcoming"]:
+                deltas[model][key] = (upcoming + 1, past)
+            else:
+                deltas[model][key] = (upcoming, past + 1)
+
+    for model, counts in deltas.items():
+        if not counts:
+            continue
+        db.session.execute(
+            update(model.__table__)
+            .where(model.__table__.c.id == bindparam("record_id"))
+            .values(
+                upcoming_shows_count=model.__table__.c.upcoming_shows_count
+                + bindparam("upcoming"),
+                past_shows_count=model.__table__.c.past_shows_count + bindparam("past"),
+            ),
+            [
+                {"record_id": key, "upcoming": upcoming, "past": past}
+                for key, (upcoming, past) in counts.items()
+            ],
+        )
+
+
+def uncount_shows(*criteria):
+    # take the shows matching criteria off the counters of their venues and
+    # artists, returns (venue_id, artist_id, count) for each pair touched
+    groups = (
+        db.session.query(
+            Show.venue_id, Show.artist_id, Show.is_upcoming, func.count(Show.id)
+        )
+        .filter(*criteria)
+        .group_by(Show.venue_id, Show.artist_id, Show.is_upcoming)
+        .all()
+    )
+    for venue_id, artist_id, is_upcoming, count in groups:
+        upcoming, past = (-count, 0) if is_upcoming else (0, -count)
+        _adjust(Venue, venue_id, upcoming, past)
+        _adjust(Artist, artist_id, upcoming, past)
+    return [(venue_id, artist_id, count) for venue_id, artist_id, _, count in groups]
+
+
+def remove_shows(*criteria):
+    # delete the shows matching criteria and take them off the counters of
+    # their venues and artists
+    uncount_shows(*criteria)
+    return (
+        db.session.query(Show).filter(*criteria).delete(synchronize_session=False)
+    )
+
+
+def roll_past_shows(now=None, lookback=ROLL_LOOKBACK):
+    # move the shows whose start time has passed since the last run from the
+    # upcoming to the past counters, returns the number of shows moved. The
+    # lower bound on start_time keeps the scan to the partitions of the last
+    # lookback, see partitions.py
+    now = now or datetime.now()
+    passed = (
+        Show.is_upcoming.is_(True),
+        Show.start_time > now - lookback,
+        Show.start_time <= now,
+    )
+
+    groups = (
+        db.session.query(Show.venue_id, Show.artist_id, func.count(Show.id))
+        .filter(*passed)
+        .group_by(Show.venue_id, Show.artist_id)
+        .all()
+    )
+    for venue_id, artist_id, count in groups:
+        _adjust(Venue, venue_id, -count, count)
+        _adjust(Artist, artist_id, -count, count)
+
+    db.session.query(Show).filter(*passed).update(
+        {Show.is_upcoming: False}, synchronize_session=False
+    )
+    return sum(count for _, _, count in groups)
+
+
+def rebuild_show_counters(now=None):
+    # recompute every counter from the Show table, used to repair drift
+    now = now or datetime.now()
+    db.session.query(Show).update(
+        {Show.is_upcoming: Show.start_time > now}, synchronize_session=False
+    )
+    for model, key in ((Venue, Show.venue_id), (Artist, Show.artist_id)):
+
+        def count_shows(upcoming):
+            return (
+                db.session.query(func.count(Show.id))
+                .filter(key == model.id, Show.is_upcoming == upcoming)
+                .scalar_subquery()
+            )
+
+        db.session.query(model).update(
+            {
+                model.upcoming_shows_count: count_shows(True),
+                model.past_shows_count: count_shows(False),
+            },
+            synchronize_session=False,
+        )
@@ -0,0 +1,145 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import func, select
+
+from models import db, Show, Genre
+from importer import ENTITIES
+
+
+# Catalog export as NDJSON or CSV, served by /export/<kind>.<format> and by
+# `flask export <kind>`. Rows come from a server-side cursor in batches and
+# are written out as they arrive, so memory stays flat whatever the size of
+# the catalog. The files use the layout read by `flask import`, plus the id
+# and updated_at of every row; updated_since selects the rows changed since
+# a previous sync.
+
+EXPORT_MIMETYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_BATCH_SIZE = 1000
+
+export_cli = AppGroup("export", help="Bulk export of venues, artists and shows.")
+
+
+def export_fields(kind):
+    if kind == "shows":
+        return ["id", "venue_id", "artist_id", "start_time", "end_time", "updated_at"]
+    return ["id", *ENTITIES[kind][3], "genres", "updated_at"]
+
+
+def _genre_names(association, key, model):
+    # the genres of each row as one "a;b;c" string, no extra query per row
+    if db.session.get_bind().dialect.name == "postgresql":
+        names = func.string_agg(Genre.name, ";")
+    else:
+        names = func.group_concat(Genre.name, ";")
+    return (
+        select(names)
+        .join(association, association.c.genre_id == Genre.id)
+        .where(key == model.id)
+        .scalar_subquery()
+    )
+
+
+def export_query(kind, updated_since=None):
+    if kind == "shows":
+        model = Show
+        columns = [
+            Show.id,
+            Show.venue_id,
+            Show.artist_id,
+            Show.start_time,
+            Show.end_time,
+            Show.updated_at,
+        ]
+    else:
+        model, association, key, fields = ENTITIES[kind]
+        columns = [
+            model.id,
+            *(getattr(model, field) for field in fields),
+            _genre_names(association, association.c[key], model).label("genres"),
+            model.updated_at,
+        ]
+
+    query = select(*columns).order_by(model.id)
+    if updated_since is not None:
+        if updated_since.tzinfo is not None:
+            # updated_at is stored as naive UTC
+            updated_since = updated_since.astimezone(timezone.utc).replace(tzinfo=None)
+        query = query.where(model.updated_at >= updated_since)
+    return query
+
+
+def export_rows(kind, updated_since=None, batch_size=EXPORT_BATCH_SIZE):
+    # yields one dict per row, fetching batch_size rows at a time
+    result = db.session.execute(
+        export_query(kind, updated_since).execution_options(stream_results=True)
+    )
+    for row in result.yield_per(batch_size).mappings():
+        yield dict(row)
+
+
+def _value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        if "genres" in row:
+            row["genres"] = row["genres"].split(";") if row["genres"] else []
+        yield json.dumps({key: _value(value) for key, value in row.items()}) + "\n"
+
+
+def csv_lines(rows, fields):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for row in rows:
+        writer.writerow([_value(row[field]) for field in fields])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # the header alone when there are no rows
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_lines(kind, format, updated_since=None, batch_size=EXPORT_BATCH_SIZE):
+    rows = export_rows(kind, updated_since, batch_size)
+    if format == "csv":
+        return csv_lines(rows, export_fields(kind))
+    return ndjson_lines(rows)
+
+
+def _export_command(kind):
+    @click.option(
+        "--format",
+        type=click.Choice(list(EXPORT_MIMETYPES)),
+        default="ndjson",
+        show_default=True,
+    )
+    @click.option(
+        "--updated-since",
+        type=click.DateTime(["%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S"]),
+        help="Only rows changed since then (UTC).",
+    )
+    @click.option("-o", "--output", default="-", help="Output file, stdout by default.")
+    @click.option("--batch-size", default=EXPORT_BATCH_SIZE, show_default=True)
+    def command(format, updated_since, output, batch_size):
+        with click.open_file(output, "w", encoding="utf-8") as target:
+            for line in export_lines(kind, format, updated_since, batch_size):
+                target.write(line)
+        if output != "-":
+            click.echo(f"Exported {kind} to {output}.")
+
+    command.__doc__ = f"Export {kind} as NDJSON or CSV."
+    return export_cli.command(kind)(command)
+
+
+for kind in ("venues", "artists", "shows"):
+    _export_command(kind)
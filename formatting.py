@@ -0,0 +1,33 @@
+from functools import lru_cache
+from datetime import datetime
+
+
+# Date formatting for the templates. Shows already carry datetime objects, so
+# unlike babel.dates.format_datetime() we neither reparse the value nor look
+# up the pattern and locale again on every call: both are compiled once per
+# (format, locale) and applied directly. babel is imported on the first
+# call, so that only the processes rendering dates load it.
+
+DATETIME_FORMATS = {
+    "full": "EEEE MMMM, d, y 'at' h:mma",
+    "medium": "EE MM, dd, y h:mma",
+}
+
+
+@lru_cache(maxsize=64)
+def compile_format(format="medium", locale="en"):
+    from babel import Locale
+    from babel.dates import parse_pattern
+
+    pattern = parse_pattern(DATETIME_FORMATS.get(format, format))
+    return pattern, Locale.parse(locale)
+
+
+def format_datetime(value, format="medium", locale="en"):
+    if not isinstance(value, datetime):
+        # legacy callers pass strings
+        import dateutil.parser
+
+        value = dateutil.parser.parse(value)
+    pattern, babel_locale = compile_format(format, locale)
+    return pattern.apply(value, babel_locale)
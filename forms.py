@@ -9,13 +9,16 @@ from wtforms import (
     SelectField,
     SelectMultipleField,
     DateTimeField,
+    DateField,
     BooleanField,
+    IntegerField,
 )
 from wtforms.validators import (
     DataRequired,
     AnyOf,
     URL,
     Optional,
+    NumberRange,
     ValidationError,
 )
 import re
@@ -32,6 +35,28 @@ class ShowForm(FlaskForm):
     start_time = DateTimeField(
         "start_time", validators=[DataRequired()], default=datetime.today()
     )
+    # minutes, at most models.SHOW_MAX_DURATION
+    duration = IntegerField(
+        "duration", validators=[Optional(), NumberRange(min=1, max=24 * 60)], default=120
+    )
+    # repetitions of the show, turned into a recurrence rule by the view:
+    # every week or month until a date or for a number of times, or a custom
+    # RFC 5545 RRULE such as "FREQ=WEEKLY;BYDAY=FR;COUNT=52"
+    recurrence = SelectField(
+        "recurrence",
+        choices=[
+            ("", "Does not repeat"),
+            ("WEEKLY", "Every week"),
+            ("MONTHLY", "Every month"),
+            ("CUSTOM", "Custom rule"),
+        ],
+        default="",
+    )
+    repeat_count = IntegerField(
+        "repeat_count", validators=[Optional(), NumberRange(min=1, max=366)]
+    )
+    repeat_until = DateField("repeat_until", validators=[Optional()])
+    rrule = StringField("rrule")
 
 
 class VenueForm(FlaskForm):
@@ -0,0 +1,95 @@
+import threading
+from sqlalchemy import event, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import make_transient_to_detached
+from models import db, Genre
+
+
+# Cache of Genre.name -> Genre.id per database. Genres are a small, append
+# only vocabulary, so once a name is known we can attach its Genre to the
+# session without querying for it. The cache of a database is filled on
+# first use, updated whenever resolve_genres() inserts missing names, and
+# dropped when a statement on that database fails with an IntegrityError,
+# e.g. a cached id whose genre was deleted or whose database was recreated.
+
+# engine url -> {name: id}
+_genre_ids = {}
+_lock = threading.Lock()
+
+_dialect_inserts = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def load_genre_cache():
+    rows = db.session.execute(select(Genre.id, Genre.name)).all()
+    ids = {name: genre_id for genre_id, name in rows}
+    with _lock:
+        _genre_ids[str(db.engine.url)] = ids
+    return ids
+
+
+def invalidate_genre_cache(url=None):
+    # drops the cache of the database at url, or of all of them
+    with _lock:
+        if url is None:
+            _genre_ids.clear()
+        else:
+            _genre_ids.pop(str(url), None)
+
+
+@event.listens_for(Engine, "handle_error")
+def _invalidate_on_integrity_error(exception_context):
+    if isinstance(exception_context.sqlalchemy_exception, IntegrityError):
+        invalidate_genre_cache(exception_context.engine.url)
+
+
+def _cached_ids():
+    ids = _genre_ids.get(str(db.engine.url))
+    if ids is None:
+        ids = load_genre_cache()
+    return ids
+
+
+def _insert_genres(names, ids):
+    # create the missing genres with a single INSERT ... ON CONFLICT DO
+    # NOTHING, in its own transaction so that concurrent requests adding the
+    # same name don't fail and a rollback of the caller keeps them cached.
+    # The ids are read back in the same round of statements, so names that
+    # other processes created are picked up as well.
+    insert = _dialect_inserts[db.engine.dialect.name]
+    statement = (
+        insert(Genre)
+        .values([{"name": name} for name in names])
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
+    with db.engine.begin() as connection:
+        connection.execute(statement)
+        rows = connection.execute(
+            select(Genre.id, Genre.name).where(Genre.name.in_(names))
+        ).all()
+    with _lock:
+        ids.update((name, genre_id) for genre_id, name in rows)
+
+
+def _attach(genre_id, name):
+    genre = Genre(id=genre_id, name=name)
+    make_transient_to_detached(genre)
+    return db.session.merge(genre, load=False)
+
+
+def genre_ids(names):
+    # returns {name: id} for names, creating the missing genres
+    ids = _cached_ids()
+
+    names = list(dict.fromkeys(names))
+    missing = [name for name in names if name not in ids]
+    if missing:
+        _insert_genres(missing, ids)
+
+    return {name: ids[name] for name in names}
+
+
+def resolve_genres(names):
+    # returns the Genre instances for names, creating the missing ones
+    return [_attach(genre_id, name) for name, genre_id in genre_ids(names).items()]
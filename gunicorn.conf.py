@@ -0,0 +1,23 @@
+import os
+import shutil
+
+
+# gunicorn settings, e.g. `gunicorn -c gunicorn.conf.py 'app:create_app()'`.
+# When PROMETHEUS_MULTIPROC_DIR is set the workers share their metrics
+# through that directory (see metrics.py), emptied when the server starts.
+
+workers = int(os.environ.get("WEB_CONCURRENCY", 4))
+
+
+def on_starting(server):
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,218 @@
+import threading
+import time
+from datetime import datetime
+
+import click
+from flask import g
+from flask.cli import AppGroup
+from sqlalchemy import select, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from cache import page_cache
+from models import db, city_upcoming_shows
+
+
+# The trending cities of the home page: the cities with the most upcoming
+# shows, each with its next shows. Counting and ranking them over the
+# Show/Venue/Artist join on every visit would cost a scan of every upcoming
+# show, so the result is kept in city_upcoming_shows, which holds the
+# ROLLUP_SHOWS next shows of every city along with its upcoming show count
+# and rank, and index() reads it with a single indexed statement.
+#
+# On PostgreSQL city_upcoming_shows is a materialized view, created by
+# migration 1b7e5f3c9d24 and refreshed with REFRESH MATERIALIZED VIEW
+# CONCURRENTLY, which doesn't block the home page while it runs. On SQLite,
+# or on a database created with db.create_all(), it is a table emptied and
+# filled again in one transaction.
+#
+# It is refreshed
+#
+#   - when HOME_REFRESH_AFTER_WRITES is set, by a background thread of the
+#     process, HOME_REFRESH_INTERVAL seconds after a request wrote to the
+#     database, so that the refresh stays out of the request and the writes
+#     of the interval share it. A refresh started while another process runs
+#     one is put off to the next interval;
+#   - by `flask home refresh`, meant to be run periodically, e.g. every minute
+#     from cron, which covers the writes made outside requests (imports,
+#     `flask shows roll`) and those of a process stopped before its refresh.
+#
+# Shows are taken while they are counted as upcoming (Show.is_upcoming) and
+# haven't started, which bounds the scan to the current and later monthly
+# partitions of "Show", see partitions.py. Those that have started since the
+# last refresh are left out when reading.
+
+ROLLUP_SHOWS = 10
+
+# the current time in the query, naive local time like Show.start_time
+ROLLUP_NOW = {"postgresql": "localtimestamp", "sqlite": "datetime('now', 'localtime')"}
+
+# must stay identical to the query of the materialized view in migration
+# 8b1f4d2e6c39, with {now} as ROLLUP_NOW["postgresql"]
+ROLLUP_QUERY = f"""
+SELECT state, city,
+       dense_rank() OVER (ORDER BY upcoming_shows_count DESC, state, city) AS city_rank,
+       upcoming_shows_count, show_rank, show_id, start_time, venue_id, venue_name,
+       artist_id, artist_name, artist_image_link
+FROM (
+    SELECT v.state, v.city,
+           count(*) OVER (PARTITION BY v.state, v.city) AS upcoming_shows_count,
+           row_number() OVER (PARTITION BY v.state, v.city ORDER BY s.start_time, s.id) AS show_rank,
+           s.id AS show_id, s.start_time, v.id AS venue_id, v.name AS venue_name,
+           a.id AS artist_id, a.name AS artist_name, a.image_link AS artist_image_link
+    FROM "Show" s
+    JOIN "Venue" v ON v.id = s.venue_id
+    JOIN "Artist" a ON a.id = s.artist_id
+    WHERE s.is_upcoming AND s.start_time > {{now}}
+) upcoming
+WHERE show_rank <= {ROLLUP_SHOWS}
+"""
+
+# key of the PostgreSQL advisory lock taken by the refreshes
+ROLLUP_LOCK = 7240301
+
+home_cli = AppGroup("home", help="Maintenance of the home page.")
+
+
+def _is_materialized():
+    if db.session.get_bind().dialect.name != "postgresql":
+        return False
+    return db.session.execute(
+        text(
+            "SELECT EXISTS (SELECT 1 FROM pg_matviews "
+            "WHERE matviewname = 'city_upcoming_shows')"
+        )
+    ).scalar()
+
+
+def refresh_home_rollup(wait=True):
+    # recompute city_upcoming_shows; committing, then bumping the "home"
+    # page cache key, is left to the caller. Returns False, without
+    # refreshing, if wait is false and another refresh is running
+    if db.session.get_bind().dialect.name == "postgresql":
+        if wait:
+            db.session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ROLLUP_LOCK})
+        elif not db.session.execute(
+            text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": ROLLUP_LOCK}
+        ).scalar():
+            return False
+    if _is_materialized():
+        db.session.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY city_upcoming_shows"))
+        return True
+    columns = ", ".join(column.name for column in city_upcoming_shows.columns)
+    query = ROLLUP_QUERY.format(now=ROLLUP_NOW[db.session.get_bind().dialect.name])
+    db.session.execute(city_upcoming_shows.delete())
+    db.session.execute(text(f"INSERT INTO city_upcoming_shows ({columns}) {query}"))
+    return True
+
+
+def home_cities(cities, shows_per_city, now=None):
+    # the cities ranked 1 to cities, each with its next shows_per_city shows
+    # that haven't started yet
+    now = now or datetime.now()
+    rows = db.session.execute(
+        select(city_upcoming_shows)
+        .where(
+            city_upcoming_shows.c.city_rank <= cities,
+            city_upcoming_shows.c.start_time > now,
+        )
+        .order_by(city_upcoming_shows.c.city_rank, city_upcoming_shows.c.show_rank)
+    )
+    areas = []
+    for row in rows:
+        if not areas or areas[-1]["city_rank"] != row.city_rank:
+            areas.append(
+                {
+                    "city_rank": row.city_rank,
+                    "city": row.city,
+                    "state": row.state,
+                    "upcoming_shows_count": row.upcoming_shows_count,
+                    "shows": [],
+                }
+            )
+        if len(areas[-1]["shows"]) < shows_per_city:
+            areas[-1]["shows"].append(
+                {
+                    "venue_id": row.venue_id,
+                    "venue_name": row.venue_name,
+                    "artist_id": row.artist_id,
+                    "artist_name": row.artist_name,
+                    "artist_image_link": row.artist_image_link,
+                    "start_time": row.start_time,
+                }
+            )
+    starts = [area["shows"][0]["start_time"] for area in areas]
+    if starts:
+        # the page changes when the first listed show starts, see cache.py
+        g.cache_valid_until = min(starts)
+    return areas
+
+
+@home_cli.command("refresh")
+def refresh_home_command():
+    """Recompute the upcoming shows by city of the home page.
+
+    Meant to be run periodically, e.g. every minute from cron."""
+    refresh_home_rollup()
+    db.session.commit()
+    page_cache.bump("home")
+    click.echo("Home page rollup refreshed.")
+
+
+class RollupRefresher:
+    # refreshes city_upcoming_shows in a daemon thread of the process, started
+    # on the first write, HOME_REFRESH_INTERVAL seconds after mark_stale()
+    def __init__(self, app):
+        self.app = app
+        self._stale = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def mark_stale(self):
+        self._stale.set()
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="home-rollup-refresh", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._stale.wait()
+            time.sleep(self.app.config["HOME_REFRESH_INTERVAL"])
+            self._stale.clear()
+            with self.app.app_context():
+                self.refresh()
+
+    def refresh(self):
+        try:
+            if not refresh_home_rollup(wait=False):
+                # the running refresh may have started before our writes
+                db.session.rollback()
+                self._stale.set()
+                return
+            db.session.commit()
+            page_cache.bump("home")
+        except SQLAlchemyError:
+            db.session.rollback()
+            self.app.logger.exception("home page rollup refresh failed")
+
+
+def init_home(app):
+    # must run after init_routing(), whose after_request hook clears
+    # g.database_written and therefore has to run after ours
+    app.config.setdefault("HOME_CITIES", 6)
+    app.config.setdefault("HOME_SHOWS_PER_CITY", 3)
+    app.config.setdefault("HOME_REFRESH_AFTER_WRITES", True)
+    app.config.setdefault("HOME_REFRESH_INTERVAL", 10)
+    refresher = app.extensions["home_rollup"] = RollupRefresher(app)
+
+    @app.after_request
+    def refresh_after_write(response):
+        if (
+            app.config["HOME_REFRESH_AFTER_WRITES"]
+            and g.get("database_written")
+            and response.status_code < 400
+        ):
+            refresher.mark_stale()
+        return response
@@ -0,0 +1,243 @@
+import csv
+import json
+import os
+import time
+from datetime import datetime
+from itertools import islice
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import func, text
+
+from models import (
+    db,
+    Venue,
+    Artist,
+    ImportCheckpoint,
+    venue_genre,
+    artist_genre,
+    SHOW_DEFAULT_DURATION,
+)
+from bookings import book_shows
+from counters import record_imported_shows
+from genres import genre_ids
+from cache import page_cache
+
+
+# `flask import venues|artists|shows FILE` streams a CSV or NDJSON file in
+# chunks. Each chunk resolves its genres at once, is inserted with one
+# executemany per table and is committed together with its checkpoint, so a
+# failed import is resumed by running the same command again.
+#
+# CSV files have one column per field and genres separated by ";", NDJSON
+# records may give genres as a list. Shows reference existing ids, their
+# end_time defaults to start_time + SHOW_DEFAULT_DURATION; a chunk with a
+# show lasting more than SHOW_MAX_DURATION or double booking a venue or an
+# artist is rejected, see bookings.py.
+
+import_cli = AppGroup("import", help="Bulk import of venues, artists and shows.")
+
+
+def _text(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in ("1", "true", "yes", "y")
+
+
+def _genres(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(";")
+    return list(dict.fromkeys(name.strip() for name in value if name.strip()))
+
+
+def _datetime(value):
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+ENTITIES = {
+    "venues": (
+        Venue,
+        venue_genre,
+        "venue_id",
+        {
+            "name": _text,
+            "city": _text,
+            "state": _text,
+            "address": _text,
+            "phone": _text,
+            "image_link": _text,
+            "facebook_link": _text,
+            "website_link": _text,
+            "seeking_talent": _bool,
+            "seeking_description": _text,
+        },
+    ),
+    "artists": (
+        Artist,
+        artist_genre,
+        "artist_id",
+        {
+            "name": _text,
+            "city": _text,
+            "state": _text,
+            "phone": _text,
+            "image_link": _text,
+            "facebook_link": _text,
+            "website_link": _text,
+            "seeking_venue": _bool,
+            "seeking_description": _text,
+        },
+    ),
+}
+
+
+def read_records(path, format):
+    with open(path, newline="", encoding="utf-8") as source:
+        if format == "csv":
+            yield from csv.DictReader(source)
+        else:
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _allocate_ids(model, count):
+    # the genre links need the ids of the rows before they are inserted
+    if db.session.get_bind().dialect.name == "postgresql":
+        return db.session.execute(
+            text(
+                "SELECT nextval(pg_get_serial_sequence(:table, 'id')) "
+                "FROM generate_series(1, :count)"
+            ),
+            {"table": f'"{model.__tablename__}"', "count": count},
+        ).scalars().all()
+    start = db.session.query(func.coalesce(func.max(model.id), 0)).scalar()
+    return list(range(start + 1, start + 1 + count))
+
+
+def _import_entities(kind, records):
+    model, association, key, converters = ENTITIES[kind]
+    rows = []
+    genres = []
+    for record in records:
+        rows.append({field: convert(record.get(field)) for field, convert in converters.items()})
+        genres.append(_genres(record.get("genres")))
+
+    # genre_ids() inserts missing genres in its own transaction, so it must
+    # run before this chunk writes anything through the session
+    ids = genre_ids([name for names in genres for name in names])
+    for row, record_id in zip(rows, _allocate_ids(model, len(rows))):
+        row["id"] = record_id
+
+    db.session.execute(model.__table__.insert(), rows)
+    links = [
+        {"genre_id": ids[name], key: row["id"]}
+        for row, names in zip(rows, genres)
+        for name in names
+    ]
+    if links:
+        db.session.execute(association.insert(), links)
+    return [kind]
+
+
+def _import_shows(records):
+    rows = []
+    for record in records:
+        start_time = _datetime(record["start_time"])
+        if record.get("end_time"):
+            end_time = _datetime(record["end_time"])
+        else:
+            end_time = start_time + SHOW_DEFAULT_DURATION
+        rows.append(
+            {
+                "venue_id": int(record["venue_id"]),
+                "artist_id": int(record["artist_id"]),
+                "start_time": start_time,
+                "end_time": end_time,
+            }
+        )
+    record_imported_shows(rows)
+    # durations and double bookings are checked like those of the form
+    book_shows(rows)
+    return (
+        ["shows", "venues", "artists"]
+        + [f"venue:{venue_id}" for venue_id in {row["venue_id"] for row in rows}]
+        + [f"artist:{artist_id}" for artist_id in {row["artist_id"] for row in rows}]
+    )
+
+
+def run_import(kind, path, format, chunk_size):
+    source = f"{kind}:{os.path.abspath(path)}"
+    checkpoint = db.session.get(ImportCheckpoint, source)
+    done = checkpoint.rows if checkpoint is not None else 0
+    db.session.commit()
+    if done:
+        click.echo(f"Resuming {path} after row {done}.")
+
+    records = islice(read_records(path, format), done, None)
+    imported = 0
+    started = time.perf_counter()
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+        chunk_started = time.perf_counter()
+        try:
+            if kind == "shows":
+                stale_pages = _import_shows(chunk)
+            else:
+                stale_pages = _import_entities(kind, chunk)
+            # the checkpoint is only written here, pending session writes
+            # would lock SQLite against genre_ids()
+            db.session.merge(ImportCheckpoint(source=source, rows=done + len(chunk)))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            raise click.ClickException(
+                f"rows {done + 1}-{done + len(chunk)} of {path} could not be "
+                f"imported ({e}). Rows up to {done} are stored, run the same "
+                "command again to resume."
+            )
+        page_cache.bump(*stale_pages)
+
+        done += len(chunk)
+        imported += len(chunk)
+        elapsed = time.perf_counter() - chunk_started
+        click.echo(f"{done} rows ({len(chunk) / elapsed:.0f} rows/s)")
+
+    db.session.query(ImportCheckpoint).filter_by(source=source).delete()
+    db.session.commit()
+    elapsed = time.perf_counter() - started
+    click.echo(
+        f"Imported {imported} {kind} in {elapsed:.1f}s "
+        f"({imported / elapsed if elapsed else 0:.0f} rows/s)."
+    )
+
+
+def _import_command(kind):
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option(
+        "--format",
+        type=click.Choice(["csv", "ndjson"]),
+        help="File format, guessed from the extension by default.",
+    )
+    @click.option("--chunk-size", default=1000, show_default=True)
+    def command(path, format, chunk_size):
+        format = format or ("csv" if path.lower().endswith(".csv") else "ndjson")
+        run_import(kind, path, format, chunk_size)
+
+    command.__doc__ = f"Import {kind} from a CSV or NDJSON file."
+    return import_cli.command(kind)(command)
+
+
+for kind in ("venues", "artists", "shows"):
+    _import_command(kind)
@@ -0,0 +1,130 @@
+import re
+import time
+from collections import Counter
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Per-request SQL instrumentation. Every statement executed while handling a
+# request is counted and timed; the totals are sent in a Server-Timing
+# header, a statement shape (the SQL with its IN lists collapsed) repeated
+# SQL_N_PLUS_ONE_THRESHOLD times or more is logged as a probable N+1, and
+# SQL_QUERY_BUDGETS caps the statement count of an endpoint. Over budget
+# the request is logged, or fails when SQL_QUERY_BUDGET_RAISE is set, which
+# is the default under app.testing.
+#
+# Statements run while a streamed response is sent come after the headers
+# and are not counted.
+
+# the conditional and page cached endpoints include the lookup of their
+# version counters in the database, see cache.py
+DEFAULT_QUERY_BUDGETS = {
+    "index": 2,
+    "venues.venues": 3,
+    "artists.artists": 3,
+    "shows.shows": 3,
+    "venues.show_venue": 5,
+    "artists.show_artist": 5,
+    # the first search of a process also checks for the FTS5 tables
+    "venues.search_venues": 3,
+    "artists.search_artists": 3,
+    "api.venues": 3,
+    "api.venue": 5,
+    "api.artists": 3,
+    "api.artist": 5,
+    "api.shows": 3,
+    "api.show": 2,
+}
+
+_in_list = re.compile(r"\(\s*(?:\?|%\([^)]*\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\([^)]*\)s|%s|:\w+))*\s*\)")
+_space = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold):
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+def statement_shape(statement):
+    return _in_list.sub("(?)", _space.sub(" ", statement).strip())
+
+
+def _stats():
+    if has_request_context():
+        return g.get("sql_stats")
+    return None
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    stats = _stats()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+def init_instrumentation(app):
+    app.config.setdefault("SQL_INSTRUMENTATION", True)
+    app.config.setdefault("SQL_N_PLUS_ONE_THRESHOLD", 3)
+    app.config.setdefault("SQL_QUERY_BUDGETS", DEFAULT_QUERY_BUDGETS)
+    app.config.setdefault("SQL_QUERY_BUDGET_RAISE", None)
+
+    @app.before_request
+    def start_query_stats():
+        if app.config["SQL_INSTRUMENTATION"]:
+            g.sql_stats = QueryStats()
+
+    @app.after_request
+    def report_query_stats(response):
+        stats = g.get("sql_stats")
+        if stats is None:
+            return response
+
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries"',
+        )
+
+        for shape, n in stats.repeated(app.config["SQL_N_PLUS_ONE_THRESHOLD"]):
+            app.logger.warning(
+                "probable N+1 in %s: %d x %s", request.endpoint, n, shape[:200]
+            )
+
+        budget = app.config["SQL_QUERY_BUDGETS"].get(request.endpoint)
+        if budget is not None and stats.count > budget:
+            message = (
+                f"{request.endpoint} ran {stats.count} statements, "
+                f"its budget is {budget}"
+            )
+            enforce = app.config["SQL_QUERY_BUDGET_RAISE"]
+            if enforce or (enforce is None and app.testing):
+                raise QueryBudgetExceeded(message)
+            app.logger.warning(message)
+        return response
@@ -0,0 +1,161 @@
+import os
+import time
+from flask import Response, g, request, signals_available
+from flask.signals import before_render_template, template_rendered
+from sqlalchemy.pool import QueuePool
+
+
+# Prometheus metrics, served in the text format at /metrics when
+# prometheus_client is installed (it is not in requirements.txt):
+#
+#   fyyur_request_duration_seconds      latency by endpoint, method and status
+#   fyyur_request_db_seconds            SQL time of a request, by endpoint
+#   fyyur_template_render_seconds       rendering time by template, without
+#                                       the SQL run while rendering
+#   fyyur_db_pool_wait_seconds          time to check out a pooled connection
+#   fyyur_page_cache_requests_total     page cache lookups by endpoint and
+#                                       result (hit or miss)
+#
+# Under gunicorn, point PROMETHEUS_MULTIPROC_DIR at an empty directory shared
+# by the workers before they start, see gunicorn.conf.py; every worker then
+# writes its samples there and /metrics adds them up.
+#
+# The template time of a streamed page includes the time spent sending it.
+
+_metrics = None
+
+
+class Metrics:
+    def __init__(self):
+        from prometheus_client import Counter, Histogram
+
+        self.request_duration = Histogram(
+            "fyyur_request_duration_seconds",
+            "Request latency.",
+            ["endpoint", "method", "status"],
+        )
+        self.request_db = Histogram(
+            "fyyur_request_db_seconds",
+            "Time spent running SQL during a request.",
+            ["endpoint"],
+        )
+        self.template_render = Histogram(
+            "fyyur_template_render_seconds",
+            "Template rendering time, without the SQL run while rendering.",
+            ["template"],
+        )
+        self.pool_wait = Histogram(
+            "fyyur_db_pool_wait_seconds",
+            "Time to check out a connection from the pool.",
+            buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+        )
+        self.page_cache = Counter(
+            "fyyur_page_cache_requests",
+            "Page cache lookups.",
+            ["endpoint", "result"],
+        )
+
+
+class TimedQueuePool(QueuePool):
+    # QueuePool reporting how long each checkout waited for a connection,
+    # opening a new one included
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if _metrics is not None:
+                _metrics.pool_wait.observe(time.perf_counter() - started)
+
+
+def _sql_duration():
+    stats = g.get("sql_stats")
+    return stats.duration if stats is not None else 0.0
+
+
+def _timed_engine_options(options, url):
+    # SQLite file databases don't use a queue pool, see config.engine_options
+    if str(url).startswith("sqlite"):
+        return options
+    return {**options, "poolclass": TimedQueuePool}
+
+
+def metrics_view():
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        REGISTRY,
+        CollectorRegistry,
+        generate_latest,
+    )
+
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app):
+    # must run before db.init_app(), which creates the engines
+    global _metrics
+
+    app.config.setdefault("METRICS_ENABLED", True)
+    if not app.config["METRICS_ENABLED"]:
+        return
+    try:
+        import prometheus_client  # noqa: F401
+    except ImportError:
+        app.logger.info("prometheus_client is not installed, /metrics is disabled")
+        return
+    if _metrics is None:
+        _metrics = Metrics()
+
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = _timed_engine_options(
+        app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+        app.config.get("SQLALCHEMY_DATABASE_URI", ""),
+    )
+    app.config["SQLALCHEMY_BINDS"] = {
+        key: _timed_engine_options(bind, bind["url"]) if isinstance(bind, dict) else bind
+        for key, bind in app.config.get("SQLALCHEMY_BINDS", {}).items()
+    }
+
+    app.add_url_rule("/metrics", "metrics", metrics_view)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop("request_started", None)
+        if started is None or request.endpoint == "metrics":
+            return response
+        endpoint = request.endpoint or "unknown"
+        _metrics.request_duration.labels(
+            endpoint, request.method, str(response.status_code)
+        ).observe(time.perf_counter() - started)
+        if g.get("sql_stats") is not None:
+            _metrics.request_db.labels(endpoint).observe(_sql_duration())
+        result = g.pop("page_cache_result", None)
+        if result is not None:
+            _metrics.page_cache.labels(endpoint, result).inc()
+        return response
+
+    if not signals_available:
+        return
+
+    def start_render(sender, template, context, **extra):
+        g.setdefault("render_started", []).append((time.perf_counter(), _sql_duration()))
+
+    def record_render(sender, template, context, **extra):
+        started = g.get("render_started")
+        if not started:
+            return
+        started, sql_started = started.pop()
+        elapsed = time.perf_counter() - started - (_sql_duration() - sql_started)
+        _metrics.template_render.labels(template.name or "string").observe(max(elapsed, 0.0))
+
+    before_render_template.connect(start_render, app, weak=False)
+    template_rendered.connect(record_render, app, weak=False)
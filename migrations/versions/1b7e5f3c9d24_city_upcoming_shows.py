@@ -0,0 +1,71 @@
+"""upcoming shows by city for the home page
+
+Revision ID: 1b7e5f3c9d24
+Revises: f0d4e6a2b8c1
+Create Date: 2026-10-18 23:12:40.518337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1b7e5f3c9d24'
+down_revision = 'f0d4e6a2b8c1'
+branch_labels = None
+depends_on = None
+
+COLUMNS = ('state, city, city_rank, upcoming_shows_count, show_rank, show_id, start_time, '
+           'venue_id, venue_name, artist_id, artist_name, artist_image_link')
+
+# home.ROLLUP_QUERY at this revision, the view is recreated by 8b1f4d2e6c39
+ROLLUP_QUERY = '''
+SELECT state, city,
+       dense_rank() OVER (ORDER BY upcoming_shows_count DESC, state, city) AS city_rank,
+       upcoming_shows_count, show_rank, show_id, start_time, venue_id, venue_name,
+       artist_id, artist_name, artist_image_link
+FROM (
+    SELECT v.state, v.city,
+           count(*) OVER (PARTITION BY v.state, v.city) AS upcoming_shows_count,
+           row_number() OVER (PARTITION BY v.state, v.city ORDER BY s.start_time, s.id) AS show_rank,
+           s.id AS show_id, s.start_time, v.id AS venue_id, v.name AS venue_name,
+           a.id AS artist_id, a.name AS artist_name, a.image_link AS artist_image_link
+    FROM "Show" s
+    JOIN "Venue" v ON v.id = s.venue_id
+    JOIN "Artist" a ON a.id = s.artist_id
+    WHERE s.is_upcoming
+) upcoming
+WHERE show_rank <= 10
+'''
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(f'CREATE MATERIALIZED VIEW city_upcoming_shows AS {ROLLUP_QUERY}')
+    else:
+        op.create_table('city_upcoming_shows',
+        sa.Column('state', sa.String(length=120), nullable=True),
+        sa.Column('city', sa.String(length=120), nullable=True),
+        sa.Column('city_rank', sa.Integer(), nullable=False),
+        sa.Column('upcoming_shows_count', sa.Integer(), nullable=False),
+        sa.Column('show_rank', sa.Integer(), nullable=False),
+        sa.Column('show_id', sa.Integer(), nullable=False),
+        sa.Column('start_time', sa.DateTime(), nullable=False),
+        sa.Column('venue_id', sa.Integer(), nullable=False),
+        sa.Column('venue_name', sa.String(), nullable=True),
+        sa.Column('artist_id', sa.Integer(), nullable=False),
+        sa.Column('artist_name', sa.String(), nullable=True),
+        sa.Column('artist_image_link', sa.String(length=500), nullable=True)
+        )
+        op.execute(f'INSERT INTO city_upcoming_shows ({COLUMNS}) {ROLLUP_QUERY}')
+    op.create_index('ux_city_upcoming_shows_show_id', 'city_upcoming_shows', ['show_id'], unique=True)
+    op.create_index('ix_city_upcoming_shows_city_rank', 'city_upcoming_shows', ['city_rank', 'show_rank'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_city_upcoming_shows_city_rank', table_name='city_upcoming_shows')
+    op.drop_index('ux_city_upcoming_shows_show_id', table_name='city_upcoming_shows')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP MATERIALIZED VIEW city_upcoming_shows')
+    else:
+        op.drop_table('city_upcoming_shows')
@@ -0,0 +1,66 @@
+"""denormalized show counters
+
+Revision ID: 3f5d2a7c91be
+Revises: 88d6a42fcc08
+Create Date: 2026-10-18 09:12:44.105362
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f5d2a7c91be'
+down_revision = '88d6a42fcc08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('Venue', 'Artist'):
+        op.add_column(table, sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('past_shows_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('Show', sa.Column('is_upcoming', sa.Boolean(), server_default=sa.true(), nullable=False))
+
+    # backfill the counters from the existing shows
+    now = datetime.now()
+    show = sa.table(
+        'Show',
+        sa.column('id', sa.Integer),
+        sa.column('start_time', sa.DateTime),
+        sa.column('venue_id', sa.Integer),
+        sa.column('artist_id', sa.Integer),
+        sa.column('is_upcoming', sa.Boolean),
+    )
+    op.execute(show.update().values(is_upcoming=show.c.start_time > now))
+
+    for table, key in (('Venue', show.c.venue_id), ('Artist', show.c.artist_id)):
+        target = sa.table(
+            table,
+            sa.column('id', sa.Integer),
+            sa.column('upcoming_shows_count', sa.Integer),
+            sa.column('past_shows_count', sa.Integer),
+        )
+
+        def count_shows(upcoming):
+            return (
+                sa.select(sa.func.count(show.c.id))
+                .where(key == target.c.id, show.c.is_upcoming == upcoming)
+                .scalar_subquery()
+            )
+
+        op.execute(
+            target.update().values(
+                upcoming_shows_count=count_shows(True),
+                past_shows_count=count_shows(False),
+            )
+        )
+
+
+def downgrade():
+    op.drop_column('Show', 'is_upcoming')
+    for table in ('Artist', 'Venue'):
+        op.drop_column(table, 'past_shows_count')
+        op.drop_column(table, 'upcoming_shows_count')
@@ -0,0 +1,96 @@
+"""search indexes for venues and artists
+
+Revision ID: 5b8e0c4d7a21
+Revises: 3f5d2a7c91be
+Create Date: 2026-10-18 10:03:27.518204
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5b8e0c4d7a21'
+down_revision = '3f5d2a7c91be'
+branch_labels = None
+depends_on = None
+
+# (entity table, association table, association key, FTS5 table)
+TARGETS = (
+    ('Venue', 'venue_genre', 'venue_id', 'venue_fts'),
+    ('Artist', 'artist_genre', 'artist_id', 'artist_fts'),
+)
+
+# must stay identical to search.search_document()
+DOCUMENT = "(coalesce(name, '') || ' ' || coalesce(city, '') || ' ' || coalesce(state, ''))"
+
+
+def _refresh_fts_row(table, association, key, fts, row_id):
+    return f'''
+        DELETE FROM {fts} WHERE rowid = {row_id};
+        INSERT INTO {fts} (rowid, name, city, state, genres)
+        SELECT e.id, e.name, e.city, e.state, (
+            SELECT group_concat(g.name, ' ')
+            FROM {association} a JOIN "Genre" g ON g.id = a.genre_id
+            WHERE a.{key} = e.id
+        )
+        FROM "{table}" e WHERE e.id = {row_id};'''
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for table, _, _, _ in TARGETS:
+            op.execute(
+                f'CREATE INDEX ix_{table.lower()}_search_trgm ON "{table}" '
+                f'USING gin ({DOCUMENT} gin_trgm_ops)'
+            )
+        op.execute('CREATE INDEX ix_genre_name_trgm ON "Genre" USING gin (name gin_trgm_ops)')
+
+    elif op.get_bind().dialect.name == 'sqlite':
+        for table, association, key, fts in TARGETS:
+            op.execute(
+                f"CREATE VIRTUAL TABLE {fts} USING fts5("
+                f"name, city, state, genres, tokenize = 'trigram')"
+            )
+            op.execute(f'''
+                CREATE TRIGGER {fts}_insert AFTER INSERT ON "{table}" BEGIN
+                {_refresh_fts_row(table, association, key, fts, 'NEW.id')}
+                END''')
+            op.execute(f'''
+                CREATE TRIGGER {fts}_update AFTER UPDATE OF name, city, state ON "{table}" BEGIN
+                {_refresh_fts_row(table, association, key, fts, 'NEW.id')}
+                END''')
+            op.execute(f'''
+                CREATE TRIGGER {fts}_delete AFTER DELETE ON "{table}" BEGIN
+                DELETE FROM {fts} WHERE rowid = OLD.id;
+                END''')
+            op.execute(f'''
+                CREATE TRIGGER {fts}_genre_insert AFTER INSERT ON {association} BEGIN
+                {_refresh_fts_row(table, association, key, fts, f'NEW.{key}')}
+                END''')
+            op.execute(f'''
+                CREATE TRIGGER {fts}_genre_delete AFTER DELETE ON {association} BEGIN
+                {_refresh_fts_row(table, association, key, fts, f'OLD.{key}')}
+                END''')
+            # index the existing rows
+            op.execute(f'''
+                INSERT INTO {fts} (rowid, name, city, state, genres)
+                SELECT e.id, e.name, e.city, e.state, (
+                    SELECT group_concat(g.name, ' ')
+                    FROM {association} a JOIN "Genre" g ON g.id = a.genre_id
+                    WHERE a.{key} = e.id
+                )
+                FROM "{table}" e''')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP INDEX ix_genre_name_trgm')
+        for table, _, _, _ in TARGETS:
+            op.execute(f'DROP INDEX ix_{table.lower()}_search_trgm')
+
+    elif op.get_bind().dialect.name == 'sqlite':
+        for _, _, _, fts in TARGETS:
+            for event in ('insert', 'update', 'delete', 'genre_insert', 'genre_delete'):
+                op.execute(f'DROP TRIGGER {fts}_{event}')
+            op.execute(f'DROP TABLE {fts}')
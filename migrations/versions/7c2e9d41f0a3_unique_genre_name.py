@@ -0,0 +1,61 @@
+"""unique genre name
+
+Revision ID: 7c2e9d41f0a3
+Revises: 5b8e0c4d7a21
+Create Date: 2026-10-18 11:20:05.671930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e9d41f0a3'
+down_revision = '5b8e0c4d7a21'
+branch_labels = None
+depends_on = None
+
+
+def _merge_duplicate_genres():
+    # point the associations of duplicated genre names at the lowest id of
+    # each name and drop the other rows, so the unique index can be built
+    connection = op.get_bind()
+    genre = sa.table('Genre', sa.column('id', sa.Integer), sa.column('name', sa.String))
+
+    keep = {}
+    duplicates = {}
+    for genre_id, name in connection.execute(
+        sa.select(genre.c.id, genre.c.name).where(genre.c.name.isnot(None)).order_by(genre.c.id)
+    ):
+        if name in keep:
+            duplicates[genre_id] = keep[name]
+        else:
+            keep[name] = genre_id
+    if not duplicates:
+        return
+
+    for association, key in (('venue_genre', 'venue_id'), ('artist_genre', 'artist_id')):
+        table = sa.table(association, sa.column('genre_id', sa.Integer), sa.column(key, sa.Integer))
+        existing = set(connection.execute(sa.select(table.c.genre_id, table.c[key])))
+        moved = {
+            (duplicates[genre_id], owner_id)
+            for genre_id, owner_id in existing
+            if genre_id in duplicates
+        } - existing
+        connection.execute(table.delete().where(table.c.genre_id.in_(list(duplicates))))
+        if moved:
+            connection.execute(
+                table.insert(),
+                [{'genre_id': genre_id, key: owner_id} for genre_id, owner_id in moved],
+            )
+
+    connection.execute(genre.delete().where(genre.c.id.in_(list(duplicates))))
+
+
+def upgrade():
+    _merge_duplicate_genres()
+    op.create_index(op.f('ix_Genre_name'), 'Genre', ['name'], unique=True)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_Genre_name'), table_name='Genre')
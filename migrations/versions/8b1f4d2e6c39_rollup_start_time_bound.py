@@ -0,0 +1,56 @@
+"""bound the home page rollup on start_time
+
+Revision ID: 8b1f4d2e6c39
+Revises: 6e2f8b4a1c57
+Create Date: 2026-10-19 10:41:07.215604
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8b1f4d2e6c39'
+down_revision = '6e2f8b4a1c57'
+branch_labels = None
+depends_on = None
+
+# must stay identical to home.ROLLUP_QUERY, {upcoming} being its WHERE clause
+ROLLUP_QUERY = '''
+SELECT state, city,
+       dense_rank() OVER (ORDER BY upcoming_shows_count DESC, state, city) AS city_rank,
+       upcoming_shows_count, show_rank, show_id, start_time, venue_id, venue_name,
+       artist_id, artist_name, artist_image_link
+FROM (
+    SELECT v.state, v.city,
+           count(*) OVER (PARTITION BY v.state, v.city) AS upcoming_shows_count,
+           row_number() OVER (PARTITION BY v.state, v.city ORDER BY s.start_time, s.id) AS show_rank,
+           s.id AS show_id, s.start_time, v.id AS venue_id, v.name AS venue_name,
+           a.id AS artist_id, a.name AS artist_name, a.image_link AS artist_image_link
+    FROM "Show" s
+    JOIN "Venue" v ON v.id = s.venue_id
+    JOIN "Artist" a ON a.id = s.artist_id
+    WHERE {upcoming}
+) upcoming
+WHERE show_rank <= 10
+'''
+# the bound on start_time lets the planner skip the partitions of past months
+UPCOMING = 's.is_upcoming AND s.start_time > localtimestamp'
+PREVIOUS_UPCOMING = 's.is_upcoming'
+
+
+def _recreate_view(upcoming):
+    # on SQLite city_upcoming_shows is a table filled by home.py
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('DROP MATERIALIZED VIEW city_upcoming_shows')
+    op.execute(f'CREATE MATERIALIZED VIEW city_upcoming_shows AS {ROLLUP_QUERY.format(upcoming=upcoming)}')
+    op.create_index('ux_city_upcoming_shows_show_id', 'city_upcoming_shows', ['show_id'], unique=True)
+    op.create_index('ix_city_upcoming_shows_city_rank', 'city_upcoming_shows', ['city_rank', 'show_rank'], unique=False)
+
+
+def upgrade():
+    _recreate_view(UPCOMING)
+
+
+def downgrade():
+    _recreate_view(PREVIOUS_UPCOMING)
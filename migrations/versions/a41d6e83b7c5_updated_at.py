@@ -0,0 +1,42 @@
+"""updated_at on venues, artists and shows
+
+Revision ID: a41d6e83b7c5
+Revises: 7c2e9d41f0a3
+Create Date: 2026-10-18 13:47:52.202417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41d6e83b7c5'
+down_revision = '7c2e9d41f0a3'
+branch_labels = None
+depends_on = None
+
+TABLES = ('Venue', 'Artist', 'Show')
+
+
+def upgrade():
+    # SQLite can't add a column with a non-constant default, so the column
+    # is added nullable, backfilled, and only made NOT NULL on PostgreSQL
+    postgresql = op.get_bind().dialect.name == 'postgresql'
+    # the application stores updated_at in UTC
+    utc_now = sa.text("(now() AT TIME ZONE 'utc')") if postgresql else sa.func.current_timestamp()
+    for table in TABLES:
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.execute(
+            sa.table(table, sa.column('updated_at', sa.DateTime))
+            .update()
+            .values(updated_at=utc_now)
+        )
+        if postgresql:
+            op.alter_column(table, 'updated_at', nullable=False, server_default=utc_now)
+        op.create_index(op.f(f'ix_{table}_updated_at'), table, ['updated_at'], unique=False)
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        op.drop_index(op.f(f'ix_{table}_updated_at'), table_name=table)
+        op.drop_column(table, 'updated_at')
@@ -0,0 +1,37 @@
+"""indexes for the show, venue and genre access paths
+
+Revision ID: c9a7f2e15d38
+Revises: a41d6e83b7c5
+Create Date: 2026-10-18 15:08:31.944716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9a7f2e15d38'
+down_revision = 'a41d6e83b7c5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ### Genre.name is already covered by ix_Genre_name (7c2e9d41f0a3) ###
+    op.create_index('ix_Show_venue_id_start_time', 'Show', ['venue_id', 'start_time'], unique=False, postgresql_include=['artist_id'])
+    op.create_index('ix_Show_artist_id_start_time', 'Show', ['artist_id', 'start_time'], unique=False, postgresql_include=['venue_id'])
+    op.create_index('ix_Show_start_time_id', 'Show', ['start_time', 'id'], unique=False)
+    op.create_index('ix_Show_upcoming_start_time', 'Show', ['start_time'], unique=False, postgresql_where=sa.text('is_upcoming'), sqlite_where=sa.text('is_upcoming'))
+    op.create_index('ix_Venue_state_city_id', 'Venue', ['state', 'city', 'id'], unique=False, postgresql_include=['name', 'upcoming_shows_count'])
+    op.create_index('ix_venue_genre_venue_id_genre_id', 'venue_genre', ['venue_id', 'genre_id'], unique=False)
+    op.create_index('ix_artist_genre_artist_id_genre_id', 'artist_genre', ['artist_id', 'genre_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_artist_genre_artist_id_genre_id', table_name='artist_genre')
+    op.drop_index('ix_venue_genre_venue_id_genre_id', table_name='venue_genre')
+    op.drop_index('ix_Venue_state_city_id', table_name='Venue')
+    op.drop_index('ix_Show_upcoming_start_time', table_name='Show')
+    op.drop_index('ix_Show_start_time_id', table_name='Show')
+    op.drop_index('ix_Show_artist_id_start_time', table_name='Show')
+    op.drop_index('ix_Show_venue_id_start_time', table_name='Show')
@@ -0,0 +1,60 @@
+"""end time of shows and double-booking constraints
+
+Revision ID: e5c1a9b3d7f2
+Revises: d82b3f6a09e4
+Create Date: 2026-10-18 19:12:40.518327
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5c1a9b3d7f2'
+down_revision = 'd82b3f6a09e4'
+branch_labels = None
+depends_on = None
+
+# (constraint, column): no two shows of a venue, or of an artist, overlap
+BOOKING_CONSTRAINTS = (
+    ('ex_Show_venue_booking', 'venue_id'),
+    ('ex_Show_artist_booking', 'artist_id'),
+)
+
+
+def _btree_gist_available():
+    return op.get_bind().execute(
+        sa.text("SELECT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'btree_gist')")
+    ).scalar()
+
+
+def upgrade():
+    # existing shows get the default duration, models.SHOW_DEFAULT_DURATION
+    postgresql = op.get_bind().dialect.name == 'postgresql'
+    op.add_column('Show', sa.Column('end_time', sa.DateTime(), nullable=True))
+    if postgresql:
+        op.execute('''UPDATE "Show" SET end_time = start_time + interval '2 hours' ''')
+        op.alter_column('Show', 'end_time', nullable=False)
+        # the constraints need btree_gist; without it, bookings.py alone keeps
+        # shows from overlapping
+        if _btree_gist_available():
+            # fails if existing shows already overlap, they have to be moved first
+            op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+            for name, column in BOOKING_CONSTRAINTS:
+                op.execute(
+                    f'ALTER TABLE "Show" ADD CONSTRAINT "{name}" EXCLUDE USING gist '
+                    f'({column} WITH =, tsrange(start_time, end_time) WITH &&)'
+                )
+    else:
+        # keep the fractional seconds, in the format SQLAlchemy stores
+        op.execute(
+            '''UPDATE "Show" SET end_time = '''
+            '''datetime(start_time, '+2 hours') || substr(start_time, 20)'''
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for name, _ in BOOKING_CONSTRAINTS:
+            op.execute(f'ALTER TABLE "Show" DROP CONSTRAINT IF EXISTS "{name}"')
+    op.drop_column('Show', 'end_time')
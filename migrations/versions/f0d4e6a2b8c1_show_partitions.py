@@ -0,0 +1,150 @@
+"""monthly partitions of shows and the show archive
+
+Revision ID: f0d4e6a2b8c1
+Revises: e5c1a9b3d7f2
+Create Date: 2026-10-18 21:04:55.130942
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f0d4e6a2b8c1'
+down_revision = 'e5c1a9b3d7f2'
+branch_labels = None
+depends_on = None
+
+# months of partitions created ahead, as partitions.PARTITIONS_AHEAD
+PARTITIONS_AHEAD = 12
+COLUMNS = 'id, start_time, artist_id, venue_id, is_upcoming, updated_at, end_time'
+# archived shows whose venue and artist still exist
+RESTORED = 'WHERE venue_id IN (SELECT id FROM "Venue") AND artist_id IN (SELECT id FROM "Artist")'
+
+
+def _month_start(moment):
+    return datetime(moment.year, moment.month, 1)
+
+
+def _add_months(month, months):
+    years, month_index = divmod(month.month - 1 + months, 12)
+    return datetime(month.year + years, month_index + 1, 1)
+
+
+def _booking_constraints(table, columns=('venue_id', 'artist_id')):
+    for column in columns:
+        booking = column.split('_')[0]
+        op.execute(
+            f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_{booking}_booking" '
+            f'EXCLUDE USING gist ({column} WITH =, tsrange(start_time, end_time) WITH &&)'
+        )
+
+
+def _show_indexes():
+    op.create_index('ix_Show_venue_id_start_time', 'Show', ['venue_id', 'start_time'], unique=False, postgresql_include=['artist_id'])
+    op.create_index('ix_Show_artist_id_start_time', 'Show', ['artist_id', 'start_time'], unique=False, postgresql_include=['venue_id'])
+    op.create_index('ix_Show_start_time_id', 'Show', ['start_time', 'id'], unique=False)
+    op.create_index('ix_Show_upcoming_start_time', 'Show', ['start_time'], unique=False, postgresql_where=sa.text('is_upcoming'))
+    op.create_index('ix_Show_updated_at', 'Show', ['updated_at'], unique=False)
+
+
+def _show_foreign_keys():
+    op.create_foreign_key('Show_artist_id_fkey', 'Show', 'Artist', ['artist_id'], ['id'])
+    op.create_foreign_key('Show_venue_id_fkey', 'Show', 'Venue', ['venue_id'], ['id'])
+
+
+def _has_booking_constraints():
+    # exclusion constraints on "Show" or on its partitions, which
+    # e5c1a9b3d7f2 only adds where btree_gist is available
+    return op.get_bind().execute(
+        sa.text(
+            "SELECT EXISTS (SELECT 1 FROM pg_constraint WHERE contype = 'x' AND ("
+            "conrelid = to_regclass('\"Show\"') OR conrelid IN "
+            "(SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass('\"Show\"'))))"
+        )
+    ).scalar()
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        op.create_table('ShowArchive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('start_time', sa.DateTime(), nullable=False),
+        sa.Column('artist_id', sa.Integer(), nullable=False),
+        sa.Column('venue_id', sa.Integer(), nullable=False),
+        sa.Column('is_upcoming', sa.Boolean(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('end_time', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_ShowArchive_start_time'), 'ShowArchive', ['start_time'], unique=False)
+        return
+
+    # the partitioned table is built next to "Show", filled, and renamed;
+    # its primary key has to include the partition key
+    bookings = _has_booking_constraints()
+    first, last = op.get_bind().execute(
+        sa.text('SELECT min(start_time), max(start_time) FROM "Show"')
+    ).one()
+    now = datetime.now()
+    month = _month_start(min(first or now, now))
+    end = _add_months(_month_start(max(last or now, now)), PARTITIONS_AHEAD + 1)
+
+    op.execute('CREATE TABLE "Show_partitioned" (LIKE "Show" INCLUDING DEFAULTS) PARTITION BY RANGE (start_time)')
+    op.execute('ALTER TABLE "Show_partitioned" ADD CONSTRAINT "Show_partitioned_pkey" PRIMARY KEY (id, start_time)')
+    while month < end:
+        name = f'Show_{month:%Y_%m}'
+        op.execute(
+            f'CREATE TABLE "{name}" PARTITION OF "Show_partitioned" '
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_add_months(month, 1):%Y-%m-%d}')"
+        )
+        if bookings:
+            _booking_constraints(name)
+        month = _add_months(month, 1)
+    op.execute('CREATE TABLE "Show_default" PARTITION OF "Show_partitioned" DEFAULT')
+    if bookings:
+        _booking_constraints('Show_default')
+    op.execute(f'INSERT INTO "Show_partitioned" ({COLUMNS}) SELECT {COLUMNS} FROM "Show"')
+
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY NONE')
+    op.execute('DROP TABLE "Show"')
+    op.execute('ALTER TABLE "Show_partitioned" RENAME TO "Show"')
+    op.execute('ALTER TABLE "Show" RENAME CONSTRAINT "Show_partitioned_pkey" TO "Show_pkey"')
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY "Show".id')
+    _show_foreign_keys()
+    _show_indexes()
+
+    # detached months are attached here by `flask shows maintain`
+    op.execute('CREATE TABLE "ShowArchive" (LIKE "Show") PARTITION BY RANGE (start_time)')
+    op.execute('ALTER TABLE "ShowArchive" ADD CONSTRAINT "ShowArchive_pkey" PRIMARY KEY (id, start_time)')
+    op.execute('CREATE TABLE "ShowArchive_default" PARTITION OF "ShowArchive" DEFAULT')
+    op.create_index(op.f('ix_ShowArchive_start_time'), 'ShowArchive', ['start_time'], unique=False)
+
+
+def downgrade():
+    # archived shows go back to "Show"; run `flask shows rebuild-counters`
+    # afterwards to count them again
+    if op.get_bind().dialect.name != 'postgresql':
+        op.execute(f'INSERT INTO "Show" ({COLUMNS}) SELECT {COLUMNS} FROM "ShowArchive" {RESTORED}')
+        op.drop_index(op.f('ix_ShowArchive_start_time'), table_name='ShowArchive')
+        op.drop_table('ShowArchive')
+        return
+
+    bookings = _has_booking_constraints()
+    op.execute('CREATE TABLE "Show_unpartitioned" (LIKE "Show" INCLUDING DEFAULTS)')
+    op.execute(f'INSERT INTO "Show_unpartitioned" ({COLUMNS}) SELECT {COLUMNS} FROM "Show"')
+    op.execute(f'INSERT INTO "Show_unpartitioned" ({COLUMNS}) SELECT {COLUMNS} FROM "ShowArchive" {RESTORED}')
+
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY NONE')
+    op.execute('DROP TABLE "ShowArchive"')
+    op.execute('DROP TABLE "Show"')
+    op.execute('ALTER TABLE "Show_unpartitioned" RENAME TO "Show"')
+    op.execute('ALTER TABLE "Show" ADD CONSTRAINT "Show_pkey" PRIMARY KEY (id)')
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY "Show".id')
+    _show_foreign_keys()
+    _show_indexes()
+    if bookings:
+        op.execute('ALTER TABLE "Show" ADD CONSTRAINT "ex_Show_venue_booking" EXCLUDE USING gist (venue_id WITH =, tsrange(start_time, end_time) WITH &&)')
+        op.execute('ALTER TABLE "Show" ADD CONSTRAINT "ex_Show_artist_booking" EXCLUDE USING gist (artist_id WITH =, tsrange(start_time, end_time) WITH &&)')
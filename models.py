@@ -1,11 +1,9 @@
-from flask_moment import Moment
-from flask import Flask
-from datetime import datetime
+from datetime import datetime, timedelta
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from routing import RoutingSession
 
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 # In order to save genre as a db object with a list of genres as its properties
 # we need to define it in its own Model
@@ -13,24 +11,38 @@ class Genre(db.Model):
     __tablename__ = "Genre"
 
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(120))
+    name = db.Column(db.String(120), index=True, unique=True)
 
 
 venue_genre = db.Table(
     "venue_genre",
     db.Column("genre_id", db.Integer, db.ForeignKey("Genre.id"), primary_key=True),
     db.Column("venue_id", db.Integer, db.ForeignKey("Venue.id"), primary_key=True),
+    # the primary key serves genre -> venues, this one venue -> genres
+    db.Index("ix_venue_genre_venue_id_genre_id", "venue_id", "genre_id"),
 )
 
 artist_genre = db.Table(
     "artist_genre",
     db.Column("genre_id", db.Integer, db.ForeignKey("Genre.id"), primary_key=True),
     db.Column("artist_id", db.Integer, db.ForeignKey("Artist.id"), primary_key=True),
+    # the primary key serves genre -> artists, this one artist -> genres
+    db.Index("ix_artist_genre_artist_id_genre_id", "artist_id", "genre_id"),
 )
 
 
 class Venue(db.Model):
     __tablename__ = "Venue"
+    __table_args__ = (
+        # the /venues listing, grouped by area
+        db.Index(
+            "ix_Venue_state_city_id",
+            "state",
+            "city",
+            "id",
+            postgresql_include=["name", "upcoming_shows_count"],
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
@@ -47,6 +59,19 @@ class Venue(db.Model):
     seeking_talent = db.Column(db.Boolean, default=False)
     seeking_description = db.Column(db.String(120))
     shows = db.relationship("Show", backref="venue", lazy=True)
+    # denormalized show counters, maintained by counters.py
+    upcoming_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # last change of the row or of what its pages render, see conditional.py
+    updated_at = db.Column(
+        db.DateTime,
+        index=True,
+        nullable=False,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+    )
 
     def __repr__(self):
         return f"<VenueID: {self.id}, VenueName: {self.name}>"
@@ -69,18 +94,148 @@ class Artist(db.Model):
     seeking_venue = db.Column(db.Boolean, default=False)
     seeking_description = db.Column(db.String(120))
     shows = db.relationship("Show", backref="artist", lazy=True)
+    # denormalized show counters, maintained by counters.py
+    upcoming_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # last change of the row or of what its pages render, see conditional.py
+    updated_at = db.Column(
+        db.DateTime,
+        index=True,
+        nullable=False,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+    )
 
     def __repr__(self):
         return f"<ArtistID: {self.id}, ArtistName: {self.name}>"
 
 
+# length of a show listed without one, and the longest one allowed, which
+# bounds the range scanned for overlapping bookings
+SHOW_DEFAULT_DURATION = timedelta(hours=2)
+SHOW_MAX_DURATION = timedelta(hours=24)
+
+
+def _default_end_time(context):
+    return context.get_current_parameters()["start_time"] + SHOW_DEFAULT_DURATION
+
+
 class Show(db.Model):
     __tablename__ = "Show"
+    __table_args__ = (
+        # shows of a venue or an artist, in time order
+        db.Index(
+            "ix_Show_venue_id_start_time",
+            "venue_id",
+            "start_time",
+            postgresql_include=["artist_id"],
+        ),
+        db.Index(
+            "ix_Show_artist_id_start_time",
+            "artist_id",
+            "start_time",
+            postgresql_include=["venue_id"],
+        ),
+        # keyset pagination of /shows
+        db.Index("ix_Show_start_time_id", "start_time", "id"),
+        # shows still counted as upcoming, for counters.roll_past_shows()
+        db.Index(
+            "ix_Show_upcoming_start_time",
+            "start_time",
+            postgresql_where=db.text("is_upcoming"),
+            sqlite_where=db.text("is_upcoming"),
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     start_time = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # bookings are checked for overlaps on [start_time, end_time), see
+    # bookings.py
+    end_time = db.Column(db.DateTime, nullable=False, default=_default_end_time)
     artist_id = db.Column(db.Integer, db.ForeignKey("Artist.id"), nullable=False)
     venue_id = db.Column(db.Integer, db.ForeignKey("Venue.id"), nullable=False)
+    # whether the show is currently counted in the upcoming counters of its
+    # venue and artist; flipped by counters.roll_past_shows()
+    is_upcoming = db.Column(
+        db.Boolean, nullable=False, default=True, server_default=db.true()
+    )
+    updated_at = db.Column(
+        db.DateTime,
+        index=True,
+        nullable=False,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+    )
 
     def __repr__(self):
         return "<Show: {},{},{}>".format(self.id, self.artist_id, self.venue_id)
+
+
+class ShowArchive(db.Model):
+    __tablename__ = "ShowArchive"
+
+    # shows moved out of Show by partitions.archive_shows(); same columns,
+    # without foreign keys so that venues and artists can still be deleted
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    start_time = db.Column(db.DateTime, nullable=False, index=True)
+    artist_id = db.Column(db.Integer, nullable=False)
+    venue_id = db.Column(db.Integer, nullable=False)
+    is_upcoming = db.Column(db.Boolean, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return "<ShowArchive: {},{},{}>".format(self.id, self.artist_id, self.venue_id)
+
+
+# upcoming shows by city for the home page, see home.py: a materialized view
+# on PostgreSQL, a table rebuilt by home.refresh_home_rollup() on SQLite
+city_upcoming_shows = db.Table(
+    "city_upcoming_shows",
+    db.Column("state", db.String(120)),
+    db.Column("city", db.String(120)),
+    # 1 for the city with the most upcoming shows
+    db.Column("city_rank", db.Integer, nullable=False),
+    db.Column("upcoming_shows_count", db.Integer, nullable=False),
+    # 1 for the next show of the city
+    db.Column("show_rank", db.Integer, nullable=False),
+    db.Column("show_id", db.Integer, nullable=False),
+    db.Column("start_time", db.DateTime, nullable=False),
+    db.Column("venue_id", db.Integer, nullable=False),
+    db.Column("venue_name", db.String),
+    db.Column("artist_id", db.Integer, nullable=False),
+    db.Column("artist_name", db.String),
+    db.Column("artist_image_link", db.String(500)),
+    # REFRESH MATERIALIZED VIEW CONCURRENTLY needs a unique index
+    db.Index("ux_city_upcoming_shows_show_id", "show_id", unique=True),
+    db.Index("ix_city_upcoming_shows_city_rank", "city_rank", "show_rank"),
+)
+
+
+class ImportCheckpoint(db.Model):
+    __tablename__ = "ImportCheckpoint"
+
+    # progress of a `flask import` run, committed with each chunk so that an
+    # interrupted import resumes after the last chunk actually stored
+    source = db.Column(db.String(500), primary_key=True)
+    rows = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(
+        db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    def __repr__(self):
+        return f"<ImportCheckpoint: {self.source}, {self.rows}>"
+
+
+class CacheVersion(db.Model):
+    __tablename__ = "CacheVersion"
+
+    # version counters of the page cache ("venues", "venue:3", ...), shared
+    # by every process and bumped after each write, see cache.py
+    key = db.Column(db.String(200), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<CacheVersion: {self.key}, {self.version}>"
@@ -0,0 +1,39 @@
+from datetime import datetime
+from flask import abort, request
+
+
+# Keyset pagination on (start_time, id). A cursor names the last row of the
+# previous page, so a page is one indexed range scan whatever its depth.
+
+DEFAULT_PAGE_SIZE = 30
+MAX_PAGE_SIZE = 100
+
+
+def page_size(default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    size = request.args.get("limit", default, type=int)
+    return min(max(size, 1), maximum)
+
+
+def datetime_arg(name):
+    # parse an ISO 8601 query string argument, 400 when malformed
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        abort(400)
+
+
+def encode_cursor(start_time, record_id):
+    return f"{start_time.isoformat()}_{record_id}"
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        start_time, record_id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(start_time), int(record_id)
+    except ValueError:
+        abort(400)
@@ -0,0 +1,174 @@
+import re
+from datetime import datetime
+from sqlalchemy import delete, select, text
+
+from models import db, Show, ShowArchive
+from counters import uncount_shows
+
+
+# Time partitioning of the Show table. On PostgreSQL, after migration
+# f0d4e6a2b8c1, "Show" is range-partitioned by start_time into monthly
+# partitions named Show_YYYY_MM, plus Show_default for anything outside
+# them, so queries bounded on start_time (the /shows pages, the booking
+# checks, roll_past_shows) only scan the months they cover.
+#
+# `flask shows maintain` keeps PARTITIONS_AHEAD months of partitions ahead
+# of the current one and archives old shows: whole months are detached from
+# "Show" and attached to "ShowArchive", which only takes a brief lock. The
+# archived shows leave the counters and the venue and artist pages.
+#
+# On SQLite, and on a PostgreSQL database whose "Show" is not partitioned
+# (e.g. created with db.create_all()), there are no partitions to create and
+# archiving moves the rows with INSERT ... SELECT and DELETE instead, with
+# the same month granularity.
+
+PARTITIONS_AHEAD = 12
+_partition_name = re.compile(r"^Show_(\d{4})_(\d{2})$")
+
+
+def month_start(moment):
+    return datetime(moment.year, moment.month, 1)
+
+
+def add_months(month, months):
+    years, month_index = divmod(month.month - 1 + months, 12)
+    return datetime(month.year + years, month_index + 1, 1)
+
+
+def partition_name(month):
+    return f"Show_{month:%Y_%m}"
+
+
+def is_partitioned():
+    if db.session.get_bind().dialect.name != "postgresql":
+        return False
+    return db.session.execute(
+        text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+            "WHERE partrelid = to_regclass('\"Show\"'))"
+        )
+    ).scalar()
+
+
+def partitions(table="Show"):
+    # the monthly partitions of table, as {first day of the month: name}
+    names = db.session.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:table)"
+        ),
+        {"table": f'"{table}"'},
+    ).scalars()
+    months = {}
+    for name in names:
+        match = _partition_name.match(name)
+        if match:
+            months[datetime(int(match[1]), int(match[2]), 1)] = name
+    return months
+
+
+def _has_booking_constraints():
+    # whether the partitions of "Show" carry the exclusion constraints of
+    # migration f0d4e6a2b8c1, only added where btree_gist is available
+    return db.session.execute(
+        text(
+            "SELECT EXISTS (SELECT 1 FROM pg_constraint c "
+            "JOIN pg_inherits i ON i.inhrelid = c.conrelid "
+            "WHERE i.inhparent = to_regclass('\"Show\"') AND c.contype = 'x')"
+        )
+    ).scalar()
+
+
+def _create_partition(month):
+    # built apart and attached, so that shows already stored in Show_default
+    # for that month can be moved into it first
+    name = partition_name(month)
+    bounds = f"FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')"
+    db.session.execute(text(f'CREATE TABLE "{name}" (LIKE "Show" INCLUDING DEFAULTS)'))
+    if _has_booking_constraints():
+        for column in ("venue_id", "artist_id"):
+            booking = column.split("_")[0]
+            db.session.execute(
+                text(
+                    f'ALTER TABLE "{name}" ADD CONSTRAINT "{name}_{booking}_booking" '
+                    f"EXCLUDE USING gist ({column} WITH =, "
+                    f"tsrange(start_time, end_time) WITH &&)"
+                )
+            )
+    db.session.execute(
+        text(
+            f'WITH moved AS (DELETE FROM "Show_default" WHERE start_time >= :start '
+            f"AND start_time < :end RETURNING *) "
+            f'INSERT INTO "{name}" SELECT * FROM moved'
+        ),
+        {"start": month, "end": add_months(month, 1)},
+    )
+    db.session.execute(text(f'ALTER TABLE "Show" ATTACH PARTITION "{name}" FOR VALUES {bounds}'))
+    return name
+
+
+def create_partitions(ahead=PARTITIONS_AHEAD, now=None):
+    # create the missing partitions from the current month to ahead months
+    # later; returns their names
+    if not is_partitioned():
+        return []
+    current = month_start(now or datetime.now())
+    existing = partitions()
+    return [
+        _create_partition(month)
+        for month in (add_months(current, offset) for offset in range(ahead + 1))
+        if month not in existing
+    ]
+
+
+def _move_to_archive(criteria):
+    columns = [column.name for column in ShowArchive.__table__.columns]
+    db.session.execute(
+        ShowArchive.__table__.insert().from_select(
+            columns, select(*(Show.__table__.c[name] for name in columns)).where(*criteria)
+        )
+    )
+    db.session.execute(delete(Show).where(*criteria))
+
+
+def _detach_to_archive(name, month):
+    db.session.execute(text(f'ALTER TABLE "Show" DETACH PARTITION "{name}"'))
+    # the foreign keys cloned from "Show" would stop venues and artists from
+    # being deleted
+    foreign_keys = db.session.execute(
+        text(
+            "SELECT conname FROM pg_constraint "
+            "WHERE conrelid = to_regclass(:name) AND contype = 'f'"
+        ),
+        {"name": f'"{name}"'},
+    ).scalars()
+    for constraint in list(foreign_keys):
+        db.session.execute(text(f'ALTER TABLE "{name}" DROP CONSTRAINT "{constraint}"'))
+    db.session.execute(
+        text(
+            f'ALTER TABLE "ShowArchive" ATTACH PARTITION "{name}" '
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')"
+        )
+    )
+
+
+def archive_shows(before):
+    # move the shows of the months before the one of `before` to
+    # ShowArchive and take them off the counters; returns the number of
+    # shows archived and the page cache keys to bump
+    cutoff = month_start(before)
+    criteria = (Show.start_time < cutoff,)
+    touched = uncount_shows(*criteria)
+    archived = sum(count for _, _, count in touched)
+
+    if is_partitioned():
+        for month, name in sorted(partitions().items()):
+            if add_months(month, 1) <= cutoff:
+                _detach_to_archive(name, month)
+    # what is left, e.g. old shows in Show_default
+    _move_to_archive(criteria)
+
+    stale_pages = ["shows", "venues", "artists"]
+    stale_pages += [f"venue:{venue_id}" for venue_id in {venue for venue, _, _ in touched}]
+    stale_pages += [f"artist:{artist_id}" for artist_id in {artist for _, artist, _ in touched}]
+    return archived, stale_pages
@@ -0,0 +1,189 @@
+import cProfile
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import click
+from flask import current_app, g, request
+from flask.cli import AppGroup
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+try:
+    import fcntl
+except ImportError:  # Windows, where only the threads of a process are kept apart
+    fcntl = None
+
+
+# On-demand profiling of requests with cProfile. A request is profiled when
+#
+#   - PROFILE_SAMPLE_RATE is above 0, for that fraction of the requests
+#     (1.0 profiles them all), or
+#   - it carries an X-Profile header holding a token from
+#     `flask profile token`, signed with SECRET_KEY and valid PROFILE_TOKEN_TTL
+#     seconds.
+#
+# Each profile is written to PROFILE_DIR as a pstats file, readable with
+# pstats, snakeviz or flameprof (`flameprof file.prof > flame.svg`). The
+# directory keeps the PROFILE_MAX_FILES most recent profiles plus those in
+# index.json, which lists the PROFILE_SLOWEST slowest requests per endpoint.
+# The worker processes sharing PROFILE_DIR update index.json and rotate the
+# files one at a time, under an flock on index.lock. A profile is written
+# under a temporary name first and renamed when it is indexed, so that the
+# rotation of another worker never removes it in between.
+
+PROFILE_HEADER = "X-Profile"
+_index_lock = threading.Lock()
+
+profile_cli = AppGroup("profile", help="Request profiling.")
+
+
+def _serializer(app):
+    return URLSafeTimedSerializer(app.secret_key, salt="profile")
+
+
+def profile_token(app):
+    return _serializer(app).dumps("profile")
+
+
+def _token_valid(app, token):
+    if not app.secret_key:
+        return False
+    try:
+        _serializer(app).loads(token, max_age=app.config["PROFILE_TOKEN_TTL"])
+    except BadSignature:
+        return False
+    return True
+
+
+def _should_profile(app):
+    token = request.headers.get(PROFILE_HEADER)
+    if token:
+        return _token_valid(app, token)
+    rate = app.config["PROFILE_SAMPLE_RATE"]
+    return rate > 0 and random.random() < rate
+
+
+def _profile_dir(app):
+    path = app.config["PROFILE_DIR"] or os.path.join(app.instance_path, "profiles")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _read_index(path):
+    try:
+        with open(os.path.join(path, "index.json")) as index_file:
+            return json.load(index_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_index(path, index):
+    temporary = os.path.join(path, f"index.json.{os.getpid()}")
+    with open(temporary, "w") as index_file:
+        json.dump(index, index_file, indent=1)
+    os.replace(temporary, os.path.join(path, "index.json"))
+
+
+@contextmanager
+def _index_locked(path):
+    with _index_lock, open(os.path.join(path, "index.lock"), "a") as lock_file:
+        if fcntl is not None:
+            # released when the file is closed
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def _record(app, path, entry, dumped):
+    # dumped is the profile written for entry, renamed to entry["file"]
+    with _index_locked(path):
+        os.replace(dumped, os.path.join(path, entry["file"]))
+        index = _read_index(path)
+        slowest = index.setdefault(entry["endpoint"], [])
+        slowest.append(entry)
+        slowest.sort(key=lambda item: item["duration_ms"], reverse=True)
+        del slowest[app.config["PROFILE_SLOWEST"] :]
+        _write_index(path, index)
+
+        # rotate: keep the most recent files and the indexed ones
+        kept = {item["file"] for items in index.values() for item in items}
+        profiles = sorted(
+            (name for name in os.listdir(path) if name.endswith(".prof")),
+            key=lambda name: os.path.getmtime(os.path.join(path, name)),
+            reverse=True,
+        )
+        for name in profiles[app.config["PROFILE_MAX_FILES"] :]:
+            if name not in kept:
+                try:
+                    os.remove(os.path.join(path, name))
+                except OSError:
+                    pass
+
+
+def init_profiling(app):
+    app.config.setdefault("PROFILE_SAMPLE_RATE", 0.0)
+    app.config.setdefault("PROFILE_DIR", None)
+    app.config.setdefault("PROFILE_MAX_FILES", 200)
+    app.config.setdefault("PROFILE_SLOWEST", 10)
+    app.config.setdefault("PROFILE_TOKEN_TTL", 3600)
+
+    @app.before_request
+    def start_profile():
+        if _should_profile(app):
+            g.profile = cProfile.Profile()
+            g.profile_started = time.perf_counter()
+            g.profile.enable()
+
+    @app.after_request
+    def save_profile(response):
+        profile = g.pop("profile", None)
+        if profile is None:
+            return response
+        profile.disable()
+        duration = time.perf_counter() - g.pop("profile_started")
+
+        path = _profile_dir(app)
+        endpoint = request.endpoint or "unknown"
+        name = "{}-{}-{}.prof".format(
+            datetime.utcnow().strftime("%Y%m%dT%H%M%S%f"),
+            endpoint.replace(".", "_"),
+            os.getpid(),
+        )
+        dumped = os.path.join(path, name + ".tmp")
+        profile.dump_stats(dumped)
+        _record(
+            app,
+            path,
+            {
+                "endpoint": endpoint,
+                "url": request.full_path.rstrip("?"),
+                "status": response.status_code,
+                "duration_ms": round(duration * 1000, 2),
+                "time": datetime.utcnow().isoformat(timespec="seconds"),
+                "file": name,
+            },
+            dumped,
+        )
+        return response
+
+
+@profile_cli.command("token")
+def token_command():
+    """Print a token for the X-Profile header."""
+    click.echo(profile_token(current_app))
+
+
+@profile_cli.command("top")
+def top_command():
+    """List the slowest profiled requests by endpoint."""
+    path = _profile_dir(current_app)
+    for endpoint, entries in sorted(_read_index(path).items()):
+        click.echo(endpoint)
+        for entry in entries:
+            click.echo(
+                f"  {entry['duration_ms']:9.1f} ms  {entry['status']}  "
+                f"{entry['url']}  {os.path.join(path, entry['file'])}"
+            )
@@ -0,0 +1,216 @@
+from datetime import datetime
+from itertools import groupby
+from operator import attrgetter
+from flask import g
+from sqlalchemy import tuple_
+from sqlalchemy.orm import selectinload
+from models import db, Venue, Artist, Show
+
+
+# Read queries shared by the HTML views and the JSON API. Each returns plain
+# dicts and lists, ready for a template or a JSON encoder.
+
+
+def venue_list():
+    # every venue with its upcoming show counter, in one statement
+    return db.session.query(
+        Venue.id,
+        Venue.name,
+        Venue.city,
+        Venue.state,
+        Venue.upcoming_shows_count.label("num_upcoming_shows"),
+    )
+
+
+def venue_areas(venues):
+    # group rows of venue_list() ordered by state and city into the areas
+    # of the /venues page, lazily so that a streamed query stays streamed
+    return (
+        {
+            "city": city,
+            "state": state,
+            "venues": [
+                {
+                    "id": venue.id,
+                    "name": venue.name,
+                    "num_upcoming_shows": venue.num_upcoming_shows,
+                }
+                for venue in area_venues
+            ],
+        }
+        for (city, state), area_venues in groupby(
+            venues, key=attrgetter("city", "state")
+        )
+    )
+
+
+def artist_list():
+    return db.session.query(
+        Artist.id,
+        Artist.name,
+        Artist.city,
+        Artist.state,
+        Artist.upcoming_shows_count.label("num_upcoming_shows"),
+    )
+
+
+def id_page(query, model, after, limit):
+    # keyset pagination on id; returns (rows, id of the last row or None)
+    if after is not None:
+        query = query.filter(model.id > after)
+    rows = query.order_by(model.id).limit(limit + 1).all()
+    if len(rows) > limit:
+        return rows[:limit], rows[limit - 1].id
+    return rows, None
+
+
+def _show_query():
+    return (
+        db.session.query(
+            Show.id,
+            Show.start_time,
+            Show.end_time,
+            Show.venue_id,
+            Venue.name.label("venue_name"),
+            Show.artist_id,
+            Artist.name.label("artist_name"),
+            Artist.image_link.label("artist_image_link"),
+        )
+        .join(Venue, Venue.id == Show.venue_id)
+        .join(Artist, Artist.id == Show.artist_id)
+    )
+
+
+def _show_dict(show):
+    return {
+        "id": show.id,
+        "venue_id": show.venue_id,
+        "venue_name": show.venue_name,
+        "artist_id": show.artist_id,
+        "artist_name": show.artist_name,
+        "artist_image_link": show.artist_image_link,
+        "start_time": show.start_time,
+        "end_time": show.end_time,
+    }
+
+
+def show_page(start=None, end=None, after=None, limit=30):
+    # shows in (start_time, id) order, optionally within [start, end) and
+    # after the (start_time, id) cursor; returns (shows, last key or None)
+    query = _show_query()
+    if start:
+        query = query.filter(Show.start_time >= start)
+    if end:
+        query = query.filter(Show.start_time < end)
+    if after:
+        query = query.filter(tuple_(Show.start_time, Show.id) > tuple_(*after))
+
+    # one extra row tells whether there is a next page
+    shows = query.order_by(Show.start_time, Show.id).limit(limit + 1).all()
+    last = None
+    if len(shows) > limit:
+        shows = shows[:limit]
+        last = (shows[-1].start_time, shows[-1].id)
+    return [_show_dict(show) for show in shows], last
+
+
+def _phone(phone):
+    if not phone:
+        return phone
+    return phone[:3] + "-" + phone[3:6] + "-" + phone[6:]
+
+
+def _split_shows(shows, other):
+    # split the shows in a single pass against one snapshot of the time;
+    # other is "artist" for a venue's shows and "venue" for an artist's
+    now = datetime.now()
+    upcoming_shows = []
+    past_shows = []
+
+    for show in sorted(shows, key=attrgetter("start_time")):
+        related = getattr(show, other)
+        (upcoming_shows if show.start_time > now else past_shows).append(
+            {
+                f"{other}_id": related.id,
+                f"{other}_name": related.name,
+                f"{other}_image_link": related.image_link,
+                "start_time": show.start_time,
+            }
+        )
+    if upcoming_shows:
+        # the page changes when the next show starts, see cache.py
+        g.cache_valid_until = upcoming_shows[0]["start_time"]
+
+    return {
+        "past_shows": past_shows,
+        "past_shows_count": len(past_shows),
+        "upcoming_shows": upcoming_shows,
+        "upcoming_shows_count": len(upcoming_shows),
+    }
+
+
+def venue_detail(venue_id):
+    # the venue, its genres, and its shows with their artists: three indexed
+    # statements whatever the number of shows; None if there is no such venue
+    venue = (
+        db.session.query(Venue)
+        .options(
+            selectinload(Venue.genres),
+            selectinload(Venue.shows).joinedload(Show.artist),
+        )
+        .filter(Venue.id == venue_id)
+        .one_or_none()
+    )
+    if not venue:
+        return None
+
+    return {
+        "id": venue.id,
+        "name": venue.name,
+        "genres": [genre.name for genre in venue.genres],
+        "address": venue.address,
+        "city": venue.city,
+        "state": venue.state,
+        "phone": _phone(venue.phone),
+        "website_link": venue.website_link,
+        "facebook_link": venue.facebook_link,
+        "seeking_talent": venue.seeking_talent,
+        "seeking_description": venue.seeking_description,
+        "image_link": venue.image_link,
+        **_split_shows(venue.shows, "artist"),
+    }
+
+
+def artist_detail(artist_id):
+    # the artist, its genres, and its shows with their venues
+    artist = (
+        db.session.query(Artist)
+        .options(
+            selectinload(Artist.genres),
+            selectinload(Artist.shows).joinedload(Show.venue),
+        )
+        .filter(Artist.id == artist_id)
+        .one_or_none()
+    )
+    if not artist:
+        return None
+
+    return {
+        "id": artist.id,
+        "name": artist.name,
+        "genres": [genre.name for genre in artist.genres],
+        "city": artist.city,
+        "state": artist.state,
+        "phone": _phone(artist.phone),
+        "website_link": artist.website_link,
+        "facebook_link": artist.facebook_link,
+        "seeking_venue": artist.seeking_venue,
+        "seeking_description": artist.seeking_description,
+        "image_link": artist.image_link,
+        **_split_shows(artist.shows, "venue"),
+    }
+
+
+def show_detail(show_id):
+    show = _show_query().filter(Show.id == show_id).one_or_none()
+    return _show_dict(show) if show else None
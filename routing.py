@@ -0,0 +1,92 @@
+import time
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+
+# Read/write splitting. When a "replica" bind is configured, the statements
+# of the read-only endpoints in REPLICA_ENDPOINTS run on the replica and
+# everything else on the primary.
+#
+# A request that writes sets a cookie keeping its client on the primary for
+# REPLICA_STICKY_SECONDS, so it reads its own writes despite replication lag.
+# A request that read from the replica sets g.read_from_replica, see the
+# page cache in cache.py.
+
+STICKY_COOKIE = "primary_until"
+
+READ_ENDPOINTS = {
+    "venues.venues",
+    "artists.artists",
+    "shows.shows",
+    "venues.show_venue",
+    "artists.show_artist",
+    "venues.search_venues",
+    "artists.search_artists",
+    "export",
+    "api.venues",
+    "api.venue",
+    "api.artists",
+    "api.artist",
+    "api.shows",
+    "api.show",
+}
+
+
+def reads_from_replica():
+    if not has_request_context():
+        return False
+    if request.endpoint not in current_app.config["REPLICA_ENDPOINTS"]:
+        return False
+    primary_until = request.cookies.get(STICKY_COOKIE, 0, type=float)
+    return primary_until < time.time()
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and not getattr(clause, "is_dml", False)
+            and reads_from_replica()
+        ):
+            replica = self._db.engines.get("replica")
+            if replica is not None:
+                g.read_from_replica = True
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _wrote():
+    if has_request_context():
+        g.database_written = True
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _after_flush(session, flush_context):
+    _wrote()
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _after_bulk_write(orm_execute_state):
+    # UPDATE/DELETE statements executed through the session, see counters.py
+    if not orm_execute_state.is_select:
+        _wrote()
+
+
+def init_routing(app):
+    app.config.setdefault("REPLICA_ENDPOINTS", READ_ENDPOINTS)
+    app.config.setdefault("REPLICA_STICKY_SECONDS", 10)
+
+    @app.after_request
+    def stick_to_primary(response):
+        if g.pop("database_written", False):
+            seconds = app.config["REPLICA_STICKY_SECONDS"]
+            response.set_cookie(
+                STICKY_COOKIE,
+                str(time.time() + seconds),
+                max_age=seconds,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
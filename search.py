@@ -0,0 +1,193 @@
+from sqlalchemy import column, func, inspect, literal_column, select, table, union
+from models import db, Venue, Artist, Genre, venue_genre, artist_genre
+
+
+# Search over name, city, state and genre of venues and artists.
+#
+# On PostgreSQL the text columns are matched through a pg_trgm GIN index on
+# search_document() and ranked by trigram similarity. On SQLite the
+# venue_fts/artist_fts FTS5 tables (trigram tokenizer, kept up to date by
+# triggers) are matched and ranked by bm25. Both are created by the
+# 5b8e0c4d7a21 migration; without them, and for terms shorter than the
+# three characters a trigram needs, we fall back to a plain ILIKE scan.
+
+SEARCH_PAGE_SIZE = 20
+
+
+class SearchTarget:
+    def __init__(self, model, association, key, fts_table):
+        self.model = model
+        self.association = association
+        self.key = key
+        self.fts_table = fts_table
+
+
+VENUES = SearchTarget(Venue, venue_genre, venue_genre.c.venue_id, "venue_fts")
+ARTISTS = SearchTarget(Artist, artist_genre, artist_genre.c.artist_id, "artist_fts")
+
+# (engine url, table name) -> whether the FTS5 table exists
+_fts_tables = {}
+
+
+def search_document(model):
+    # must stay identical to the expression indexed by the migration; the
+    # constants are literals, not bind parameters, or the expression would
+    # not match the index with drivers binding on the server (asyncpg)
+    empty, space = literal_column("''"), literal_column("' '")
+    return (
+        func.coalesce(model.name, empty)
+        + space
+        + func.coalesce(model.city, empty)
+        + space
+        + func.coalesce(model.state, empty)
+    )
+
+
+def _like_pattern(term):
+    for char in ("\\", "%", "_"):
+        term = term.replace(char, "\\" + char)
+    return f"%{term}%"
+
+
+def _genre_matches(target, pattern):
+    return (
+        select(target.key)
+        .join(Genre, Genre.id == target.association.c.genre_id)
+        .where(Genre.name.ilike(pattern, escape="\\"))
+    )
+
+
+def _has_fts(target):
+    bind = db.session.get_bind()
+    key = (str(bind.url), target.fts_table)
+    if key not in _fts_tables:
+        _fts_tables[key] = inspect(bind).has_table(target.fts_table)
+    return _fts_tables[key]
+
+
+def _base_query(model):
+    return db.session.query(
+        model.id,
+        model.name,
+        model.upcoming_shows_count,
+        func.count().over().label("total"),
+    )
+
+
+def _trigram_query(target, term):
+    model = target.model
+    pattern = _like_pattern(term)
+    document = search_document(model)
+    matches = union(
+        select(model.id).where(document.ilike(pattern, escape="\\")),
+        _genre_matches(target, pattern),
+    ).subquery()
+    return (
+        _base_query(model)
+        .join(matches, matches.c.id == model.id)
+        .order_by(func.similarity(document, term).desc(), model.id)
+    )
+
+
+def _fts_table(target):
+    return table(
+        target.fts_table,
+        column("rowid"),
+        column("name"),
+        column("city"),
+        column("state"),
+        column("genres"),
+        column("rank"),
+    )
+
+
+def _fts_query(target, term):
+    model = target.model
+    fts = _fts_table(target)
+    # the FTS5 table name stands for all of its columns in MATCH, and the
+    # hidden rank column holds the bm25() score of the match
+    document = literal_column(target.fts_table)
+    phrase = '"' + term.replace('"', '""') + '"'
+    return (
+        _base_query(model)
+        .join(fts, fts.c.rowid == model.id)
+        .filter(document.op("MATCH")(phrase))
+        .order_by(fts.c.rank, model.id)
+    )
+
+
+def _scan_query(target, term):
+    model = target.model
+    pattern = _like_pattern(term)
+    return (
+        _base_query(model)
+        .filter(
+            search_document(model).ilike(pattern, escape="\\")
+            | model.id.in_(_genre_matches(target, pattern))
+        )
+        .order_by(model.name, model.id)
+    )
+
+
+def _search_query(target, term):
+    if len(term) >= 3:
+        dialect = db.session.get_bind().dialect.name
+        if dialect == "postgresql":
+            return _trigram_query(target, term)
+        if dialect == "sqlite" and _has_fts(target):
+            return _fts_query(target, term)
+    return _scan_query(target, term)
+
+
+def search(target, term, page=1, per_page=SEARCH_PAGE_SIZE):
+    # returns the search_venues/search_artists results for one page
+    term = term.strip()
+    page = max(page, 1)
+    query = _search_query(target, term)
+    rows = query.limit(per_page).offset((page - 1) * per_page).all()
+
+    if rows:
+        total = rows[0].total
+    elif page > 1:
+        # past the last page, the window count is not available
+        total = query.order_by(None).count()
+    else:
+        total = 0
+
+    return {
+        "count": total,
+        "page": page,
+        "has_next": page * per_page < total,
+        "data": [
+            {
+                "id": row.id,
+                "name": row.name,
+                "num_upcoming_shows": row.upcoming_shows_count,
+            }
+            for row in rows
+        ],
+    }
+
+
+def rebuild_search_index():
+    # repopulate the SQLite FTS5 tables, e.g. after a bulk load
+    if db.session.get_bind().dialect.name != "sqlite":
+        return
+    for target in (VENUES, ARTISTS):
+        if not _has_fts(target):
+            continue
+        model = target.model
+        fts = _fts_table(target)
+        genres = (
+            select(func.group_concat(Genre.name, " "))
+            .join(target.association, target.association.c.genre_id == Genre.id)
+            .where(target.key == model.id)
+            .scalar_subquery()
+        )
+        db.session.execute(fts.delete())
+        db.session.execute(
+            fts.insert().from_select(
+                ["rowid", "name", "city", "state", "genres"],
+                select(model.id, model.name, model.city, model.state, genres),
+            )
+        )
@@ -0,0 +1,188 @@
+import sys
+from datetime import timedelta
+from flask import Blueprint, abort, flash, render_template, request
+from models import db, Show, SHOW_DEFAULT_DURATION
+from bookings import BookingConflict, book_show, book_shows, occurrences
+from counters import record_new_show, record_imported_shows
+from cache import page_cache
+from conditional import conditional, shows_version
+from pagination import page_size, datetime_arg, encode_cursor, decode_cursor
+from queries import show_page
+from views import render_listing
+
+
+# Show pages: the paginated listing and the form listing a show or a
+# recurring series of shows. The form class is imported by the views
+# building it, see venues.py.
+
+shows_bp = Blueprint("shows", __name__)
+
+
+@shows_bp.route("/shows")
+@conditional(shows_version)
+@page_cache.cached("shows")
+def shows():
+    # optional ?from=&to= window on start_time, and keyset pagination with
+    # ?after=<cursor>&limit=<n> ordered by (start_time, id)
+    start = datetime_arg("from")
+    end = datetime_arg("to")
+    after = decode_cursor(request.args.get("after"))
+    limit = page_size()
+
+    data, last = show_page(start, end, after, limit)
+    next_cursor = encode_cursor(*last) if last else None
+
+    # data = [
+    #     {
+    #         "venue_id": 1,
+    #         "venue_name": "The Musical Hop",
+    #         "artist_id": 4,
+    #         "artist_name": "Guns N Petals",
+    #         "artist_image_link": "https://images.unsplash.com/photo-1549213783-8284d0336c4f?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=300&q=80",
+    #         "start_time": "2019-05-21T21:30:00.000Z",
+    #     },
+    #     {
+    #         "venue_id": 3,
+    #         "venue_name": "Park Square Live Music & Coffee",
+    #         "artist_id": 5,
+    #         "artist_name": "Matt Quevedo",
+    #         "artist_image_link": "https://images.unsplash.com/photo-1495223153807-b916f75de8c5?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=334&q=80",
+    #         "start_time": "2019-06-15T23:00:00.000Z",
+    #     },
+    #     {
+    #         "venue_id": 3,
+    #         "venue_name": "Park Square Live Music & Coffee",
+    #         "artist_id": 6,
+    #         "artist_name": "The Wild Sax Band",
+    #         "artist_image_link": "https://images.unsplash.com/photo-1558369981-f9ca78462e61?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=794&q=80",
+    #         "start_time": "2035-04-01T20:00:00.000Z",
+    #     },
+    #     {
+    #         "venue_id": 3,
+    #         "venue_name": "Park Square Live Music & Coffee",
+    #         "artist_id": 6,
+    #         "artist_name": "The Wild Sax Band",
+    #         "artist_image_link": "https://images.unsplash.com/photo-1558369981-f9ca78462e61?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=794&q=80",
+    #         "start_time": "2035-04-08T20:00:00.000Z",
+    #     },
+    #     {
+    #         "venue_id": 3,
+    #         "venue_name": "Park Square Live Music & Coffee",
+    #         "artist_id": 6,
+    #         "artist_name": "The Wild Sax Band",
+    #         "artist_image_link": "https://images.unsplash.com/photo-1558369981-f9ca78462e61?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=794&q=80",
+    #         "start_time": "2035-04-15T20:00:00.000Z",
+    #     },
+    # ]
+    filters = {
+        key: request.args[key] for key in ("from", "to", "limit") if key in request.args
+    }
+    return render_listing(
+        "pages/shows.html", shows=data, next_cursor=next_cursor, filters=filters
+    )
+
+
+@shows_bp.route("/shows/create")
+def create_shows():
+
+    from forms import ShowForm
+
+    form = ShowForm()
+    return render_template("forms/new_show.html", form=form)
+
+
+def _recurrence_rule(form):
+    # RRULE of a repeated show, None for a single show
+    recurrence = form.recurrence.data
+    if not recurrence:
+        return None
+    if recurrence == "CUSTOM":
+        return (form.rrule.data or "").strip()
+    rule = f"FREQ={recurrence}"
+    if form.repeat_until.data:
+        return rule + form.repeat_until.data.strftime(";UNTIL=%Y%m%dT235959")
+    if form.repeat_count.data:
+        return rule + f";COUNT={form.repeat_count.data}"
+    return rule
+
+
+@shows_bp.route("/shows/create", methods=["POST"])
+def create_show_submission():
+    error = False
+    from forms import ShowForm
+
+    form = ShowForm()
+    if not form.validate():
+        for field_name, messages in form.errors.items():
+            for message in messages:
+                flash(f"Show could not be listed. {field_name}: {message}")
+        return render_template("forms/new_show.html", form=form), 400
+
+    artist_id = form.artist_id.data.strip()
+    venue_id = form.venue_id.data.strip()
+    start_time = form.start_time.data
+    duration = form.duration.data
+
+    error = False
+    conflict = None
+    invalid = None
+    listed = 1
+
+    try:
+        length = timedelta(minutes=duration) if duration else SHOW_DEFAULT_DURATION
+        rule = _recurrence_rule(form)
+        if rule is None:
+            show = Show(
+                artist_id=artist_id,
+                venue_id=venue_id,
+                start_time=start_time,
+                end_time=start_time + length,
+            )
+            record_new_show(show)
+            book_show(show)
+        else:
+            # every occurrence in one executemany, checked with one query
+            rows = [
+                {
+                    "venue_id": int(venue_id),
+                    "artist_id": int(artist_id),
+                    "start_time": occurrence,
+                    "end_time": occurrence + length,
+                }
+                for occurrence in occurrences(start_time, rule)
+            ]
+            record_imported_shows(rows)
+            book_shows(rows)
+            listed = len(rows)
+        db.session.commit()
+        # the listings render the upcoming show counters
+        page_cache.bump(
+            "shows", "venues", "artists", f"venue:{venue_id}", f"artist:{artist_id}"
+        )
+    except BookingConflict as e:
+        conflict = e
+        db.session.rollback()
+    except ValueError as e:
+        invalid = e
+        db.session.rollback()
+    except:
+        error = True
+        db.session.rollback()
+        print(sys.exc_info())
+    finally:
+        db.session.close()
+    if conflict:
+        flash(f"Show could not be listed. {conflict}")
+        return render_template("forms/new_show.html", form=form), 409
+    if invalid:
+        flash(f"Show could not be listed: {invalid}.")
+        return render_template("forms/new_show.html", form=form), 400
+    if error:
+        flash("An error occurred. Show could not be listed.")
+        abort(500)
+    if listed > 1:
+        flash(f"{listed} shows were successfully listed!")
+    else:
+        flash("Show was successfully listed!")
+
+    return render_template("pages/home.html")
@@ -0,0 +1,111 @@
+import os
+import re
+from pathlib import Path
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+
+from app import create_app
+from benchmarks.synthetic import populate
+from config import Config, engine_options
+from models import db
+
+
+# Every test builds its own app on SQLite files under tmp_path. The page
+# cache is off, so that each request runs its statements, and the query
+# budgets of instrumentation.py raise under app.testing.
+#
+# What only exists on PostgreSQL, e.g. the partitions of "Show", is tested on
+# the scratch database named by FYYUR_TEST_POSTGRES_URL, emptied and migrated
+# to head by each of those tests; they are skipped when it is not set.
+
+_queries = re.compile(r'desc="(\d+) queries"')
+
+MIGRATIONS = ScriptDirectory(str(Path(__file__).parent.parent / "migrations"))
+POSTGRES_URL = os.environ.get("FYYUR_TEST_POSTGRES_URL")
+
+
+def run_migration(revision):
+    # the upgrade() of one migration, for what db.create_all() doesn't
+    # create, e.g. the FTS5 tables and triggers of 5b8e0c4d7a21
+    with db.engine.begin() as connection:
+        with Operations.context(MigrationContext.configure(connection)):
+            MIGRATIONS.get_revision(revision).module.upgrade()
+
+
+def run_migrations():
+    # every migration, from the initial one to head
+    revisions = reversed(list(MIGRATIONS.walk_revisions()))
+    for revision in revisions:
+        run_migration(revision.revision)
+
+
+def build_app(url, **settings):
+    config = {
+        "TESTING": True,
+        "SECRET_KEY": "test",
+        "WTF_CSRF_ENABLED": False,
+        "SQLALCHEMY_DATABASE_URI": url,
+        "SQLALCHEMY_ENGINE_OPTIONS": engine_options(url),
+        "SQLALCHEMY_BINDS": {},
+        "CACHE_BACKEND": None,
+        "HOME_REFRESH_AFTER_WRITES": False,
+        **settings,
+    }
+    return create_app(type("TestConfig", (Config,), config))
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    def make_app(name="fyyur", migrations=(), **settings):
+        app = build_app(f"sqlite:///{tmp_path / name}.db", **settings)
+        with app.app_context():
+            # the models are all on the primary; an earlier app with a
+            # replica registered its bind key on db
+            db.create_all(bind_key=None)
+            for revision in migrations:
+                run_migration(revision)
+        return app
+
+    return make_app
+
+
+@pytest.fixture
+def make_catalog(make_app):
+    # an app over a synthetic catalog, see benchmarks/synthetic.py
+    def make_catalog(venues=10, artists=10, shows=100, migrations=(), **settings):
+        app = make_app(f"catalog-{venues}-{artists}-{shows}", migrations, **settings)
+        with app.app_context():
+            populate(venues=venues, artists=artists, shows=shows)
+        return app
+
+    return make_catalog
+
+
+@pytest.fixture
+def postgres_app():
+    if not POSTGRES_URL:
+        pytest.skip("FYYUR_TEST_POSTGRES_URL is not set")
+    app = build_app(POSTGRES_URL)
+    with app.app_context():
+        db.session.execute(text("DROP SCHEMA public CASCADE"))
+        db.session.execute(text("CREATE SCHEMA public"))
+        db.session.commit()
+        run_migrations()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def statement_count(response):
+    # the statements of the request, from its Server-Timing header
+    return int(_queries.search(response.headers["Server-Timing"]).group(1))
+
+
+@pytest.fixture
+def count_statements():
+    return statement_count
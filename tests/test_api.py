@@ -0,0 +1,101 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from models import db, Show
+
+
+def _get(client, path, **query):
+    response = client.get(path, query_string=query)
+    return response.status_code, json.loads(response.get_data())
+
+
+def _walk(client, path, **query):
+    # every item of a list, following next_cursor; returns (items, pages)
+    items, pages, after = [], 0, None
+    while True:
+        if after:
+            query["after"] = after
+        status, body = _get(client, path, **query)
+        assert status == 200
+        items += body["data"]
+        pages += 1
+        after = body["next_cursor"]
+        if after is None:
+            return items, pages
+
+
+@pytest.mark.parametrize("kind", ["venues", "artists"])
+def test_lists_are_paged_by_id(make_catalog, kind):
+    client = make_catalog().test_client()
+    items, pages = _walk(client, f"/api/v1/{kind}", limit=3)
+    assert [item["id"] for item in items] == list(range(1, 11))
+    assert pages == 4
+
+
+def test_shows_are_paged_by_start_time(make_catalog):
+    app = make_catalog()
+    client = app.test_client()
+    items, pages = _walk(client, "/api/v1/shows", limit=30)
+    assert pages == 4
+    with app.app_context():
+        shows = db.session.query(Show).order_by(Show.start_time, Show.id).all()
+        assert [(item["venue_id"], item["artist_id"]) for item in items] == [
+            (show.venue_id, show.artist_id) for show in shows
+        ]
+        assert items[0]["start_time"] == shows[0].start_time.isoformat()
+
+        now = datetime.now()
+        upcoming, _ = _walk(client, "/api/v1/shows", limit=30, **{"from": now.isoformat()})
+        assert len(upcoming) == db.session.query(Show).filter(Show.start_time >= now).count()
+    assert all(item["start_time"] >= now.isoformat() for item in upcoming)
+
+
+def test_fields_select_the_keys(make_catalog):
+    client = make_catalog().test_client()
+    _, body = _get(client, "/api/v1/venues", fields="id, name,unknown")
+    assert body["data"][0] == {"id": 1, "name": "Venue 1"}
+
+    _, venue = _get(client, "/api/v1/venues/2", fields="name,upcoming_shows_count")
+    assert venue == {"name": "Venue 2", "upcoming_shows_count": venue["upcoming_shows_count"]}
+
+    status, artist = _get(client, "/api/v1/artists/2")
+    assert status == 200
+    assert {"id", "name", "genres", "past_shows", "upcoming_shows"} <= set(artist)
+
+
+def test_a_show(make_catalog):
+    app = make_catalog()
+    status, show = _get(app.test_client(), "/api/v1/shows/5")
+    assert status == 200
+    with app.app_context():
+        expected = db.session.get(Show, 5)
+        assert (show["venue_id"], show["artist_id"], show["start_time"]) == (
+            expected.venue_id,
+            expected.artist_id,
+            expected.start_time.isoformat(),
+        )
+
+
+@pytest.mark.parametrize(
+    "path, query, status, error",
+    [
+        ("/api/v1/venues/1000", {}, 404, "Not Found"),
+        ("/api/v1/shows/1000", {}, 404, "Not Found"),
+        ("/api/v1/artists", {"after": "x"}, 400, "Bad Request"),
+        ("/api/v1/shows", {"after": "2030-01-01T20:00:00"}, 400, "Bad Request"),
+        ("/api/v1/shows", {"from": "tomorrow"}, 400, "Bad Request"),
+    ],
+)
+def test_errors_are_json(make_catalog, path, query, status, error):
+    client = make_catalog().test_client()
+    assert _get(client, path, **query) == (status, {"error": error})
+
+
+def test_conditional_get(make_catalog):
+    client = make_catalog().test_client()
+    response = client.get("/api/v1/artists/3")
+    assert response.headers["ETag"]
+    again = client.get("/api/v1/artists/3", headers={"If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
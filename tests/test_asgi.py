@@ -0,0 +1,150 @@
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event
+
+pytest.importorskip("asgiref")
+pytest.importorskip("aiosqlite")
+
+from asgi import create_asgi_app  # noqa: E402
+from cache import page_cache  # noqa: E402
+from models import db  # noqa: E402
+
+
+def _request(application, method, path, query_string=b"", headers=(), body=b""):
+    # one HTTP request through the ASGI app; returns (status, headers, body),
+    # with the header names in lower case
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "root_path": "",
+        "query_string": query_string,
+        "headers": [(b"host", b"testserver"), (b"content-length", str(len(body)).encode())]
+        + [(key.lower().encode(), value.encode()) for key, value in headers],
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 5000),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    start = sent[0]
+    headers = {key.decode(): value.decode() for key, value in start["headers"]}
+    body = b"".join(message.get("body", b"") for message in sent[1:])
+    return start["status"], headers, body
+
+
+@pytest.fixture
+def serve(make_catalog):
+    # the catalog app, its ASGI app and the statements of both engines
+    def serve(**settings):
+        app = make_catalog(**settings)
+        application = create_asgi_app(app)
+        statements = {"async": [], "sync": []}
+        event.listen(
+            application.engines[None].sync_engine,
+            "before_cursor_execute",
+            lambda *args: statements["async"].append(args[2]),
+        )
+        with app.app_context():
+            event.listen(
+                db.engine,
+                "before_cursor_execute",
+                lambda *args: statements["sync"].append(args[2]),
+            )
+        return app, application, statements
+
+    return serve
+
+
+@pytest.mark.parametrize(
+    "path, query_string",
+    [
+        ("/venues", b""),
+        ("/venues/1", b""),
+        ("/artists", b""),
+        ("/artists/2", b""),
+        ("/shows", b"limit=5"),
+    ],
+)
+def test_read_pages_match_the_wsgi_app(serve, path, query_string):
+    app, application, statements = serve()
+    status, _, body = _request(application, "GET", path, query_string)
+    assert statements["async"] and not statements["sync"]
+
+    expected = app.test_client().get(f"{path}?{query_string.decode()}")
+    assert (status, body) == (expected.status_code, expected.get_data())
+
+
+def test_search_reads_the_form(serve):
+    _, application, statements = serve()
+    status, _, body = _request(
+        application,
+        "POST",
+        "/venues/search",
+        headers=[("Content-Type", "application/x-www-form-urlencoded")],
+        body=b"search_term=Venue+3",
+    )
+    assert status == 200
+    assert b"Venue 3" in body and b"Venue 4" not in body
+    assert not statements["sync"]
+
+
+def test_pages_are_cached_and_conditional(serve):
+    _, application, statements = serve(CACHE_BACKEND="lru")
+    hits = page_cache.hits
+    _, headers, body = _request(application, "GET", "/venues/1")
+    assert "etag" in headers
+
+    del statements["async"][:]
+    status, _, cached = _request(application, "GET", "/venues/1")
+    assert (status, cached) == (200, body)
+    assert page_cache.hits == hits + 1
+    # the version lookups only, no page query
+    assert len(statements["async"]) < 5
+
+    status, _, empty = _request(
+        application, "GET", "/venues/1", headers=[("If-None-Match", headers["etag"])]
+    )
+    assert (status, empty) == (304, b"")
+
+
+def test_missing_pages_and_head(serve):
+    _, application, _ = serve()
+    status, _, _ = _request(application, "GET", "/venues/100000")
+    assert status == 404
+    status, headers, body = _request(application, "HEAD", "/artists")
+    assert (status, body) == (200, b"")
+    assert int(headers["content-length"]) > 0
+
+
+def test_writes_go_to_the_wsgi_app(serve):
+    _, application, statements = serve()
+    status, headers, _ = _request(
+        application,
+        "POST",
+        "/artists/create",
+        headers=[("Content-Type", "application/x-www-form-urlencoded")],
+        body=b"name=New+Artist&city=Austin&state=TX&phone=&genres=Jazz"
+        b"&facebook_link=&image_link=&website_link=&seeking_description=",
+    )
+    assert status == 302
+    assert statements["sync"] and not statements["async"]
+
+
+def test_importing_builds_nothing():
+    code = "import sys, asgi; assert asgi._application is None and 'app' not in sys.modules"
+    root = Path(__file__).parent.parent
+    subprocess.run([sys.executable, "-c", code], cwd=root, check=True)
@@ -0,0 +1,33 @@
+from sqlalchemy import text
+
+from cache import page_cache
+from models import db
+
+
+def test_lru_backend_sees_bumps_of_other_processes(make_catalog):
+    app = make_catalog(CACHE_BACKEND="lru")
+    client = app.test_client()
+    page = client.get("/venues").get_data()
+
+    with app.app_context():
+        # a write without a bump is not seen until the entry expires
+        db.session.execute(text("UPDATE \"Venue\" SET name = 'Renamed' WHERE id = 1"))
+        db.session.commit()
+        assert client.get("/venues").get_data() == page
+
+        # a bump by another worker or a `flask` command is a row of the
+        # CacheVersion table
+        with db.engine.begin() as connection:
+            connection.execute(
+                text("INSERT INTO \"CacheVersion\" (key, version) VALUES ('venues', 1)")
+            )
+
+    assert b"Renamed" in client.get("/venues").get_data()
+
+
+def test_bump_increments_the_shared_versions(make_app):
+    app = make_app(CACHE_BACKEND="lru")
+    with app.app_context():
+        page_cache.bump("venues", "venue:1")
+        page_cache.bump("venues")
+        assert page_cache.versions(["venues", "venue:1", "venue:2"]) == [2, 1, 0]
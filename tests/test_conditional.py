@@ -0,0 +1,10 @@
+def test_listing_etag_changes_when_a_record_is_deleted(make_catalog):
+    client = make_catalog().test_client()
+    etag = client.get("/venues").headers["ETag"]
+    assert client.get("/venues", headers={"If-None-Match": etag}).status_code == 304
+
+    # venue 1 isn't the latest updated, the deletion leaves max(updated_at)
+    client.delete("/venues/1")
+    response = client.get("/venues", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
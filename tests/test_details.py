@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from instrumentation import DEFAULT_QUERY_BUDGETS
+from models import db, Genre, Venue, Artist, Show, SHOW_DEFAULT_DURATION
+
+
+@pytest.fixture
+def catalog(make_app):
+    # one venue and one artist with three genres each and shows on both
+    # sides of now, each show with another artist or venue
+    app = make_app()
+    with app.app_context():
+        genres = [Genre(name=name) for name in ("Jazz", "Blues", "Funk")]
+        venue = Venue(name="The Venue", city="Austin", state="TX", genres=genres)
+        artist = Artist(name="The Artist", city="Austin", state="TX", genres=genres)
+        now = datetime.now()
+        for days in (-30, -20, -10, 10, 20, 30):
+            start_time = now + timedelta(days=days)
+            for show in (
+                Show(venue=venue, artist=Artist(name=f"Guest {days}"), start_time=start_time),
+                Show(venue=Venue(name=f"Club {days}"), artist=artist, start_time=start_time),
+            ):
+                show.end_time = start_time + SHOW_DEFAULT_DURATION
+                db.session.add(show)
+        db.session.commit()
+        return app, venue.id, artist.id
+
+
+@pytest.mark.parametrize(
+    "path, endpoint",
+    [
+        ("/venues/{venue_id}", "venues.show_venue"),
+        ("/artists/{artist_id}", "artists.show_artist"),
+        ("/api/v1/venues/{venue_id}", "api.venue"),
+        ("/api/v1/artists/{artist_id}", "api.artist"),
+    ],
+)
+def test_detail_pages_stay_within_their_query_budget(catalog, count_statements, path, endpoint):
+    app, venue_id, artist_id = catalog
+    # over budget the request raises QueryBudgetExceeded under app.testing
+    response = app.test_client().get(path.format(venue_id=venue_id, artist_id=artist_id))
+    assert response.status_code == 200
+    assert count_statements(response) <= DEFAULT_QUERY_BUDGETS[endpoint]
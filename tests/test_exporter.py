@@ -0,0 +1,96 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from exporter import export_fields
+from models import db, Show, Venue
+
+
+def _ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def _csv(response):
+    return list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+
+
+@pytest.fixture
+def catalog(make_catalog):
+    # a catalog whose venues 1-4 and shows 1-40 changed an hour ago, and the
+    # others a week ago
+    app = make_catalog()
+    with app.app_context():
+        now = datetime.utcnow()
+        for model, recent in ((Venue, 4), (Show, 40)):
+            db.session.execute(update(model).values(updated_at=now - timedelta(days=7)))
+            db.session.execute(
+                update(model)
+                .where(model.id <= recent)
+                .values(updated_at=now - timedelta(hours=1))
+            )
+        db.session.commit()
+    return app
+
+
+def test_export_venues_as_ndjson(catalog):
+    response = catalog.test_client().get("/export/venues.ndjson")
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    rows = _ndjson(response)
+    assert [row["id"] for row in rows] == list(range(1, 11))
+    assert set(rows[0]) == set(export_fields("venues"))
+    with catalog.app_context():
+        venue = db.session.get(Venue, 3)
+        assert rows[2]["name"] == venue.name
+        assert sorted(rows[2]["genres"]) == sorted(genre.name for genre in venue.genres)
+
+
+def test_export_shows_as_csv(catalog):
+    response = catalog.test_client().get("/export/shows.csv")
+    assert response.mimetype == "text/csv"
+    assert response.headers["Content-Disposition"] == "attachment; filename=shows.csv"
+    rows = _csv(response)
+    assert len(rows) == 100
+    with catalog.app_context():
+        show = db.session.get(Show, 7)
+        assert rows[6] == {
+            "id": "7",
+            "venue_id": str(show.venue_id),
+            "artist_id": str(show.artist_id),
+            "start_time": show.start_time.isoformat(),
+            "end_time": show.end_time.isoformat(),
+            "updated_at": show.updated_at.isoformat(),
+        }
+
+
+@pytest.mark.parametrize(
+    "path, parse",
+    [("/export/venues.ndjson", _ndjson), ("/export/shows.csv", _csv)],
+)
+def test_updated_since_selects_the_recent_rows(catalog, path, parse):
+    client = catalog.test_client()
+    since = (datetime.utcnow() - timedelta(days=1)).isoformat()
+    rows = parse(client.get(f"{path}?updated_since={since}"))
+    assert [int(row["id"]) for row in rows] == list(range(1, 5 if "venues" in path else 41))
+
+    # an offset is converted to the UTC of updated_at
+    since = (datetime.utcnow() - timedelta(hours=2)).replace(microsecond=0)
+    shifted = (since + timedelta(hours=5)).isoformat() + "+05:00"
+    assert parse(client.get(path, query_string={"updated_since": shifted})) == rows
+
+
+def test_nothing_changed(catalog):
+    client = catalog.test_client()
+    since = datetime.utcnow().isoformat()
+    assert _ndjson(client.get(f"/export/venues.ndjson?updated_since={since}")) == []
+    response = client.get(f"/export/shows.csv?updated_since={since}")
+    assert response.get_data(as_text=True).splitlines() == [",".join(export_fields("shows"))]
+
+
+def test_malformed_updated_since_is_refused(catalog):
+    response = catalog.test_client().get("/export/shows.csv?updated_since=yesterday")
+    assert response.status_code == 400
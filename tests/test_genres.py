@@ -0,0 +1,94 @@
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.exc import IntegrityError
+
+from genres import genre_ids, invalidate_genre_cache
+from models import db, Genre, Venue
+
+
+def _genres():
+    return dict(db.session.query(Genre.name, Genre.id).all())
+
+
+def test_missing_genres_are_upserted(make_app):
+    app = make_app()
+    with app.app_context():
+        first = genre_ids(["Jazz", "Rock", "Jazz"])
+        assert first == _genres() == {"Jazz": first["Jazz"], "Rock": first["Rock"]}
+
+        second = genre_ids(["Rock", "Blues"])
+        assert second["Rock"] == first["Rock"]
+        assert set(_genres()) == {"Jazz", "Rock", "Blues"}
+        assert second["Blues"] == _genres()["Blues"]
+
+
+def test_known_genres_come_from_the_cache(make_app):
+    app = make_app()
+    with app.app_context():
+        genre_ids(["Jazz", "Rock"])
+        statements = []
+        event.listen(db.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        assert set(genre_ids(["Rock", "Jazz"])) == {"Rock", "Jazz"}
+        assert statements == []
+
+
+def test_genres_created_by_another_process_are_found(make_app):
+    app = make_app()
+    with app.app_context():
+        genre_ids(["Jazz"])
+        db.session.execute(text("INSERT INTO \"Genre\" (name) VALUES ('Folk')"))
+        db.session.commit()
+        assert genre_ids(["Folk"]) == {"Folk": _genres()["Folk"]}
+        assert Genre.query.count() == 2
+
+
+def test_each_database_has_its_own_cache(make_app):
+    one = make_app("one")
+    other = make_app("other")
+    with one.app_context():
+        genre_ids(["Jazz"])
+    with other.app_context():
+        genre_ids(["Rock"])
+        jazz = genre_ids(["Jazz"])["Jazz"]
+        assert _genres() == {"Rock": 1, "Jazz": jazz} and jazz != 1
+
+    client = other.test_client()
+    response = client.post(
+        "/venues/create",
+        data={
+            "name": "Hall",
+            "city": "Austin",
+            "state": "TX",
+            "address": "1 Main St",
+            "phone": "",
+            "image_link": "",
+            "facebook_link": "",
+            "website_link": "",
+            "seeking_description": "",
+            "genres": ["Jazz"],
+        },
+    )
+    assert response.status_code == 302
+    with other.app_context():
+        venue = Venue.query.filter_by(name="Hall").one()
+        assert [genre.name for genre in venue.genres] == ["Jazz"]
+        assert db.session.execute(text("SELECT genre_id FROM venue_genre")).scalars().all() == [jazz]
+
+
+def test_an_integrity_error_reloads_the_cache(make_app):
+    app = make_app()
+    with app.app_context():
+        genre_ids(["Jazz"])
+        # the database is recreated behind the cache
+        db.session.execute(text("DELETE FROM \"Genre\""))
+        db.session.execute(text("INSERT INTO \"Genre\" (id, name) VALUES (7, 'Rock')"))
+        db.session.commit()
+        with pytest.raises(IntegrityError):
+            db.session.execute(text("INSERT INTO \"Genre\" (id, name) VALUES (8, 'Rock')"))
+        db.session.rollback()
+        assert genre_ids(["Jazz", "Rock"]) == _genres()
+        assert genre_ids(["Rock"]) == {"Rock": 7}
+
+
+def teardown_module():
+    invalidate_genre_cache()
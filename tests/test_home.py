@@ -0,0 +1,29 @@
+import time
+from datetime import datetime, timedelta
+
+from models import db, city_upcoming_shows
+
+
+def rollup_rows(app):
+    with app.app_context():
+        return db.session.query(city_upcoming_shows).count()
+
+
+def test_writes_refresh_the_rollup_after_the_request(make_catalog):
+    app = make_catalog(HOME_REFRESH_AFTER_WRITES=True, HOME_REFRESH_INTERVAL=0.5)
+    assert rollup_rows(app) == 0
+
+    start_time = (datetime.now() + timedelta(days=400)).replace(microsecond=0)
+    response = app.test_client().post(
+        "/shows/create",
+        data={"venue_id": "1", "artist_id": "2", "start_time": str(start_time)},
+    )
+    assert response.status_code == 200
+    # the request only marked the rollup stale
+    assert rollup_rows(app) == 0
+
+    deadline = time.monotonic() + 10
+    while not rollup_rows(app) and time.monotonic() < deadline:
+        time.sleep(0.1)
+    assert rollup_rows(app) > 0
+    assert b"Venue 1" in app.test_client().get("/").get_data()
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from models import db, Show, Venue, Artist
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app()
+    with app.app_context():
+        db.session.add_all([Venue(id=1, name="Club"), Venue(id=2, name="Bar")])
+        db.session.add_all([Artist(id=1, name="Band"), Artist(id=2, name="Duo")])
+        db.session.commit()
+    return app
+
+
+def import_shows(app, tmp_path, records):
+    path = tmp_path / "shows.ndjson"
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+    return app.test_cli_runner().invoke(args=["import", "shows", str(path)])
+
+
+def show_count(app):
+    with app.app_context():
+        return db.session.query(Show).count()
+
+
+def test_import_shows(app, tmp_path):
+    result = import_shows(
+        app,
+        tmp_path,
+        [
+            {"venue_id": 1, "artist_id": 1, "start_time": "2030-01-01T20:00"},
+            {"venue_id": 1, "artist_id": 2, "start_time": "2030-01-01T22:00"},
+            {"venue_id": 2, "artist_id": 1, "start_time": "2030-01-02T20:00"},
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    assert show_count(app) == 3
+
+
+@pytest.mark.parametrize(
+    "records, error",
+    [
+        (
+            # another artist at the same venue and time
+            [
+                {"venue_id": 1, "artist_id": 1, "start_time": "2030-01-01T20:00"},
+                {"venue_id": 1, "artist_id": 2, "start_time": "2030-01-01T21:00"},
+            ],
+            "already booked",
+        ),
+        (
+            # the same artist twice
+            [
+                {"venue_id": 1, "artist_id": 1, "start_time": "2030-01-01T20:00"},
+                {"venue_id": 1, "artist_id": 1, "start_time": "2030-01-01T21:00"},
+            ],
+            "overlap each other",
+        ),
+        (
+            [
+                {
+                    "venue_id": 1,
+                    "artist_id": 1,
+                    "start_time": "2030-01-01T20:00",
+                    "end_time": "2030-01-03T20:00",
+                }
+            ],
+            "lasts at most",
+        ),
+    ],
+)
+def test_import_rejects_invalid_shows(app, tmp_path, records, error):
+    result = import_shows(app, tmp_path, records)
+    assert result.exit_code != 0
+    assert error in result.output
+    assert show_count(app) == 0
+
+
+def test_import_rejects_shows_overlapping_stored_ones(app, tmp_path):
+    record = {"venue_id": 2, "artist_id": 2, "start_time": "2030-01-01T20:00"}
+    assert import_shows(app, tmp_path, [record]).exit_code == 0
+    result = import_shows(app, tmp_path, [dict(record, venue_id=1)])
+    assert result.exit_code != 0
+    assert "The artist is already booked" in result.output
+    assert show_count(app) == 1
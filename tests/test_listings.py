@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.mark.parametrize("path", ["/venues", "/artists", "/shows"])
+def test_listing_statements_do_not_grow_with_the_catalog(make_catalog, count_statements, path):
+    counts = []
+    for size in (20, 200):
+        client = make_catalog(venues=size, artists=size, shows=size * 5).test_client()
+        response = client.get(path)
+        assert response.status_code == 200
+        counts.append(count_statements(response))
+    assert counts[0] == counts[1]
@@ -0,0 +1,86 @@
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+from prometheus_client.parser import text_string_to_metric_families  # noqa: E402
+
+from metrics import TimedQueuePool, _timed_engine_options  # noqa: E402
+
+
+def _sample(client, name, **labels):
+    # the value of one sample of /metrics, 0 when it is not there yet
+    families = text_string_to_metric_families(client.get("/metrics").get_data(as_text=True))
+    for family in families:
+        for sample in family.samples:
+            if sample.name == name and sample.labels == labels:
+                return sample.value
+    return 0
+
+
+def test_requests_are_measured(make_catalog):
+    client = make_catalog().test_client()
+    samples = {
+        "requests": (
+            "fyyur_request_duration_seconds_count",
+            {"endpoint": "venues.venues", "method": "GET", "status": "200"},
+        ),
+        "not_found": (
+            "fyyur_request_duration_seconds_count",
+            {"endpoint": "venues.show_venue", "method": "GET", "status": "404"},
+        ),
+        "sql": ("fyyur_request_db_seconds_count", {"endpoint": "venues.venues"}),
+        "renders": ("fyyur_template_render_seconds_count", {"template": "pages/venues.html"}),
+        # /metrics leaves itself out
+        "metrics": (
+            "fyyur_request_duration_seconds_count",
+            {"endpoint": "metrics", "method": "GET", "status": "200"},
+        ),
+    }
+    before = {key: _sample(client, name, **labels) for key, (name, labels) in samples.items()}
+
+    assert client.get("/venues").status_code == 200
+    assert client.get("/venues/100000").status_code == 404
+
+    after = {key: _sample(client, name, **labels) for key, (name, labels) in samples.items()}
+    assert {key: after[key] - before[key] for key in samples} == {
+        "requests": 1,
+        "not_found": 1,
+        "sql": 1,
+        "renders": 1,
+        "metrics": 0,
+    }
+
+
+def test_page_cache_results_are_counted(make_catalog):
+    client = make_catalog(CACHE_BACKEND="lru").test_client()
+
+    def lookups():
+        return {
+            result: _sample(
+                client,
+                "fyyur_page_cache_requests_total",
+                endpoint="artists.artists",
+                result=result,
+            )
+            for result in ("hit", "miss")
+        }
+
+    before = lookups()
+    for _ in range(3):
+        client.get("/artists")
+    after = lookups()
+    assert after == {"hit": before["hit"] + 2, "miss": before["miss"] + 1}
+
+
+def test_metrics_can_be_disabled(make_app):
+    client = make_app(METRICS_ENABLED=False).test_client()
+    assert client.get("/metrics").status_code == 404
+
+
+def test_pool_waits_are_timed_on_server_databases():
+    options = {"pool_pre_ping": True}
+    assert _timed_engine_options(options, "sqlite:///fyyur.db") == options
+    assert _timed_engine_options(options, "postgresql://localhost/fyyur") == {
+        "pool_pre_ping": True,
+        "poolclass": TimedQueuePool,
+    }
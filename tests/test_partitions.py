@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func, text
+
+from benchmarks.synthetic import populate
+from bookings import BookingConflict, VENUE_LOCK, book_show
+from counters import record_new_show, roll_past_shows
+from home import refresh_home_rollup
+from models import db, Artist, Show, ShowArchive, Venue, city_upcoming_shows
+from partitions import add_months, archive_shows, create_partitions, month_start, partitions
+
+
+def _counted_shows():
+    upcoming, past = db.session.query(
+        func.sum(Venue.upcoming_shows_count), func.sum(Venue.past_shows_count)
+    ).one()
+    return upcoming + past
+
+
+def _add_show(venue_id, artist_id, start_time, hours=2):
+    show = Show(
+        venue_id=venue_id,
+        artist_id=artist_id,
+        start_time=start_time,
+        end_time=start_time + timedelta(hours=hours),
+    )
+    record_new_show(show)
+    book_show(show)
+    db.session.commit()
+    return show
+
+
+def test_archive_moves_the_months_before_the_cutoff(make_catalog):
+    app = make_catalog()
+    with app.app_context():
+        cutoff = month_start(datetime.now())
+        old = db.session.query(Show).filter(Show.start_time < cutoff).count()
+        assert old
+
+        archived, stale_pages = archive_shows(datetime.now())
+        db.session.commit()
+
+        assert archived == old == db.session.query(ShowArchive).count()
+        assert db.session.query(Show).filter(Show.start_time < cutoff).count() == 0
+        assert _counted_shows() == db.session.query(Show).count() == 100 - old
+        assert {"shows", "venues", "artists"} <= set(stale_pages)
+
+
+def test_no_partitions_on_sqlite(make_app):
+    with make_app().app_context():
+        assert create_partitions() == []
+
+
+def test_roll_looks_back_a_day(make_catalog):
+    app = make_catalog(venues=2, artists=2, shows=0)
+    with app.app_context():
+        now = datetime.now()
+        for hours in (3 * 24, 10 * 24 + 12):
+            _add_show(1, 2, now + timedelta(hours=hours))
+        assert roll_past_shows(now + timedelta(days=11)) == 1
+        # the earlier one is left to `flask shows rebuild-counters`
+        assert db.session.get(Venue, 1).upcoming_shows_count == 1
+        assert roll_past_shows(now + timedelta(days=11), lookback=timedelta(days=9)) == 1
+        assert db.session.get(Venue, 1).upcoming_shows_count == 0
+
+
+def test_rollup_leaves_out_started_shows(make_catalog):
+    app = make_catalog(venues=2, artists=2, shows=0)
+    with app.app_context():
+        now = datetime.now()
+        started = _add_show(1, 2, now + timedelta(days=1))
+        upcoming = _add_show(1, 2, now + timedelta(days=2))
+        # started, but not rolled yet
+        started.start_time = now - timedelta(hours=1)
+        started.end_time = now + timedelta(hours=1)
+        db.session.commit()
+
+        refresh_home_rollup()
+        db.session.commit()
+        rows = db.session.query(city_upcoming_shows.c.show_id).all()
+        assert rows == [(upcoming.id,)]
+
+
+@pytest.fixture
+def postgres_catalog(postgres_app):
+    with postgres_app.app_context():
+        populate(venues=3, artists=3, shows=0)
+        yield postgres_app
+
+
+def test_create_partitions_moves_shows_out_of_the_default(postgres_catalog):
+    current = month_start(datetime.now())
+    existing = partitions()
+    last = max(existing)
+    assert last == add_months(current, 12)
+
+    start_time = add_months(last, 2) + timedelta(days=3, hours=20)
+    show = _add_show(1, 1, start_time)
+    table = text('SELECT tableoid::regclass::text FROM "Show" WHERE id = :id')
+    assert db.session.execute(table, {"id": show.id}).scalar() == '"Show_default"'
+
+    created = create_partitions(ahead=14)
+    db.session.commit()
+    assert created == [f"Show_{add_months(last, 1):%Y_%m}", f"Show_{add_months(last, 2):%Y_%m}"]
+    assert db.session.execute(table, {"id": show.id}).scalar() == f'"Show_{start_time:%Y_%m}"'
+    assert create_partitions(ahead=14) == []
+
+
+def test_archive_detaches_whole_months(postgres_catalog):
+    current = month_start(datetime.now())
+    cutoff = add_months(current, 1)
+    # before the first partition, in Show_default
+    in_default = _add_show(1, 1, add_months(current, -2) + timedelta(days=5, hours=20)).id
+    in_partition = _add_show(2, 2, current + timedelta(hours=1)).id
+    _add_show(3, 3, cutoff + timedelta(days=2))
+
+    archived, _ = archive_shows(cutoff)
+    db.session.commit()
+
+    assert archived == 2
+    assert {show.id for show in db.session.query(ShowArchive)} == {in_default, in_partition}
+    assert db.session.query(Show).count() == 1
+    assert _counted_shows() == 1
+    assert current not in partitions()
+    assert current in partitions("ShowArchive")
+
+
+def test_overlap_across_a_month_boundary_is_refused(postgres_catalog):
+    next_month = add_months(month_start(datetime.now()), 1)
+    _add_show(1, 1, next_month - timedelta(hours=1), hours=3)
+    with pytest.raises(BookingConflict):
+        _add_show(1, 2, next_month + timedelta(hours=1))
+    db.session.rollback()
+    assert db.session.query(Show).count() == 1
+
+
+def test_bookings_lock_their_venue(postgres_catalog):
+    show = Show(
+        venue_id=1,
+        artist_id=1,
+        start_time=datetime.now() + timedelta(days=1),
+        end_time=datetime.now() + timedelta(days=1, hours=2),
+    )
+    book_show(show)
+    other = create_engine(postgres_catalog.config["SQLALCHEMY_DATABASE_URI"])
+    try:
+        with other.connect() as connection:
+            locked = text("SELECT pg_try_advisory_xact_lock(:kind, :id)")
+            assert not connection.execute(locked, {"kind": VENUE_LOCK, "id": 1}).scalar()
+            assert connection.execute(locked, {"kind": VENUE_LOCK, "id": 2}).scalar()
+    finally:
+        other.dispose()
+    db.session.rollback()
+    assert db.session.query(Artist).count() == 3
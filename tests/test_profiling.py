@@ -0,0 +1,115 @@
+import json
+import multiprocessing
+import os
+
+import pytest
+
+import profiling
+from profiling import PROFILE_HEADER, _record, profile_token
+
+
+@pytest.fixture
+def profiled(make_app, tmp_path):
+    def profiled(**settings):
+        return make_app(PROFILE_DIR=str(tmp_path / "profiles"), **settings)
+
+    return profiled
+
+
+def _profiles(app):
+    path = app.config["PROFILE_DIR"]
+    if not os.path.isdir(path):
+        return []
+    return sorted(name for name in os.listdir(path) if name.endswith(".prof"))
+
+
+def _index(app):
+    with open(os.path.join(app.config["PROFILE_DIR"], "index.json")) as index_file:
+        return json.load(index_file)
+
+
+def test_a_signed_token_profiles_the_request(profiled):
+    app = profiled()
+    client = app.test_client()
+    client.get("/venues")
+    assert _profiles(app) == []
+
+    client.get("/venues", headers={PROFILE_HEADER: profile_token(app)})
+    assert len(_profiles(app)) == 1
+    (entry,) = _index(app)["venues.venues"]
+    assert (entry["url"], entry["status"], entry["file"]) == ("/venues", 200, _profiles(app)[0])
+
+
+@pytest.mark.parametrize(
+    "token, settings",
+    [
+        ("forged", {}),
+        (None, {"PROFILE_TOKEN_TTL": -1}),
+        (None, {"SECRET_KEY": None}),
+    ],
+)
+def test_invalid_tokens_are_ignored(profiled, token, settings):
+    app = profiled(**settings)
+    if token is None:
+        # signed with the key of another app when the app has none
+        token = profile_token(app) if app.secret_key else profile_token(profiled())
+    app.test_client().get("/venues", headers={PROFILE_HEADER: token})
+    assert _profiles(app) == []
+
+
+def test_a_sample_of_the_requests_is_profiled(profiled, monkeypatch):
+    app = profiled(PROFILE_SAMPLE_RATE=0.5)
+    client = app.test_client()
+    monkeypatch.setattr(profiling.random, "random", lambda: 0.7)
+    client.get("/venues")
+    assert _profiles(app) == []
+    monkeypatch.setattr(profiling.random, "random", lambda: 0.3)
+    client.get("/venues")
+    assert len(_profiles(app)) == 1
+
+
+def test_rotation_keeps_the_recent_and_the_slowest(profiled):
+    app = profiled(PROFILE_SAMPLE_RATE=1.0, PROFILE_MAX_FILES=2, PROFILE_SLOWEST=1)
+    client = app.test_client()
+    for _ in range(5):
+        client.get("/venues")
+        client.get("/artists")
+    indexed = {entry["file"] for entries in _index(app).values() for entry in entries}
+    assert len(indexed) == 2
+    assert indexed <= set(_profiles(app))
+    assert len(_profiles(app)) <= 2 + len(indexed)
+
+
+def _record_entries(app, path, worker):
+    for number in range(20):
+        name = f"{worker}-{number}.prof"
+        dumped = os.path.join(path, name + ".tmp")
+        open(dumped, "w").close()
+        _record(
+            app,
+            path,
+            {"endpoint": f"worker{worker}", "duration_ms": number, "file": name},
+            dumped,
+        )
+
+
+@pytest.mark.skipif(profiling.fcntl is None, reason="needs fcntl")
+def test_worker_processes_keep_each_others_entries(profiled, tmp_path):
+    app = profiled(PROFILE_SLOWEST=20, PROFILE_MAX_FILES=10)
+    path = str(tmp_path / "profiles")
+    os.makedirs(path)
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=_record_entries, args=(app, path, worker)) for worker in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    index = _index(app)
+    assert {endpoint: len(entries) for endpoint, entries in index.items()} == {
+        f"worker{worker}": 20 for worker in range(4)
+    }
+    # nothing indexed was rotated away
+    assert len(_profiles(app)) == 80
@@ -0,0 +1,67 @@
+import re
+from datetime import datetime
+
+from sqlalchemy import event, text
+
+from models import db
+
+ROUTES = [
+    ("GET", "/venues", None),
+    ("GET", "/artists", None),
+    ("GET", "/shows", None),
+    ("GET", f"/shows?from={datetime.now().date().isoformat()}", None),
+    ("GET", "/venues/1", None),
+    ("GET", "/artists/1", None),
+    ("GET", "/api/v1/venues", None),
+    ("GET", "/api/v1/shows", None),
+    ("POST", "/venues/search", {"search_term": "Venue 1"}),
+    ("POST", "/artists/search", {"search_term": "Artist 1"}),
+]
+
+# a SQLite plan step reading every row of one of these tables; "SCAN Venue
+# USING COVERING INDEX ..." reads an index instead
+_full_scan = re.compile(r"^SCAN (Show|Venue|venue_genre|artist_genre)\b(?!.*\bINDEX\b)")
+
+def full_scans(statement, plan):
+    steps = [row[-1] for row in plan]
+    # rows read in index order stop at the LIMIT, e.g. the first page of
+    # /api/v1/venues ordered by id
+    if " LIMIT " in statement and not any("TEMP B-TREE" in step for step in steps):
+        return []
+    return [step for step in steps if _full_scan.match(step)]
+
+
+def test_routes_do_not_scan_the_large_tables(make_catalog):
+    # with the FTS5 tables of the search migration
+    app = make_catalog(venues=500, artists=500, shows=5000, migrations=["5b8e0c4d7a21"])
+    client = app.test_client()
+    with app.app_context():
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                statements.append((statement, parameters))
+
+        scans = []
+        for method, url, data in ROUTES:
+            event.listen(db.engine, "before_cursor_execute", capture)
+            try:
+                response = client.open(url, method=method, data=data)
+            finally:
+                event.remove(db.engine, "before_cursor_execute", capture)
+            assert response.status_code == 200, url
+            with db.engine.connect() as connection:
+                for statement, parameters in statements:
+                    plan = connection.exec_driver_sql(
+                        "EXPLAIN QUERY PLAN " + statement, parameters
+                    ).all()
+                    scans.extend(
+                        f"{method} {url}: {step} in {' '.join(statement.split())[:200]}"
+                        for step in full_scans(statement, plan)
+                    )
+            del statements[:]
+
+    assert not scans, "\n".join(scans)
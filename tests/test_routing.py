@@ -0,0 +1,69 @@
+import shutil
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from cache import page_cache
+from models import db
+from routing import STICKY_COOKIE
+
+
+@pytest.fixture
+def replicated(make_catalog, tmp_path):
+    # a primary and a replica lagging behind it: venue 1 was renamed on the
+    # primary only
+    replica = tmp_path / "replica.db"
+    app = make_catalog(
+        SQLALCHEMY_BINDS={"replica": {"url": f"sqlite:///{replica}"}},
+        CACHE_BACKEND="lru",
+    )
+    shutil.copy(app.config["SQLALCHEMY_DATABASE_URI"][len("sqlite:///"):], replica)
+    with app.app_context():
+        db.session.execute(text("UPDATE \"Venue\" SET name = 'Renamed' WHERE id = 1"))
+        db.session.commit()
+    return app
+
+
+def _create_show(client):
+    start_time = (datetime.now() + timedelta(days=400)).replace(microsecond=0)
+    return client.post(
+        "/shows/create",
+        data={"venue_id": "1", "artist_id": "2", "start_time": str(start_time)},
+    )
+
+
+def test_reads_go_to_the_replica(replicated):
+    client = replicated.test_client()
+    assert b"Renamed" not in client.get("/venues").get_data()
+    assert b"Renamed" not in client.get("/venues/1").get_data()
+
+
+def test_a_client_that_wrote_reads_from_the_primary(replicated):
+    client = replicated.test_client()
+    response = _create_show(client)
+    cookie = response.headers["Set-Cookie"]
+    assert cookie.startswith(f"{STICKY_COOKIE}=")
+    sticky_until = float(cookie.split(";")[0].split("=")[1])
+    assert time.time() < sticky_until <= time.time() + 10
+
+    assert b"Renamed" in client.get("/venues").get_data()
+    assert b"Renamed" in client.get("/venues/1").get_data()
+
+    # back to the replica once the cookie is gone
+    client.delete_cookie("localhost", STICKY_COOKIE)
+    assert b"Renamed" not in client.get("/venues/1").get_data()
+
+
+def test_replica_pages_stay_out_of_an_unreplicated_cache(replicated, monkeypatch):
+    # the Redis counters are bumped at once, while the replica lags
+    monkeypatch.setattr(page_cache.counters, "replicated", False)
+    client = replicated.test_client()
+    client.get("/venues")
+    client.get("/venues")
+    assert page_cache.backend._entries == {}
+
+    monkeypatch.setattr(page_cache.counters, "replicated", True)
+    client.get("/venues")
+    assert len(page_cache.backend._entries) == 1
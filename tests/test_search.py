@@ -0,0 +1,98 @@
+import pytest
+
+from models import db, Genre, Venue
+from search import search, VENUES, _has_fts
+
+
+@pytest.fixture
+def indexed(make_app):
+    # the FTS5 tables and triggers of the search migration
+    app = make_app(migrations=["5b8e0c4d7a21"])
+    with app.app_context():
+        assert _has_fts(VENUES)
+        yield app
+
+
+def _names(results):
+    return [row["name"] for row in results["data"]]
+
+
+def test_triggers_keep_the_index_up_to_date(indexed):
+    venue = Venue(name="Park Square Live", city="San Francisco", state="CA")
+    db.session.add(venue)
+    db.session.commit()
+    assert _names(search(VENUES, "square")) == ["Park Square Live"]
+
+    venue.name = "The Dueling Pianos"
+    db.session.commit()
+    assert search(VENUES, "square")["count"] == 0
+    assert _names(search(VENUES, "pianos")) == ["The Dueling Pianos"]
+
+    venue.genres.append(Genre(name="Jazz"))
+    db.session.commit()
+    assert _names(search(VENUES, "jazz")) == ["The Dueling Pianos"]
+
+    db.session.execute(VENUES.association.delete())
+    db.session.commit()
+    assert search(VENUES, "jazz")["count"] == 0
+
+    db.session.delete(venue)
+    db.session.commit()
+    assert search(VENUES, "pianos")["count"] == 0
+
+
+def test_fts_results_are_ranked(indexed):
+    db.session.add_all(
+        [
+            Venue(name="A Blues Hall", city="Oakland", state="CA"),
+            Venue(name="The Blues Blues Club", city="Blues", state="CA"),
+            Venue(name="Rock Bar", city="Oakland", state="CA"),
+        ]
+    )
+    db.session.commit()
+    # bm25 before name: the venue matching more often comes first
+    assert _names(search(VENUES, "blues")) == ["The Blues Blues Club", "A Blues Hall"]
+
+
+def test_short_terms_scan(indexed):
+    db.session.add_all(
+        [
+            Venue(name="Bar B", city="Oakland", state="CA"),
+            Venue(name="Club A", city="Austin", state="TX"),
+        ]
+    )
+    db.session.commit()
+    # too short for a trigram, ordered by name
+    assert _names(search(VENUES, "tx")) == ["Club A"]
+    assert _names(search(VENUES, "a")) == ["Bar B", "Club A"]
+
+
+def test_pagination(indexed):
+    db.session.add_all(
+        Venue(name=f"Stage {number:02}", city="Austin", state="TX")
+        for number in range(25)
+    )
+    db.session.add(Venue(name="Elsewhere", city="Oakland", state="CA"))
+    db.session.commit()
+
+    first = search(VENUES, "stage", page=1, per_page=20)
+    assert (first["count"], first["page"], first["has_next"]) == (25, 1, True)
+    assert len(first["data"]) == 20
+
+    second = search(VENUES, "stage", page=2, per_page=20)
+    assert (second["count"], second["has_next"]) == (25, False)
+    assert len(second["data"]) == 5
+    assert not {row["id"] for row in first["data"]} & {row["id"] for row in second["data"]}
+
+    past = search(VENUES, "stage", page=3, per_page=20)
+    assert (past["count"], past["data"], past["has_next"]) == (25, [], False)
+
+
+def test_search_venues_page(make_catalog):
+    # without the FTS5 tables, through the view
+    app = make_catalog()
+    with app.app_context():
+        name = db.session.get(Venue, 1).name
+    response = app.test_client().post("/venues/search", data={"search_term": name})
+    assert response.status_code == 200
+    assert name.encode() in response.get_data()
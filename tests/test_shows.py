@@ -0,0 +1,209 @@
+import html
+import json
+import re
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from bookings import book_shows, occurrences, MAX_OCCURRENCES
+from models import db, Show
+from pagination import MAX_PAGE_SIZE
+
+
+def _upcoming(client, path):
+    data = json.loads(client.get(path).get_data())["data"]
+    return {item["id"]: item["num_upcoming_shows"] for item in data}
+
+
+def test_new_show_refreshes_the_cached_listings(make_catalog):
+    client = make_catalog(CACHE_BACKEND="lru").test_client()
+    venues = _upcoming(client, "/api/v1/venues")
+    artists = _upcoming(client, "/api/v1/artists")
+
+    start_time = (datetime.now() + timedelta(days=400)).replace(microsecond=0)
+    response = client.post(
+        "/shows/create",
+        data={"venue_id": "1", "artist_id": "2", "start_time": str(start_time)},
+    )
+    assert response.status_code == 200
+
+    assert _upcoming(client, "/api/v1/venues")[1] == venues[1] + 1
+    assert _upcoming(client, "/api/v1/artists")[2] == artists[2] + 1
+
+
+def _start_time():
+    return (datetime.now() + timedelta(days=400)).replace(minute=0, second=0, microsecond=0)
+
+
+def test_recurring_series_is_listed(make_catalog):
+    app = make_catalog()
+    start_time = _start_time()
+    response = app.test_client().post(
+        "/shows/create",
+        data={
+            "venue_id": "1",
+            "artist_id": "2",
+            "start_time": str(start_time),
+            "duration": "90",
+            "recurrence": "WEEKLY",
+            "repeat_count": "4",
+        },
+    )
+    assert response.status_code == 200
+    assert b"4 shows were successfully listed!" in response.get_data()
+    with app.app_context():
+        shows = Show.query.filter(Show.start_time >= start_time).order_by(Show.start_time).all()
+        assert [(show.venue_id, show.artist_id) for show in shows] == [(1, 2)] * 4
+        assert [show.start_time for show in shows] == [
+            start_time + timedelta(weeks=week) for week in range(4)
+        ]
+        assert all(show.end_time == show.start_time + timedelta(minutes=90) for show in shows)
+
+
+@pytest.mark.parametrize(
+    "fields, message",
+    [
+        ({"recurrence": "CUSTOM", "rrule": "FREQ=MINUTELY;COUNT=5"}, b"daily, weekly"),
+        ({"recurrence": "CUSTOM", "rrule": "EVERY FRIDAY"}, b"could not be listed"),
+        ({"duration": "0"}, b"duration"),
+        ({"recurrence": "WEEKLY", "repeat_count": "1000"}, b"repeat_count"),
+    ],
+)
+def test_invalid_shows_are_rejected(make_catalog, fields, message):
+    app = make_catalog()
+    data = {"venue_id": "1", "artist_id": "2", "start_time": str(_start_time())}
+    response = app.test_client().post("/shows/create", data={**data, **fields})
+    assert response.status_code == 400
+    assert message in response.get_data()
+    with app.app_context():
+        assert db.session.query(Show).count() == 100
+
+
+def test_occurrences_are_bounded():
+    start_time = datetime(2026, 10, 18, 20)
+    # open ended, cut after a year
+    assert len(occurrences(start_time, "FREQ=DAILY")) == MAX_OCCURRENCES
+    assert occurrences(start_time, "FREQ=WEEKLY")[-1] == datetime(2027, 10, 17, 20)
+    assert occurrences(start_time, "FREQ=MONTHLY;BYDAY=1FR;COUNT=3") == [
+        datetime(2026, 11, 6, 20),
+        datetime(2026, 12, 4, 20),
+        datetime(2027, 1, 1, 20),
+    ]
+    # never matches, found out without scanning up to year 9999
+    started = time.perf_counter()
+    with pytest.raises(ValueError):
+        occurrences(start_time, "FREQ=DAILY;BYMONTH=2;BYMONTHDAY=30")
+    assert time.perf_counter() - started < 1
+    for rule in ("FREQ=HOURLY", "FREQ=SECONDLY;BYMONTH=2;BYMONTHDAY=30"):
+        with pytest.raises(ValueError):
+            occurrences(start_time, rule)
+
+
+def test_recurrence_without_occurrences_is_rejected(make_catalog):
+    client = make_catalog().test_client()
+    start_time = (datetime.now() + timedelta(days=400)).replace(microsecond=0)
+    response = client.post(
+        "/shows/create",
+        data={
+            "venue_id": "1",
+            "artist_id": "2",
+            "start_time": str(start_time),
+            "recurrence": "CUSTOM",
+            "rrule": f"FREQ=WEEKLY;UNTIL={start_time - timedelta(days=7):%Y%m%dT%H%M%S}",
+        },
+    )
+    assert response.status_code == 400
+    assert b"no occurrence" in response.get_data()
+
+
+def test_book_shows_rejects_an_empty_batch(make_app):
+    with make_app().app_context():
+        with pytest.raises(ValueError):
+            book_shows([])
+
+
+def test_double_booking_is_refused(make_catalog):
+    app = make_catalog()
+    with app.app_context():
+        booked = Show.query.order_by(Show.id).first()
+        venue_id, artist_id = booked.venue_id, booked.artist_id
+        start_time = booked.start_time + timedelta(minutes=30)
+    client = app.test_client()
+    other_artist = artist_id % 10 + 1
+    response = client.post(
+        "/shows/create",
+        data={
+            "venue_id": str(venue_id),
+            "artist_id": str(other_artist),
+            "start_time": str(start_time),
+        },
+    )
+    assert response.status_code == 409
+    assert b"Show could not be listed. The venue is already booked" in response.get_data()
+    with app.app_context():
+        assert db.session.query(Show).count() == 100
+
+
+def _listed(client, path):
+    # walks /shows from path along its Next links; returns the pages as
+    # lists of (venue_id, artist_id)
+    pages = []
+    while path:
+        response = client.get(path)
+        assert response.status_code == 200
+        page = response.get_data(as_text=True)
+        pages.append(
+            [
+                (int(venue_id), int(artist_id))
+                for artist_id, venue_id in re.findall(
+                    r'href="/artists/(\d+)">.*?href="/venues/(\d+)"', page, re.S
+                )
+            ]
+        )
+        next_page = re.search(r'<a href="(/shows\?[^"]+)"><button', page)
+        path = html.unescape(next_page.group(1)) if next_page else None
+    return pages
+
+
+def _shows(*criteria):
+    shows = db.session.query(Show).filter(*criteria).order_by(Show.start_time, Show.id)
+    return [(show.venue_id, show.artist_id) for show in shows]
+
+
+def test_shows_are_paged_with_a_cursor(make_catalog):
+    app = make_catalog()
+    pages = _listed(app.test_client(), "/shows?limit=30")
+    assert [len(page) for page in pages] == [30, 30, 30, 10]
+    with app.app_context():
+        assert sum(pages, []) == _shows()
+
+
+def test_shows_within_a_window(make_catalog):
+    app = make_catalog()
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    end = start + timedelta(days=60)
+    pages = _listed(
+        app.test_client(), f"/shows?from={start.isoformat()}&to={end.isoformat()}&limit=4"
+    )
+    assert all(len(page) == 4 for page in pages[:-1])
+    with app.app_context():
+        window = _shows(Show.start_time >= start, Show.start_time < end)
+    assert 4 < len(window) < 100
+    assert sum(pages, []) == window
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["after=yesterday_1", "after=2024-01-01T20:00:00_x", "from=soon", "to=2024-13-01"],
+)
+def test_malformed_cursors_and_windows_are_refused(make_catalog, query):
+    client = make_catalog().test_client()
+    assert client.get(f"/shows?{query}").status_code == 400
+
+
+def test_page_size_is_bounded(make_catalog):
+    app = make_catalog(shows=150)
+    client = app.test_client()
+    assert [len(page) for page in _listed(client, "/shows?limit=1000")] == [MAX_PAGE_SIZE, 50]
+    assert client.get("/shows?limit=0").get_data().count(b"tile-show") == 1
@@ -0,0 +1,64 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.bench_startup import DEFERRED
+
+ROOT = Path(__file__).parent.parent
+
+CHILD = """
+import json, sys
+import click
+from flask import Flask
+from flask.cli import ScriptInfo
+
+def loaded():
+    return [name for name in {deferred!r} if name in sys.modules]
+
+import app as module
+stages = {{"import": loaded()}}
+assert not any(isinstance(value, Flask) for value in vars(module).values())
+
+application = module.create_app()
+stages["create_app"] = loaded()
+
+client = application.test_client()
+assert client.get("/venues").status_code == 200
+stages["listing"] = loaded()
+
+application.config.update(WTF_CSRF_ENABLED=False)
+assert client.get("/venues/create").status_code == 200
+stages["form"] = loaded()
+
+with click.Context(click.Command("flask"), obj=ScriptInfo(create_app=module.create_app)):
+    module.create_app()
+stages["command"] = loaded()
+print(json.dumps(stages))
+"""
+
+
+def test_heavy_modules_are_imported_on_first_use(make_app, tmp_path):
+    make_app("startup")
+    # a fresh interpreter, in tmp_path where the app writes its error.log
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(ROOT),
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'startup.db'}",
+        "SECRET_KEY": "test",
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD.format(deferred=DEFERRED)],
+        cwd=tmp_path,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    stages = json.loads(result.stdout.splitlines()[-1])
+
+    assert stages["import"] == stages["create_app"] == stages["listing"] == []
+    assert {"wtforms", "flask_wtf"} <= set(stages["form"])
+    assert not {"alembic", "flask_migrate", "dateutil"} & set(stages["form"])
+    assert {"alembic", "flask_migrate"} <= set(stages["command"])
@@ -0,0 +1,19 @@
+from cache import page_cache
+from models import db, Venue
+
+
+def test_delete_venue(make_catalog):
+    app = make_catalog()
+    response = app.test_client().delete("/venues/1")
+    assert response.status_code == 200
+    with app.app_context():
+        assert db.session.get(Venue, 1) is None
+        assert page_cache.versions(["venues", "venue:1"]) == [1, 1]
+
+
+def test_delete_missing_venue_is_not_found(make_catalog):
+    app = make_catalog()
+    response = app.test_client().delete("/venues/999")
+    assert response.status_code == 404
+    with app.app_context():
+        assert page_cache.versions(["venues"]) == [0]
@@ -0,0 +1,280 @@
+import sys
+from datetime import datetime
+from flask import (
+    Blueprint,
+    abort,
+    current_app,
+    flash,
+    redirect,
+    render_template,
+    request,
+    url_for,
+)
+from models import db, Venue, Show
+from counters import remove_shows
+from search import search, VENUES
+from genres import resolve_genres
+from cache import page_cache
+from conditional import conditional, venues_version, venue_version
+from queries import venue_list, venue_areas, venue_detail
+from views import render_listing, venue_dependents
+
+
+# Venue pages: listing, search, detail, and the create, edit and delete
+# forms. The form classes are imported by the views building them, so that
+# wtforms is only loaded once a form is served.
+
+venues_bp = Blueprint("venues", __name__)
+
+
+@venues_bp.route("/venues")
+@conditional(venues_version)
+@page_cache.cached("venues")
+def venues():
+    # fetch every venue together with its upcoming show counter in a single
+    # query, ordered so that venues of the same area are adjacent and can be
+    # grouped in one pass
+    venues = (
+        venue_list()
+        .order_by(Venue.state, Venue.city, Venue.id)
+        .yield_per(current_app.config["STREAM_BATCH_SIZE"])
+    )
+
+    return render_listing("pages/venues.html", areas=venue_areas(venues))
+
+
+@venues_bp.route("/venues/search", methods=["POST"])
+def search_venues():
+    search_term = request.form.get("search_term", "")
+    page = request.form.get("page", 1, type=int)
+    response = search(VENUES, search_term, page)
+    return render_template(
+        "pages/search_venues.html",
+        results=response,
+        search_term=request.form.get("search_term", ""),
+    )
+
+
+@venues_bp.route("/venues/<int:venue_id>")
+@conditional(venue_version)
+@page_cache.cached("venue:{venue_id}")
+def show_venue(venue_id):
+    data = venue_detail(venue_id)
+    if not data:
+        abort(404)
+
+    return render_template("pages/show_venue.html", venue=data)
+
+
+#  -----------------------------------------------------------------------#
+#  Create Venue
+#  -----------------------------------------------------------------------#
+
+
+@venues_bp.route("/venues/create", methods=["GET"])
+def create_venue_form():
+    from forms import VenueForm
+
+    form = VenueForm()
+    return render_template("forms/new_venue.html", form=form)
+
+
+@venues_bp.route("/venues/create", methods=["POST"])
+def create_venue_submission():
+
+    from forms import VenueForm
+
+    form = VenueForm()
+
+    name = form.name.data.strip()
+    city = form.city.data
+    state = form.state.data.strip()
+    address = form.address.data.strip()
+    phone = form.phone.data
+    image_link = form.image_link.data.strip()
+    facebook_link = form.facebook_link.data.strip()
+    genres = form.genres.data
+    website_link = form.website_link.data.strip()
+    seeking_talent = True if form.seeking_talent.data == "Yes" else False
+    seeking_description = form.seeking_description.data.strip()
+
+    if not form.phone.validate(form):
+        for fieldName, errorMessages in form.errors.items():
+            for err in errorMessages:
+                if fieldName == "phone":
+                    flash(err)
+        return redirect(url_for("venues.create_venue_submission"))
+    else:
+        insert_error = False
+        try:
+            venue_genres = resolve_genres(genres)
+            new_venue = Venue(
+                name=name,
+                city=city,
+                state=state,
+                address=address,
+                phone=phone,
+                image_link=image_link,
+                facebook_link=facebook_link,
+                website_link=website_link,
+                seeking_talent=seeking_talent,
+                seeking_description=seeking_description,
+                genres=venue_genres,
+            )
+
+            db.session.add(new_venue)
+            db.session.commit()
+        except Exception as e:
+            insert_error = True
+            print(f'Exception "{e}"')
+            db.session.rollback()
+        finally:
+            db.session.close()
+        if not insert_error:
+            page_cache.bump("venues")
+            flash("Venue " + request.form["name"] + " was successfully listed!")
+            return redirect(url_for("index"))
+        else:
+            flash(
+                "An error occurred. Venue "
+                + request.form["name"]
+                + " could not be listed."
+            )
+            abort(500)
+            # return render_template("pages/home.html")
+
+
+@venues_bp.route("/venues/<venue_id>", methods=["DELETE"])
+def delete_venue(venue_id):
+
+    error_on_delete = False
+    new_venue = Venue.query.get(venue_id)
+    if new_venue is None:
+        # before any counter or cache version is touched
+        abort(404)
+    record_id, name = new_venue.id, new_venue.name
+    try:
+        dependents = venue_dependents(record_id)
+        remove_shows(Show.venue_id == record_id)
+        db.session.delete(new_venue)
+        db.session.commit()
+        # the shows removed were on the counters of their artists
+        page_cache.bump("venues", "artists", f"venue:{record_id}", *dependents)
+    except:
+        error_on_delete = True
+        db.session.rollback()
+        print(sys.exc_info())
+    finally:
+        db.session.close()
+    if error_on_delete:
+        flash(f"An error occurred. Venue {name} could not be deleted.")
+        abort(500)
+    else:
+        flash(f"Venue {name} was successfully deleted.")
+
+    return render_template("pages/home.html")
+
+
+#  ----------------------------------------------------------------
+#  Update
+#  ----------------------------------------------------------------
+
+
+@venues_bp.route("/venues/<int:venue_id>/edit", methods=["GET"])
+def edit_venue(venue_id):
+    from forms import VenueForm
+
+    form = VenueForm()
+    venue = Venue.query.filter_by(id=venue_id).one_or_none()
+    if venue is None:
+        abort(404)
+    else:
+        form.name.data = venue.name
+        form.city.data = venue.city
+        form.state.data = venue.state
+        form.phone.data = venue.phone
+        form.address.data = venue.address
+        form.genres.data = venue.genres
+        form.image_link.data = venue.image_link
+        form.facebook_link.data = venue.facebook_link
+        form.website_link.data = venue.website_link
+        form.seeking_talent.data = venue.seeking_talent
+        form.seeking_description.data = venue.seeking_description
+
+    # else:
+    #     # If specified url is not valid redirect to homepage
+    #     return redirect(url_for("index"))
+    # venue = {
+    #     "id": 1,
+    #     "name": "The Musical Hop",
+    #     "genres": ["Jazz", "Reggae", "Swing", "Classical", "Folk"],
+    #     "address": "1015 Folsom Street",
+    #     "city": "San Francisco",
+    #     "state": "CA",
+    #     "phone": "123-123-1234",
+    #     "website": "https://www.themusicalhop.com",
+    #     "facebook_link": "https://www.facebook.com/TheMusicalHop",
+    #     "seeking_talent": True,
+    #     "seeking_description": "We are on the lookout for a local new_venue to play every two weeks. Please call us.",
+    #     "image_link": "https://images.unsplash.com/photo-1543900694-133f37abaaa5?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=400&q=60",
+    # }
+    # populate form with values from venue with ID <venue_id>
+    return render_template("forms/edit_venue.html", form=form, venue=venue)
+
+
+@venues_bp.route("/venues/<int:venue_id>/edit", methods=["POST"])
+def edit_venue_submission(venue_id):
+    # take values from the form submitted, and update existing
+    # new_venue record with ID <venue_id> using the new attributes
+    update_error = False
+
+    from forms import VenueForm
+
+    form = VenueForm()
+
+    name = form.name.data.strip()
+    city = form.city.data.strip()
+    state = form.state.data
+    address = form.address.data.strip()
+    phone = form.phone.data
+    image_link = form.image_link.data.strip()
+    facebook_link = form.facebook_link.data.strip()
+    genres = form.genres.data
+    website_link = form.website_link.data.strip()
+    seeking_talent = True if form.seeking_talent.data == "Yes" else False
+    seeking_description = form.seeking_description.data.strip()
+
+    try:
+        venue_genres = resolve_genres(genres)
+        venue = Venue.query.filter_by(id=venue_id).one_or_none()
+
+        venue.name = name
+        venue.city = city
+        venue.state = state
+        venue.address = address
+        venue.phone = phone
+        venue.image_link = image_link
+        venue.facebook_link = facebook_link
+        venue.website_link = website_link
+        venue.seeking_talent = seeking_talent
+        venue.seeking_description = seeking_description
+
+        venue.genres = venue_genres
+        # the genres are not columns of the row, so touch it explicitly
+        venue.updated_at = datetime.utcnow()
+        dependents = venue_dependents(venue_id)
+        db.session.commit()
+        page_cache.bump("venues", f"venue:{venue_id}", *dependents)
+    except:
+        update_error = True
+        db.session.rollback()
+        print(sys.exc_info())
+    finally:
+        db.session.close()
+    if update_error:
+        flash("An error occurred. Venue " + name + " could not be updated.")
+        abort(500)
+    else:
+        flash("Venue " + name + " was successfully updated!")
+
+    return redirect(url_for("venues.show_venue", venue_id=venue_id))
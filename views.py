@@ -0,0 +1,62 @@
+from datetime import datetime
+from flask import Response, current_app, render_template, request, stream_template
+from models import db, Venue, Artist, Show
+
+
+# Helpers shared by the venue, artist and show blueprints and the export
+# view.
+
+
+def buffered(chunks, size=8192):
+    # stream_template() yields every template fragment on its own, group
+    # them so the response is written in reasonably sized pieces
+    buffer, length = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield "".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def touch(model, ids):
+    # mark rows as changed for the conditional GET of their pages
+    if ids:
+        db.session.query(model).filter(model.id.in_(ids)).update(
+            {model.updated_at: datetime.utcnow()}, synchronize_session=False
+        )
+
+
+def venue_dependents(venue_id):
+    # touch the artists whose pages show the name or image of a venue and
+    # return the cache version keys of the pages concerned
+    artist_ids = [
+        artist_id
+        for (artist_id,) in db.session.query(Show.artist_id)
+        .filter(Show.venue_id == venue_id)
+        .distinct()
+    ]
+    touch(Artist, artist_ids)
+    return ["shows"] + [f"artist:{artist_id}" for artist_id in artist_ids]
+
+
+def artist_dependents(artist_id):
+    # touch the venues whose pages show the name or image of an artist and
+    # return the cache version keys of the pages concerned
+    venue_ids = [
+        venue_id
+        for (venue_id,) in db.session.query(Show.venue_id)
+        .filter(Show.artist_id == artist_id)
+        .distinct()
+    ]
+    touch(Venue, venue_ids)
+    return ["shows"] + [f"venue:{venue_id}" for venue_id in venue_ids]
+
+
+def render_listing(template_name, **context):
+    # render a listing page, streamed when its endpoint is in STREAMED_PAGES
+    if request.endpoint in current_app.config["STREAMED_PAGES"]:
+        return Response(buffered(stream_template(template_name, **context)))
+    return render_template(template_name, **context)